@@ -0,0 +1,260 @@
+"""
+Async (ASGI) entry point for production.
+
+The game event stream and the game WebSocket are served natively on the
+event loop, so an idle watcher costs a coroutine rather than a thread. The
+rest of the app is the regular Flask app: its requests, and the game
+commands sent over sockets (bot decisions and hand evaluation are CPU-bound),
+run on a bounded thread pool so they never block the loop.
+
+Run it with any ASGI server, e.g.:
+    pip install uvicorn
+    uvicorn asgi:application --port 8080
+or simply:
+    python asgi.py
+"""
+import asyncio
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import session
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+
+from server import app, start_background_work
+from controllers.GameController import EVENT_KEEPALIVE, games, handle_socket_message
+from models.game_events import Game_Events
+from models import metrics
+from models.serialization import GAME_NOT_FOUND, NOT_LOGGED_IN, dumps, dumps_text
+
+# Threads for Flask requests and game commands (ASGI_THREADS overrides)
+executor = ThreadPoolExecutor(max_workers=int(os.environ.get("ASGI_THREADS", 32)), thread_name_prefix="asgi")
+
+# Routes served on the event loop; everything else goes to Flask. Their endpoints
+# are the names the Flask app gives the same routes, so the request metrics match
+native_routes = Map([
+    Rule('/api/game/<game_id>/events', endpoint='game_events'),
+    Rule('/api/game/<game_id>/ws', endpoint='game_socket', websocket=True),
+])
+
+def build_environ(scope, body=b''):
+    """Translate an ASGI connection scope into a WSGI environ"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope.get('method', 'GET'),
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin1'),
+        'PATH_INFO': scope['path'].encode().decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+def session_username(scope):
+    """The username in the connection's session cookie, if logged in"""
+    with app.request_context(build_environ(scope)):
+        return session.get("username")
+
+def run_wsgi(environ):
+    """Run a request through the Flask app; returns (status, headers, body)"""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers]
+
+    result = app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], body
+
+async def serve_wsgi(scope, receive, send):
+    """Hand an HTTP request to Flask on the thread pool"""
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+
+    loop = asyncio.get_running_loop()
+    status, headers, body = await loop.run_in_executor(executor, run_wsgi, build_environ(scope, b''.join(chunks)))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def send_json_error(send, status, reply):
+    """Answer with a pre-encoded JSON error; returns the status, for the request metrics"""
+    await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': dumps(reply)})
+    return status
+
+async def stream_events(scope, receive, send, game_id):
+    """
+    Stream a game's events as Server-Sent Events (same protocol as GameController.game_events)
+    Returns: the response status
+    """
+    username = session_username(scope)
+    if username is None:
+        return await send_json_error(send, 401, NOT_LOGGED_IN)
+    if game_id not in games:
+        return await send_json_error(send, 404, GAME_NOT_FOUND)
+
+    subscription = Game_Events.subscribe(game_id, username)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+        while not subscription.closed:
+            waiting = asyncio.ensure_future(subscription.get_async(timeout=EVENT_KEEPALIVE))
+            await asyncio.wait({waiting, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                waiting.cancel()
+                break
+            encoded = waiting.result()
+            chunk = ": keep-alive\n\n" if encoded is None else f"data: {encoded}\n\n"
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+        if not disconnected.done():
+            # Dropped for falling behind; the browser reconnects and resyncs
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnected.cancel()
+        Game_Events.unsubscribe(subscription)
+    return 200
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+async def game_socket(scope, receive, send, game_id):
+    """
+    Two-way game channel (same protocol as GameController.game_socket)
+    Returns: the status for the request metrics (101 once the socket is accepted)
+    """
+    if (await receive())['type'] != 'websocket.connect':
+        return 400
+    await send({'type': 'websocket.accept'})
+
+    username = session_username(scope)
+    error = None
+    if username is None:
+        error = NOT_LOGGED_IN
+    elif game_id not in games:
+        error = GAME_NOT_FOUND
+    if error:
+        await send({'type': 'websocket.send', 'text': dumps_text(error)})
+        await send({'type': 'websocket.close', 'code': 1000})
+        return 101
+
+    loop = asyncio.get_running_loop()
+    subscription = Game_Events.subscribe(game_id, username)
+    receiving = asyncio.ensure_future(receive())
+    pushing = asyncio.ensure_future(subscription.get_async())
+    try:
+        while not subscription.closed:
+            done, _ = await asyncio.wait({receiving, pushing}, return_when=asyncio.FIRST_COMPLETED)
+            if pushing in done:
+                encoded = pushing.result()
+                if encoded is not None:
+                    await send({'type': 'websocket.send', 'text': encoded})
+                pushing = asyncio.ensure_future(subscription.get_async())
+            if receiving in done:
+                message = receiving.result()
+                if message['type'] == 'websocket.disconnect':
+                    return 101
+                text = message.get('text') or (message.get('bytes') or b'').decode()
+                reply = await loop.run_in_executor(executor, handle_socket_message, game_id, username, text, subscription)
+                await send({'type': 'websocket.send', 'text': reply})
+                receiving = asyncio.ensure_future(receive())
+        # Dropped for falling behind; the client reconnects and resyncs
+        await send({'type': 'websocket.close', 'code': 1013})
+    finally:
+        receiving.cancel()
+        pushing.cancel()
+        Game_Events.unsubscribe(subscription)
+    return 101
+
+async def count_request(route, handler):
+    """
+    Run a natively served route with the request metrics the Flask app keeps
+    for its own routes (in flight, duration and count by status). Profiling
+    is left to the Flask routes: these mostly wait on the loop
+    """
+    metrics.REQUESTS_IN_FLIGHT.inc(route)
+    start = time.perf_counter()
+    status = 500
+    try:
+        status = await handler
+    finally:
+        metrics.REQUESTS_IN_FLIGHT.dec(route)
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, route, 'GET')
+        metrics.REQUESTS.inc(route, str(status))
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            start_background_work()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    """The ASGI application"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    adapter = native_routes.bind('localhost', path_info=scope['path'],
+                                 url_scheme='ws' if scope['type'] == 'websocket' else 'http')
+    try:
+        endpoint, arguments = adapter.match(websocket=scope['type'] == 'websocket')
+        game_id = int(arguments['game_id'])
+    except (HTTPException, ValueError):
+        endpoint = None
+
+    if endpoint == 'game_events' and scope['method'] == 'GET':
+        await count_request(endpoint, stream_events(scope, receive, send, game_id))
+    elif endpoint == 'game_socket':
+        await count_request(endpoint, game_socket(scope, receive, send, game_id))
+    elif scope['type'] == 'websocket':
+        await send({'type': 'websocket.close', 'code': 1008})
+    else:
+        await serve_wsgi(scope, receive, send)
+
+if __name__ == "__main__":
+    # pip install uvicorn
+    import uvicorn
+    uvicorn.run("asgi:application", port=int(os.environ.get("PORT", 8080)))
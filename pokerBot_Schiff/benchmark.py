@@ -0,0 +1,211 @@
+"""
+Benchmarks the game's hot paths and compares them with a saved baseline.
+
+Measures hand evaluations, showdowns, deals, bot decisions and JSON encoding
+per second on fixed, seeded inputs. Every run is appended to a history file so speed can
+be tracked over time. With a baseline saved, a benchmark that runs slower
+than the baseline by more than the tolerance fails the run (exit status 1).
+Baselines are only comparable on the machine that recorded them.
+
+Usage:
+    python benchmark.py --save            # record the baseline on this machine
+    python benchmark.py                   # compare with it
+    python benchmark.py --only evaluate --tolerance 0.1
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from models.cards import CARD_NAMES
+from models import hand_ranks
+from controllers.GameController import evaluate_hand, determine_winner, deal_hand, choose_bot_action
+from models.decision_cache import DECISION_CACHE
+from models import serialization
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'benchmarks')
+BASELINE_PATH = os.path.join(RESULTS_DIR, 'baseline.json')
+HISTORY_PATH = os.path.join(RESULTS_DIR, 'history.jsonl')
+
+# A benchmark runs for at least this long per round; the best of the rounds is kept
+MIN_ROUND_SECONDS = 0.3
+ROUNDS = 5
+
+# Distinct inputs each benchmark cycles through
+INPUTS = 1000
+
+def random_hands(rng, count, size):
+    return [rng.sample(range(52), size) for _ in range(count)]
+
+def as_names(hands):
+    return [[CARD_NAMES[code] for code in cards] for cards in hands]
+
+def new_game(difficulty='medium'):
+    return {
+        'name': 'benchmark', 'bot_difficulty': difficulty, 'players': ['player', 'bot'], 'game_started': True,
+        'community_cards': [], 'player_hands': {}, 'pot': 0, 'current_bet': 0,
+        'chips': {'player': 10 ** 9, 'bot': 10 ** 9}, 'bets': {'player': 0, 'bot': 0}, 'round': 'pre-flop'
+    }
+
+def bench_evaluate_hand(rng):
+    """evaluate_hand (GameController) on 7 cards"""
+    hands = as_names(random_hands(rng, INPUTS, 7))
+    return lambda: [evaluate_hand(cards[:2], cards[2:]) for cards in hands]
+
+def bench_evaluate_fast(rng):
+    """hand_ranks.evaluate (lookup tables) on 7 cards"""
+    hands = random_hands(rng, INPUTS, 7)
+    evaluate = hand_ranks.evaluate
+    evaluate(hands[0])  # Load the tables outside the timing
+    return lambda: [evaluate(cards) for cards in hands]
+
+def bench_showdown(rng):
+    """determine_winner on two hole hands and a full board"""
+    deals = as_names(random_hands(rng, INPUTS, 9))
+    return lambda: [determine_winner(cards[:2], cards[2:4], cards[4:]) for cards in deals]
+
+def bench_deal(rng):
+    """deal_hand: blinds, shuffle and deal"""
+    game = new_game()
+    random.seed(rng.random())
+    return lambda: [deal_hand(game, 'player') for _ in range(INPUTS)]
+
+def bench_bot_decision(difficulty, cached=False):
+    def bench(rng):
+        game = new_game(difficulty)
+        spots = [(cards[:2], cards[2:2 + street]) for cards, street in
+                 zip(as_names(random_hands(rng, INPUTS, 7)), rng.choices([0, 3, 4, 5], k=INPUTS))]
+        random.seed(rng.random())
+
+        def run():
+            if not cached:
+                DECISION_CACHE.clear()  # Work out every strategy
+            return [choose_bot_action(game, bot_cards, board) for bot_cards, board in spots]
+        return run
+    bench.__doc__ = f"choose_bot_action at the {difficulty} level, mixed streets" + (", from the cache" if cached else "")
+    return bench
+
+def dealt_responses(rng):
+    game = new_game()
+    random.seed(rng.random())
+    return [dict(deal_hand(game, 'player'), round='pre-flop', street_complete=False, hand_over=False)
+            for _ in range(INPUTS)]
+
+def bench_encode_response(rng):
+    """serialization.dumps on game responses"""
+    responses = dealt_responses(rng)
+    return lambda: [serialization.dumps(response) for response in responses]
+
+def bench_encode_response_stdlib(rng):
+    """json.dumps on game responses, as jsonify encoded them, for comparison"""
+    responses = dealt_responses(rng)
+    return lambda: [json.dumps(response).encode() for response in responses]
+
+def bench_encode_user_record(rng):
+    """serialization.dumps on user store log records"""
+    records = [{'op': 'update', 'user': {'id': n, 'username': f'player{n}', 'email': f'player{n}@example.com',
+                'password': 'scrypt$16384$8$1$' + 'x' * 68, 'bankroll': rng.randrange(5000),
+                'hands_played': n, 'hands_won': n // 2}} for n in range(INPUTS)]
+    return lambda: [serialization.dumps(record) for record in records]
+
+# name -> (setup returning a function that runs INPUTS operations, unit)
+BENCHMARKS = {
+    'evaluate_hand': (bench_evaluate_hand, 'evaluations/s'),
+    'evaluate_fast': (bench_evaluate_fast, 'evaluations/s'),
+    'showdown': (bench_showdown, 'showdowns/s'),
+    'deal': (bench_deal, 'deals/s'),
+    'bot_decision_easy': (bench_bot_decision('easy'), 'decisions/s'),
+    'bot_decision_medium': (bench_bot_decision('medium'), 'decisions/s'),
+    'bot_decision_hard': (bench_bot_decision('hard'), 'decisions/s'),
+    'bot_decision_cached': (bench_bot_decision('medium', cached=True), 'decisions/s'),
+    'encode_response': (bench_encode_response, 'responses/s'),
+    'encode_response_stdlib': (bench_encode_response_stdlib, 'responses/s'),
+    'encode_user_record': (bench_encode_user_record, 'records/s'),
+}
+
+def measure(setup, seed=0, rounds=ROUNDS, min_seconds=MIN_ROUND_SECONDS):
+    """
+    Run a benchmark for `rounds` rounds of at least min_seconds
+    Returns: the best round's operations per second
+    """
+    run = setup(random.Random(seed))
+    run()  # Warm up
+    best = 0.0
+    for _ in range(rounds):
+        operations = 0
+        start = time.perf_counter()
+        while True:
+            run()
+            operations += INPUTS
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                break
+        best = max(best, operations / elapsed)
+    return best
+
+def compare(results, baseline, tolerance):
+    """
+    Find the benchmarks slower than the baseline by more than the tolerance
+    Returns: {name: (result, baseline result)}
+    """
+    return {name: (value, baseline[name]) for name, value in results.items()
+            if name in baseline and value < baseline[name] * (1 - tolerance)}
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths against a saved baseline.")
+    parser.add_argument('--only', action='append', help='run the benchmarks whose names start with this')
+    parser.add_argument('--save', action='store_true', help='save the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before failing (default 0.2)')
+    parser.add_argument('--rounds', type=int, default=ROUNDS)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if not args.only or any(name.startswith(prefix) for prefix in args.only)]
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    except FileNotFoundError:
+        baseline = {}
+
+    results = {}
+    for name in names:
+        setup, unit = BENCHMARKS[name]
+        results[name] = measure(setup, rounds=args.rounds)
+        change = f"{results[name] / baseline[name] - 1:+.1%} vs baseline" if name in baseline else "no baseline"
+        print(f"{name:<22} {results[name]:>14,.0f} {unit:<14} {change}")
+
+    record = {
+        'time': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.node(),
+        'results': results,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(HISTORY_PATH, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({**record, 'results': {**baseline, **results}}, f, indent=4)
+        print(f"Saved the baseline to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name, (value, expected) in regressions.items():
+        print(f"REGRESSION: {name} ran at {value:,.0f}/s, baseline {expected:,.0f}/s")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Builds the static assets served from /static/dist:
+
+- packs the card images into one sprite sheet plus a CSS file mapping every
+  card to its offset in the sheet,
+- fingerprints the file names with a content hash so they can be cached forever,
+- writes gzip (and brotli, when the module is installed) variants of text assets,
+- writes manifest.json, which server.py uses to resolve asset URLs.
+
+Run it after changing anything in static/:
+    pip install pillow
+    python build_assets.py
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+CARDS_DIR = os.path.join(STATIC_DIR, 'cards')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+
+# Cards are displayed at 80x120 CSS pixels; the sheet stores them at 2x for high-DPI screens
+CARD_WIDTH, CARD_HEIGHT = 80, 120
+SCALE = 2
+COLUMNS = 13
+
+VALUES = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'jack', 'queen', 'king', 'ace']
+SUITS = ['hearts', 'diamonds', 'clubs', 'spades']
+CARD_NAMES = [f"{value}_of_{suit}" for suit in SUITS for value in VALUES] + ['card_back']
+
+# Text assets copied into dist as they are
+STATIC_FILES = ['style.css']
+
+def fingerprint(name, data):
+    """Insert a short content hash before the file extension"""
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{extension}"
+
+def write_asset(name, data, manifest, compress=False):
+    """Write a fingerprinted asset (and its compressed variants) and record it in the manifest"""
+    dist_name = fingerprint(name, data)
+    path = os.path.join(DIST_DIR, dist_name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    if compress:
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+    manifest[name] = dist_name
+    return dist_name
+
+def build_sprite():
+    """
+    Pack every card into one PNG and return it with each card's (x, y) offset in
+    CSS pixels. Cards whose file can't be decoded are left out (offset None) and
+    keep being served as separate images.
+    """
+    rows = (len(CARD_NAMES) + COLUMNS - 1) // COLUMNS
+    cell = (CARD_WIDTH * SCALE, CARD_HEIGHT * SCALE)
+    sheet = Image.new('RGBA', (COLUMNS * cell[0], rows * cell[1]), (0, 0, 0, 0))
+    offsets = {}
+    for index, name in enumerate(CARD_NAMES):
+        column, row = index % COLUMNS, index // COLUMNS
+        try:
+            with Image.open(os.path.join(CARDS_DIR, f"{name}.png")) as image:
+                # Crop to fill the cell, like the 'background-size: cover' the cards used to be drawn with
+                card = ImageOps.fit(image.convert('RGBA'), cell, Image.LANCZOS)
+        except UnidentifiedImageError:
+            print(f"Warning: {name}.png is not a PNG image; it stays a separate file")
+            offsets[name] = None
+            continue
+        sheet.paste(card, (column * cell[0], row * cell[1]))
+        offsets[name] = (column * CARD_WIDTH, row * CARD_HEIGHT)
+
+    # Card art is mostly flat colour, so a 256-colour palette cuts the sheet to about a fifth
+    buffer = io.BytesIO()
+    sheet.quantize(256, method=Image.Quantize.FASTOCTREE).save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue(), offsets, (COLUMNS * CARD_WIDTH, rows * CARD_HEIGHT)
+
+def build_sprite_css(sprite_name, offsets, size):
+    """CSS that draws a card from the sheet given the classes 'card-sprite card-<name>'"""
+    # '.card.' selectors outrank the single-class .card-back rules in style.css and game.html
+    lines = [
+        f".card.card-sprite, .card.card-back {{ background-image: url('{sprite_name}'); "
+        f"background-size: {size[0]}px {size[1]}px; }}",
+    ]
+    for name, offset in offsets.items():
+        selector = '.card.card-back' if name == 'card_back' else f'.card.card-{name}'
+        if offset is None:
+            lines.append(f"{selector} {{ background-image: url('/static/cards/{name}.png'); "
+                         f"background-size: cover; background-position: center; }}")
+        else:
+            lines.append(f"{selector} {{ background-position: -{offset[0]}px -{offset[1]}px; }}")
+    return ("\n".join(lines) + "\n").encode()
+
+def main():
+    if os.path.exists(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+    manifest = {}
+
+    sprite, offsets, size = build_sprite()
+    sprite_name = write_asset('cards.png', sprite, manifest)
+    write_asset('cards.css', build_sprite_css(sprite_name, offsets, size), manifest, compress=True)
+
+    for name in STATIC_FILES:
+        with open(os.path.join(STATIC_DIR, name), 'rb') as f:
+            write_asset(name, f.read(), manifest, compress=True)
+
+    with open(os.path.join(DIST_DIR, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=4)
+
+    original = sum(os.path.getsize(os.path.join(CARDS_DIR, f"{name}.png")) for name in offsets if offsets[name])
+    packed = sum(1 for offset in offsets.values() if offset)
+    print(f"Packed {packed} cards ({original // 1024} KB) into {sprite_name} ({len(sprite) // 1024} KB)")
+    for name, dist_name in manifest.items():
+        print(f"  {name} -> dist/{dist_name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Builds the card-abstraction table the bots read their hand strength from:
+every preflop, flop and turn situation (hole cards and canonical board) put
+in one of a few buckets of hands that play alike.
+
+1. Strength: for each canonical board, the hand strength of every hole
+   combination (the share of opponent hands it beats, ties counting half) on
+   each runout of the rest of the board, up to --runouts runouts per board
+   (sampled when there are more). The mean is the expected hand strength (EHS)
+   and the histogram its distribution, which tells a draw from a made hand of
+   the same EHS. Boards are split in chunks, computed by a pool of processes;
+   each chunk is saved under data/buckets/<street>/ as soon as it is done, so
+   an interrupted build picks up where it stopped.
+2. Clustering: k-means on the histograms, per street, fitted on a sample of
+   the situations. Buckets are numbered by mean EHS, weakest first.
+3. The assignments go to data/tables/buckets.tbl, read by models/buckets.py.
+   River buckets are worked out at lookup time; only their number is stored.
+
+On one core the flop takes a couple of minutes and the turn (16,432 boards)
+about ten; more workers divide that.
+
+Usage:
+    python build_buckets.py --workers 8
+    python build_buckets.py --street preflop --street flop --buckets flop=100
+    python build_buckets.py --restart            # discard the saved chunks first
+"""
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+
+import numpy
+
+from models import buckets, flops, hand_ranks, ranges, tables
+from models.table_file import write_table_file
+
+WORK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'buckets')
+
+BOARD_CARDS = {'preflop': 0, 'flop': 3, 'turn': 4}
+
+# Defaults per street: buckets, and the most runouts per board before sampling
+BUCKETS = {'preflop': 20, 'flop': 50, 'turn': 50, 'river': 50}
+RUNOUTS = {'preflop': 1000, 'flop': 100, 'turn': 48}
+
+# Histogram bins of hand strength, from 0 to 1
+BINS = 10
+# Boards per chunk of work
+CHUNK_BOARDS = {'preflop': 1, 'flop': 25, 'turn': 100}
+# Situations sampled to fit the clusters, and k-means iterations
+FIT_SAMPLE = 50000
+ITERATIONS = 30
+
+def canonical_boards(street):
+    """
+    Every canonical board of a street, in packed order (the board ids)
+    Returns: (packed boards, board cards)
+    """
+    size = BOARD_CARDS[street]
+    if size == 0:
+        return [0], [[]]
+    keys = {flops.canonical_key(cards) for cards in itertools.combinations(range(52), size)}
+    ordered = sorted(keys, key=buckets.pack_board)
+    return [buckets.pack_board(key) for key in ordered], [[suit * 13 + rank for rank, suit in key] for key in ordered]
+
+def board_strengths(board, runouts, rng):
+    """
+    Hand strength of every hole combination on the runouts of a board
+    Returns: (EHS per combination, histogram counts per combination); combinations
+    holding a board card get an EHS of 0 and no counts
+    """
+    range_tables = tables.get_table(ranges.TABLE_NAME)
+    evaluator = tables.get_table(hand_ranks.TABLE_NAME)
+    unseen = numpy.array([card for card in range(52) if card not in board])
+    missing = 5 - len(board)
+    if math.comb(len(unseen), missing) <= runouts:
+        drawn = list(itertools.combinations(unseen, missing))
+        drawn = numpy.array(drawn, dtype=numpy.int64).reshape(len(drawn), missing)
+    else:
+        drawn = unseen[numpy.argsort(rng.random((runouts, len(unseen))), axis=1)[:, :missing]]
+    full = numpy.concatenate([numpy.tile(numpy.array(board, dtype=numpy.int64), (len(drawn), 1)), drawn], axis=1)
+
+    # scores[runout, combination], 0 where the combination holds a card of the full board
+    live = ~range_tables.card_masks[full].any(axis=1)
+    runout_index, combo_index = numpy.nonzero(live)
+    scores = numpy.zeros(live.shape, dtype=numpy.int64)
+    scores[runout_index, combo_index] = evaluator.evaluate_many(
+        numpy.concatenate([range_tables.combos[combo_index], full[runout_index]], axis=1))
+
+    # Rank every score within its runout in one sorted pass (scores are below 8192)
+    keys = (numpy.arange(len(full))[:, None] * 8192 + scores).ravel()
+    ordered = numpy.sort(keys)
+    below = numpy.searchsorted(ordered, keys, side='left').reshape(scores.shape)
+    equal = numpy.searchsorted(ordered, keys, side='right').reshape(scores.shape) - below
+    dead = (~live).sum(axis=1, keepdims=True)
+    below = below - numpy.arange(len(full))[:, None] * scores.shape[1] - dead
+    strength = (below + (equal - 1) / 2) / (live.sum(axis=1, keepdims=True) - 1)
+
+    counts = live.sum(axis=0)
+    ehs = numpy.where(counts > 0, (strength * live).sum(axis=0) / numpy.maximum(counts, 1), 0.0)
+    bins = numpy.minimum((strength * BINS).astype(numpy.int64), BINS - 1)
+    histograms = numpy.bincount((combo_index * BINS + bins[runout_index, combo_index]),
+                                minlength=ranges.COMBOS * BINS).reshape(ranges.COMBOS, BINS)
+    return ehs.astype(numpy.float32), histograms.astype(numpy.uint16)
+
+def chunk_path(work_dir, street, chunk):
+    return os.path.join(work_dir, street, f'chunk_{chunk:05d}.npz')
+
+def compute_chunk(street, chunk, boards, runouts, seed, work_dir):
+    """
+    Worker: the strengths of a chunk of boards, saved to its chunk file unless
+    it already exists
+    Returns: whether the chunk was computed (False if it was already saved)
+    """
+    path = chunk_path(work_dir, street, chunk)
+    if os.path.exists(path):
+        return False
+    first = chunk * CHUNK_BOARDS[street]
+    results = [board_strengths(board, runouts, numpy.random.default_rng([seed, first + offset]))
+               for offset, board in enumerate(boards)]
+    tmp_path = f'{path}.{os.getpid()}.tmp.npz'
+    numpy.savez(tmp_path, ehs=numpy.stack([ehs for ehs, _ in results]),
+                histograms=numpy.stack([histograms for _, histograms in results]))
+    os.replace(tmp_path, path)
+    return True
+
+def prepare(work_dir, street, settings, restart):
+    """
+    Create a street's chunk directory, checking that saved chunks were computed
+    with the same settings
+    Raises: SystemExit if they weren't (rerun with --restart)
+    """
+    street_dir = os.path.join(work_dir, street)
+    if restart:
+        shutil.rmtree(street_dir, ignore_errors=True)
+    os.makedirs(street_dir, exist_ok=True)
+    settings_path = os.path.join(street_dir, 'settings.json')
+    if os.path.exists(settings_path):
+        with open(settings_path) as f:
+            saved = json.load(f)
+        if saved != settings:
+            sys.exit(f"The saved {street} chunks were computed with {saved}, not {settings}; use --restart.")
+    else:
+        with open(settings_path, 'w') as f:
+            json.dump(settings, f)
+
+def kmeans(points, count, rng, iterations=ITERATIONS):
+    """
+    Cluster points (rows) into count clusters, seeded with k-means++
+    Returns: the centroids
+    """
+    centroids = [points[rng.integers(len(points))]]
+    distances = ((points - centroids[0]) ** 2).sum(axis=1)
+    for _ in range(1, count):
+        total = distances.sum()
+        choice = rng.choice(len(points), p=distances / total) if total > 0 else rng.integers(len(points))
+        centroids.append(points[choice])
+        distances = numpy.minimum(distances, ((points - points[choice]) ** 2).sum(axis=1))
+    centroids = numpy.array(centroids)
+    for _ in range(iterations):
+        nearest = assign(points, centroids)
+        for cluster in range(count):
+            members = points[nearest == cluster]
+            if len(members):
+                centroids[cluster] = members.mean(axis=0)
+    return centroids
+
+def assign(points, centroids):
+    """Index of each point's nearest centroid"""
+    distances = (points ** 2).sum(axis=1)[:, None] - 2 * points @ centroids.T + (centroids ** 2).sum(axis=1)[None, :]
+    return distances.argmin(axis=1)
+
+def load_chunks(work_dir, street, chunks):
+    for chunk in range(chunks):
+        with numpy.load(chunk_path(work_dir, street, chunk)) as saved:
+            histograms = saved['histograms'].reshape(-1, BINS).astype(numpy.float64)
+            totals = histograms.sum(axis=1, keepdims=True)
+            yield saved['ehs'].ravel(), histograms / numpy.maximum(totals, 1), totals.ravel() > 0
+
+def cluster_street(work_dir, street, chunks, count, seed):
+    """
+    Cluster a street's situations and number the buckets by mean EHS
+    Returns: (bucket per situation, in board then combination order; mean EHS per bucket)
+    """
+    rng = numpy.random.default_rng(seed)
+    per_chunk = max(FIT_SAMPLE // chunks, 1)
+    sample = []
+    for _, points, valid in load_chunks(work_dir, street, chunks):
+        candidates = numpy.nonzero(valid)[0]
+        sample.append(points[rng.choice(candidates, min(per_chunk, len(candidates)), replace=False)])
+    centroids = kmeans(numpy.concatenate(sample), count, rng)
+
+    assignments, sums, sizes = [], numpy.zeros(count), numpy.zeros(count)
+    for ehs, points, valid in load_chunks(work_dir, street, chunks):
+        nearest = assign(points, centroids)
+        assignments.append(nearest)
+        sums += numpy.bincount(nearest[valid], weights=ehs[valid], minlength=count)
+        sizes += numpy.bincount(nearest[valid], minlength=count)
+    means = numpy.where(sizes > 0, sums / numpy.maximum(sizes, 1), 0.0)
+    order = numpy.argsort(means, kind='stable')
+    renumber = numpy.empty(count, dtype=numpy.int64)
+    renumber[order] = numpy.arange(count)
+    return renumber[numpy.concatenate(assignments)].astype(numpy.uint8), means[order].astype(numpy.float32)
+
+def build(streets, bucket_counts, runouts, seed=0, workers=1, work_dir=WORK_DIR, path=buckets.TABLE_PATH,
+          restart=False, progress=print):
+    """
+    Run the pipeline for the streets and write the table file
+    Returns: the table's metadata
+    """
+    # Load the tables before the workers fork, so they share them
+    tables.get_table(hand_ranks.TABLE_NAME)
+    tables.get_table(ranges.TABLE_NAME)
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+
+    sections = {}
+    with context.Pool(workers) as pool:
+        for street in streets:
+            start = time.perf_counter()
+            packed, boards = canonical_boards(street)
+            size = CHUNK_BOARDS[street]
+            chunks = math.ceil(len(boards) / size)
+            prepare(work_dir, street, {'runouts': runouts[street], 'seed': seed, 'bins': BINS, 'chunk_boards': size}, restart)
+            tasks = [(street, chunk, boards[chunk * size:(chunk + 1) * size], runouts[street], seed, work_dir)
+                     for chunk in range(chunks)]
+            done = 0
+            for computed in pool.starmap(compute_chunk, tasks):
+                done += computed
+            progress(f"{street}: {len(boards)} boards, {done} of {chunks} chunks computed "
+                     f"({chunks - done} already saved), {time.perf_counter() - start:.1f} s")
+
+            assignments, strengths = cluster_street(work_dir, street, chunks, bucket_counts[street], seed)
+            sections[street] = ('B', (len(boards), ranges.COMBOS), assignments)
+            sections[f'{street}_strength'] = ('f', (len(strengths),), strengths)
+            if street != 'preflop':
+                sections[f'{street}_boards'] = ('I', (len(packed),), packed)
+
+    metadata = {
+        'streets': list(streets),
+        'buckets': {street: bucket_counts[street] for street in (*streets, 'river')},
+        'runouts': {street: runouts[street] for street in streets},
+        'bins': BINS,
+        'seed': seed,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    write_table_file(path, buckets.TABLE_NAME, buckets.TABLE_VERSION, sections, metadata)
+    return metadata
+
+def parse_counts(values, defaults, maximum=None):
+    """Parse street=N overrides of per-street defaults"""
+    counts = dict(defaults)
+    for value in values or []:
+        street, _, number = value.partition('=')
+        if street not in defaults or not number.isdigit() or not 1 <= int(number) <= (maximum or int(number)):
+            raise argparse.ArgumentTypeError(f"Expected street=N with a street of {', '.join(defaults)}: '{value}'")
+        counts[street] = int(number)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the hand-strength bucket table for the bots.")
+    parser.add_argument('--street', dest='streets', choices=list(BOARD_CARDS), action='append',
+                        help='streets to build (default: all)')
+    parser.add_argument('--buckets', action='append', metavar='STREET=N',
+                        help=f"buckets per street, at most 255 (default {BUCKETS})")
+    parser.add_argument('--runouts', action='append', metavar='STREET=N',
+                        help=f"most runouts per board before sampling (default {RUNOUTS})")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--restart', action='store_true', help='discard the saved chunks')
+    parser.add_argument('--output', default=buckets.TABLE_PATH)
+    args = parser.parse_args()
+    try:
+        bucket_counts = parse_counts(args.buckets, BUCKETS, maximum=255)
+        runouts = parse_counts(args.runouts, RUNOUTS)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    streets = [street for street in BOARD_CARDS if street in (args.streets or BOARD_CARDS)]
+    metadata = build(streets, bucket_counts, runouts, seed=args.seed, workers=args.workers,
+                     path=args.output, restart=args.restart)
+    print(f"Wrote {args.output}: {json.dumps(metadata['buckets'])} buckets "
+          f"({os.path.getsize(args.output)} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+from flask import request, jsonify, abort, current_app, Response
+import hmac
+
+from models.profiler import PROFILER
+from models.decision_cache import DECISION_CACHE
+
+# Requests from these addresses may use the admin routes when no ADMIN_TOKEN is configured
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+def check_admin():
+    """
+    Abort with 403 unless the request may use the admin routes: it carries the
+    configured ADMIN_TOKEN (X-Admin-Token header), or no token is configured
+    and it comes from this machine
+    """
+    token = current_app.config.get('ADMIN_TOKEN')
+    if token:
+        if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+            abort(403)
+    elif request.remote_addr not in LOCAL_ADDRESSES:
+        abort(403)
+
+class AdminController:
+    @staticmethod
+    def profile():
+        """
+        Serve the aggregated request profile in collapsed-stack format
+        (?route= limits it to one endpoint, ?reset=1 clears it afterwards)
+        """
+        check_admin()
+        collapsed = PROFILER.collapsed(request.args.get('route'))
+        if request.args.get('reset'):
+            PROFILER.reset()
+        return Response(collapsed, mimetype='text/plain')
+
+    @staticmethod
+    def update_profile():
+        """
+        Change the profiler's settings at runtime: rate (0 to 1) and routes
+        (comma-separated endpoint names); flush=1 writes the profile to the
+        PROFILE_DIR now
+        """
+        check_admin()
+        settings = request.get_json(silent=True) or request.form
+        routes = settings.get('routes')
+        if isinstance(routes, str):
+            routes = routes.split(',')
+        try:
+            PROFILER.configure(rate=settings.get('rate'), routes=routes)
+        except (TypeError, ValueError) as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        response = {'status': 'success', **PROFILER.settings()}
+        if settings.get('flush'):
+            response['written'] = PROFILER.flush()
+        return jsonify(response)
+
+    @staticmethod
+    def decision_cache():
+        """
+        Serve the shared bot decision cache's statistics: entries, hit rate
+        and estimated memory (?clear=1 empties it afterwards)
+        """
+        check_admin()
+        stats = DECISION_CACHE.stats()
+        if request.args.get('clear'):
+            DECISION_CACHE.clear()
+        return jsonify(stats)
@@ -0,0 +1,60 @@
+from flask import request, send_from_directory, url_for, abort
+import json
+import mimetypes
+import os
+
+# Output of build_assets.py: fingerprinted files, their precompressed variants and manifest.json
+DIST_DIR = os.path.join(os.path.dirname(__file__), '..', 'static', 'dist')
+
+# Fingerprinted names change whenever the content does, so browsers may keep them forever
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+_manifest = None
+
+def load_manifest():
+    """Load the logical name -> fingerprinted name map written by build_assets.py"""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(os.path.join(DIST_DIR, 'manifest.json')) as f:
+                _manifest = json.load(f)
+        except FileNotFoundError:
+            # Assets haven't been built; fall back to the plain static files
+            _manifest = {}
+    return _manifest
+
+def has_asset(filename):
+    """Whether a built asset exists for the logical file name"""
+    return filename in load_manifest()
+
+def asset_url(filename):
+    """URL of the fingerprinted asset if it was built, else of the plain static file"""
+    manifest = load_manifest()
+    if filename in manifest:
+        return url_for('static_dist', filename=manifest[filename])
+    return url_for('static', filename=filename)
+
+class AssetController:
+    @staticmethod
+    def serve(filename):
+        """
+        Serve a fingerprinted asset with long-lived caching, using a
+        precompressed variant when the client accepts it
+        """
+        if filename not in load_manifest().values():
+            abort(404)
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = None
+        for candidate, extension in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[candidate] and os.path.exists(os.path.join(DIST_DIR, filename + extension)):
+                encoding = candidate
+                filename += extension
+                break
+
+        response = send_from_directory(DIST_DIR, filename, mimetype=mimetype, max_age=31536000)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE
+        response.headers['Vary'] = 'Accept-Encoding'
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
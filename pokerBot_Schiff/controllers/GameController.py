@@ -1,17 +1,79 @@
-from flask import request, render_template, redirect, url_for, session, jsonify
-import os
-import sys
+from flask import request, render_template, redirect, url_for, session, Response, stream_with_context
+import itertools
 import random
-
-# Add models directory to path
-fpath = os.path.join(os.path.dirname(__file__), '../models')
-sys.path.append(fpath)
+from contextlib import nullcontext
+from functools import partial
 
 from models.user_model import User_Model
+from models.user_storage import RESULT_FIELDS
+from models.game_events import Game_Events
+from models.cards import CARD_NAMES, card_name, encode_cards
+from models import buckets, flops, metrics, ranges
+from models.odds import equity, outs
+from models.decision_cache import DECISION_CACHE
+from models import admission
+from models.admission import BOT_WORK, TooManyRequestsError
+from models.scheduler import SCHEDULER
+from models.leaderboard import LEADERBOARD
+from models.serialization import GAME_NOT_FOUND, NOT_LOGGED_IN, dumps, dumps_text, loads
 
 # Poker game global state - in a real application, this would be stored in a database
 games = {}
 
+# Odds computed for the current street, by game and player: {game_id: {username: (street, response)}}
+odds_cache = {}
+
+# Equity (or expected hand strength) below which the bot plays a hand as weak, and from which as strong
+WEAK_STRENGTH = 0.5
+STRONG_STRENGTH = 0.7
+
+# The bot's actions, and the range of its raises by difficulty: small, medium and large
+BOT_ACTIONS = ('fold', 'call', 'raise')
+BOT_RAISES = {'easy': (5, 15), 'medium': (10, 30), 'hard': (20, 50)}
+
+# Seconds between keep-alive comments on idle event streams, so proxies don't drop them
+EVENT_KEEPALIVE = 15
+
+# Short keys for the compact response format, which sends card codes instead of names
+COMPACT_FIELDS = {
+    'round': 'r',
+    'community_cards': 'b',
+    'player_cards': 'h',
+    'bot_cards': 'o',
+    'player_chips': 'c',
+    'bot_chips': 'k',
+    'pot': 'p',
+    'current_bet': 'cb',
+    'winner': 'w',
+    'player_hand': 'ph',
+    'bot_hand': 'bh'
+}
+
+# Per-response fields (not part of the game state) that the compact format passes through
+COMPACT_RESPONSE_FIELDS = {
+    'street_complete': 'sc',
+    'hand_over': 'ho',
+    'steps': 'n'
+}
+
+# The blinds posted each hand: the player's small blind and the bot's big blind
+SMALL_BLIND = 5
+BIG_BLIND = 10
+
+# Longest action script accepted by the play endpoint
+MAX_SCRIPT_STEPS = 20
+
+# How long a WebSocket waits for a client message before checking for pushed events
+SOCKET_POLL_INTERVAL = 0.25
+
+# Bot-only showcase tables: the seat the second bot plays from, the default
+# pace of play (seconds between actions, and after a hand before the next deal),
+# and their game IDs, which start above the IDs of players' games
+SHOWCASE_SEAT = 'challenger'
+SHOWCASE_ACTION_SECONDS = 1.5
+SHOWCASE_HAND_SECONDS = 4.0
+showcase_ids = itertools.count(100000)
+
 def get_card_value(card):
     """Convert card name to numeric value"""
     parts = card.split('_of_')
@@ -175,6 +237,890 @@ def get_hand_description(hand_rank):
     }
     return rank_names.get(hand_rank[0], "Unknown")
 
+def strength_tier(strength):
+    """
+    Map an equity or expected hand strength (0 to 1) onto the hand ranks the
+    bot's strategies are written for: 0 plays as a weak hand, 2 as a medium
+    one and 4 as a strong one
+    Returns: the hand rank to play as
+    """
+    if strength < WEAK_STRENGTH:
+        return 0
+    return 2 if strength < STRONG_STRENGTH else 4
+
+def bot_strategy(game, bot_cards, community_cards):
+    """
+    Work out how the bot plays a situation: how likely it is to fold, call or
+    raise, and whether it may still switch at random to stay unpredictable
+    Returns: ((fold, call, raise) weights, may_switch)
+    """
+    # Evaluate bot's hand strength
+    bot_hand = None
+    hand_strength = 0
+    
+    # With the bucket table built, the bot's bucket (which knows draws and the
+    # board) sets its strength; without it, the hand category does
+    situation = buckets.lookup(encode_cards(bot_cards), encode_cards(community_cards))
+    if situation is not None:
+        hand_strength = strength_tier(situation[1])
+    elif community_cards:
+        bot_hand = evaluate_hand(bot_cards, community_cards)
+        hand_strength = bot_hand[0]  # Hand rank (0-9, higher is better)
+    
+    # At the flop, look up the board's texture in the canonical flop index
+    board = None
+    if len(community_cards) == 3:
+        board = flops.texture(encode_cards(community_cards))
+        if situation is None:
+            # A pair (or trips) on the board is in everyone's hand, so it doesn't make ours stronger
+            hand_strength = max(hand_strength - board.paired, 0)
+    
+    # The hard bot weighs its hand against the hands the player's actions point to
+    player_range = game.get('player_range')
+    if game['bot_difficulty'] == 'hard' and player_range is not None and community_cards:
+        hand_strength = strength_tier(player_range.equity(encode_cards(bot_cards), encode_cards(community_cards)))
+    
+    # Define bot behavior based on difficulty and hand strength
+    if game['bot_difficulty'] == 'easy':
+        # Easy bot: More likely to fold with weak hands, rarely raises
+        if hand_strength <= 1:  # High card or pair
+            bot_actions = ['fold'] * 60 + ['call'] * 40  # 60% fold, 40% call
+        elif hand_strength <= 3:  # Two pair or three of a kind
+            bot_actions = ['fold'] * 20 + ['call'] * 70 + ['raise'] * 10  # 20% fold, 70% call, 10% raise
+        else:  # Strong hand
+            bot_actions = ['call'] * 80 + ['raise'] * 20  # 80% call, 20% raise
+        
+    elif game['bot_difficulty'] == 'medium':
+        # Medium bot: More balanced, raises with good hands
+        if hand_strength <= 1:  # High card or pair
+            bot_actions = ['fold'] * 30 + ['call'] * 60 + ['raise'] * 10  # 30% fold, 60% call, 10% raise
+        elif hand_strength <= 3:  # Two pair or three of a kind
+            bot_actions = ['fold'] * 10 + ['call'] * 60 + ['raise'] * 30  # 10% fold, 60% call, 30% raise
+        else:  # Strong hand
+            bot_actions = ['call'] * 40 + ['raise'] * 60  # 40% call, 60% raise
+        
+    else:  # hard
+        # Hard bot: Aggressive, rarely folds, bluffs occasionally
+        if hand_strength <= 1:  # High card or pair
+            # Even with weak hands, sometimes bluff
+            bot_actions = ['fold'] * 10 + ['call'] * 50 + ['raise'] * 40  # 10% fold, 50% call, 40% raise
+        elif hand_strength <= 3:  # Two pair or three of a kind
+            bot_actions = ['call'] * 40 + ['raise'] * 60  # 40% call, 60% raise
+        else:  # Strong hand
+            bot_actions = ['call'] * 20 + ['raise'] * 80  # 20% call, 80% raise
+    
+    if board is not None and hand_strength <= 1:
+        if board.wet:
+            # Flush and straight draws are likely out there: weak hands stop bluffing
+            bot_actions = ['call' if choice == 'raise' else choice for choice in bot_actions]
+        elif not board.paired and game['bot_difficulty'] == 'hard':
+            # Dry boards rarely hit the player, so the hard bot attacks them instead of folding
+            bot_actions = ['raise' if choice == 'fold' else choice for choice in bot_actions]
+    
+    # If there are no community cards yet (pre-flop), make decisions based on hole cards only
+    if not community_cards:
+        # Check if bot has a high pair in hand
+        card1_value = get_card_value(bot_cards[0])[0]
+        card2_value = get_card_value(bot_cards[1])[0]
+        
+        if card1_value == card2_value and card1_value >= 10:  # High pair (10s or better)
+            if game['bot_difficulty'] == 'easy':
+                return (0, 1, 1), False  # Call or raise
+            return (0, 0, 1), False  # Raise
+        elif card1_value >= 12 or card2_value >= 12:  # Face card
+            if game['bot_difficulty'] == 'hard':
+                return (0, 1, 1), False
+            return (0, 1, 0), False  # Call
+    
+    return tuple(bot_actions.count(action) for action in BOT_ACTIONS), True
+
+def decision_key(game, bot_cards, community_cards):
+    """
+    The situation a bot decision depends on, shared by every table that reaches
+    it: the difficulty, the street, the bot's cards and the board with the suits
+    renamed canonically and, for a bot reading the player's range, the player's
+    actions this hand (each with the number of board cards when it was taken).
+    The range was narrowed on the board as it stood at each action, so for that
+    bot the turn and river are kept apart from the flop rather than sorted into it
+    Returns: a hashable key
+    """
+    hole, board = encode_cards(bot_cards), encode_cards(community_cards)
+    reads_range = game['bot_difficulty'] == 'hard' and game.get('player_range') is not None
+    if not board:
+        cards = flops.canonical_key(hole)
+    elif reads_range:
+        cards = buckets.canonical_streets(hole, board)
+    else:
+        cards = buckets.canonical_situation(hole, board)
+    history = tuple(game.get('player_actions', ())) if reads_range else ()
+    return game['bot_difficulty'], len(board), cards, history
+
+@metrics.SUBSYSTEM_SECONDS.time('game', 'bot_decision')
+def choose_bot_action(game, bot_cards, community_cards):
+    """
+    Pick the bot's response to the player's action. The strategy for the
+    situation comes from the shared decision cache when another table has
+    already worked it out; the action and raise are drawn for this game
+    Returns: (bot_action, bot_raise)
+    """
+    key = decision_key(game, bot_cards, community_cards)
+    strategy = DECISION_CACHE.get(key)
+    if strategy is None:
+        strategy = bot_strategy(game, bot_cards, community_cards)
+        DECISION_CACHE.put(key, strategy)
+    weights, may_switch = strategy
+    
+    bot_action = random.choices(BOT_ACTIONS, weights)[0]
+    
+    # Add additional randomness - bot occasionally switches strategy to prevent being predictable
+    if may_switch and random.random() < 0.1:  # 10% chance
+        bot_action = random.choice(BOT_ACTIONS)
+    
+    low, high = BOT_RAISES.get(game['bot_difficulty'], BOT_RAISES['hard'])
+    bot_raise = random.randint(low, high)
+    
+    metrics.BOT_DECISIONS.inc(game['bot_difficulty'], bot_action)
+    return bot_action, bot_raise
+
+def play_action(game, username, action, bet_amount):
+    """
+    Apply a player action (fold, call, raise) and the bot's response to a game
+    Returns: the response data for the client
+    """
+    # Get the current cards
+    bot_cards = game['player_hands'].get('bot', [])
+    community_cards = game['community_cards'][:game.get('visible_cards', 0)]
+    
+    # What the bot learns from the player's action: it narrows the hands they may hold
+    game.setdefault('player_actions', []).append((action, len(community_cards)))
+    if game.get('player_range') is not None:
+        game['player_range'].narrow(action, encode_cards(community_cards), encode_cards(bot_cards))
+    
+    bot_action, bot_raise = choose_bot_action(game, bot_cards, community_cards)
+    
+    # Process player action; action_outcome tells whether the hand ended, the
+    # betting round is closed, or the bot re-raised and the player must respond
+    if action == 'fold':
+        game['action_outcome'] = 'hand_over'
+        # Bot wins the pot
+        game['chips']['bot'] += game['pot']
+        game['pot'] = 0
+        game['bets'][username] = 0
+        game['bets']['bot'] = 0
+        game['current_bet'] = 0
+        
+        response_data = {
+            'message': f'You folded. Bot wins the pot!',
+            'player_chips': game['chips'][username],
+            'bot_chips': game['chips']['bot'],
+            'pot': game['pot']
+        }
+        
+    elif action == 'call':
+        # Player matches the current bet
+        call_amount = game['current_bet'] - game['bets'][username]
+        if call_amount > game['chips'][username]:
+            call_amount = game['chips'][username]  # All-in
+        
+        game['chips'][username] -= call_amount
+        game['bets'][username] += call_amount
+        game['pot'] += call_amount
+        
+        # Bot's action
+        if bot_action == 'fold':
+            # Player wins the pot
+            game['action_outcome'] = 'hand_over'
+            game['chips'][username] += game['pot']
+            game['pot'] = 0
+            response_data = {
+                'message': f'Bot folded. You win the pot!',
+                'player_chips': game['chips'][username],
+                'bot_chips': game['chips']['bot'],
+                'pot': game['pot']
+            }
+            game['bets'][username] = 0
+            game['bets']['bot'] = 0
+            game['current_bet'] = 0
+            
+        else:  # Bot calls
+            game['action_outcome'] = 'street_closed'
+            # Bot matches the player's bet
+            bot_call_amount = game['current_bet'] - game['bets']['bot']
+            if bot_call_amount > game['chips']['bot']:
+                bot_call_amount = game['chips']['bot']  # Bot all-in
+                
+            game['chips']['bot'] -= bot_call_amount
+            game['bets']['bot'] += bot_call_amount
+            game['pot'] += bot_call_amount
+            
+            response_data = {
+                'message': f'You called ${call_amount}. Bot called.',
+                'player_chips': game['chips'][username],
+                'bot_chips': game['chips']['bot'],
+                'pot': game['pot']
+            }
+        
+    elif action == 'raise':
+        # Player raises
+        raise_amount = bet_amount
+        if raise_amount <= 0:
+            raise_amount = 10  # Default raise amount
+            
+        total_bet = game['current_bet'] + raise_amount
+        
+        # Check if player has enough chips
+        if total_bet - game['bets'][username] > game['chips'][username]:
+            total_bet = game['bets'][username] + game['chips'][username]  # All-in
+            
+        player_additional = total_bet - game['bets'][username]
+        game['chips'][username] -= player_additional
+        game['pot'] += player_additional
+        game['bets'][username] = total_bet
+        game['current_bet'] = total_bet
+        
+        # Bot's action
+        if bot_action == 'fold':
+            # Player wins the pot
+            game['action_outcome'] = 'hand_over'
+            game['chips'][username] += game['pot']
+            game['pot'] = 0
+            response_data = {
+                'message': f'You raised to ${total_bet}. Bot folded. You win the pot!',
+                'player_chips': game['chips'][username],
+                'bot_chips': game['chips']['bot'],
+                'pot': game['pot']
+            }
+            game['bets'][username] = 0
+            game['bets']['bot'] = 0
+            game['current_bet'] = 0
+            
+        elif bot_action == 'call':
+            # Bot calls the player's raise
+            game['action_outcome'] = 'street_closed'
+            bot_call_amount = total_bet - game['bets']['bot']
+            if bot_call_amount > game['chips']['bot']:
+                bot_call_amount = game['chips']['bot']  # Bot all-in
+                
+            game['chips']['bot'] -= bot_call_amount
+            game['bets']['bot'] += bot_call_amount
+            game['pot'] += bot_call_amount
+            
+            response_data = {
+                'message': f'You raised to ${total_bet}. Bot called.',
+                'player_chips': game['chips'][username],
+                'bot_chips': game['chips']['bot'],
+                'pot': game['pot']
+            }
+        
+        else:  # Bot raises
+            game['action_outcome'] = 'open'
+            # Bot re-raises
+            bot_total_bet = total_bet + bot_raise
+            bot_additional = bot_total_bet - game['bets']['bot']
+            
+            if bot_additional > game['chips']['bot']:
+                bot_additional = game['chips']['bot']  # Bot all-in
+                bot_total_bet = game['bets']['bot'] + bot_additional
+                
+            game['chips']['bot'] -= bot_additional
+            game['bets']['bot'] = bot_total_bet
+            game['pot'] += bot_additional
+            game['current_bet'] = bot_total_bet
+            
+            response_data = {
+                'message': f'You raised to ${total_bet}. Bot re-raised to ${bot_total_bet}!',
+                'player_chips': game['chips'][username],
+                'bot_chips': game['chips']['bot'],
+                'pot': game['pot'],
+                'current_bet': game['current_bet']
+            }
+    else:
+        game['action_outcome'] = 'open'
+        response_data = {'message': 'Invalid action'}
+    
+    return response_data
+
+@metrics.SUBSYSTEM_SECONDS.time('game', 'deal')
+def deal_hand(game, username):
+    """
+    Post the blinds and deal a new hand
+    Returns: the response data for the client
+    """
+    # Reset bets and add blinds
+    small_blind = SMALL_BLIND
+    big_blind = BIG_BLIND
+    
+    # A hand abandoned by dealing again costs what was already put in
+    settle_hand(game, username)
+    
+    # What the player's bankroll moves by when the hand is over
+    game['hand_start_chips'] = game['chips'][username]
+    game['hand_settled'] = False
+    
+    # Reset the pot and bets
+    game['pot'] = 0
+    game['bets'] = {
+        username: 0,
+        "bot": 0
+    }
+    
+    # Add small blind (player) and big blind (bot)
+    player_blind = min(small_blind, game['chips'][username])
+    bot_blind = min(big_blind, game['chips']['bot'])
+    
+    game['chips'][username] -= player_blind
+    game['chips']['bot'] -= bot_blind
+    game['pot'] = player_blind + bot_blind
+    game['bets'][username] = player_blind
+    game['bets']['bot'] = bot_blind
+    game['current_bet'] = big_blind
+    
+    # Shuffle a fresh deck of cards
+    deck = list(CARD_NAMES)
+    random.shuffle(deck)
+    
+    # Deal player cards
+    game['player_hands'] = {}
+    
+    # Deal player cards
+    player_cards = [deck.pop(), deck.pop()]
+    game['player_hands'][username] = player_cards
+    
+    # Deal bot cards
+    bot_cards = [deck.pop(), deck.pop()]
+    game['player_hands']["bot"] = bot_cards
+    
+    # Deal community cards (face down initially)
+    game['community_cards'] = [deck.pop() for _ in range(5)]
+    game['visible_cards'] = 0  # No community cards visible initially
+    game['round'] = 'pre-flop'
+    game['winner'] = None
+    # The bot's view of the player's hand: anything, until they act (needs NumPy)
+    game['player_range'] = ranges.Player_Range() if ranges.available() else None
+    game['player_actions'] = []
+    metrics.HANDS_DEALT.inc()
+    
+    # Return the player's cards to the frontend; the board stays hidden until it is revealed
+    return {
+        'status': 'success', 
+        'message': f'Cards dealt. You posted small blind (${player_blind}), Bot posted big blind (${bot_blind})',
+        'player_cards': player_cards,
+        'community_cards': [],
+        'player_chips': game['chips'][username],
+        'bot_chips': game['chips']['bot'],
+        'pot': game['pot'],
+        'current_bet': game['current_bet']
+    }
+
+@metrics.SUBSYSTEM_SECONDS.time('game', 'advance')
+def advance_game(game, username):
+    """
+    Advance a game to the next round (flop, turn, river, showdown)
+    Returns: the response data for the client
+    """
+    bot_name = "bot"
+    
+    # Reset bets for the new round but keep the pot
+    game['bets'][username] = 0
+    game['bets'][bot_name] = 0
+    game['current_bet'] = 0
+    
+    visible_community_cards = []
+    bot_cards = None
+    winner = None
+    player_hand_description = None
+    bot_hand_description = None
+    
+    if game['round'] == 'pre-flop':
+        game['round'] = 'flop'
+        game['visible_cards'] = 3
+        visible_community_cards = game['community_cards'][:3]
+    elif game['round'] == 'flop':
+        game['round'] = 'turn'
+        game['visible_cards'] = 4
+        visible_community_cards = game['community_cards'][:4]
+    elif game['round'] == 'turn':
+        game['round'] = 'river'
+        game['visible_cards'] = 5
+        visible_community_cards = game['community_cards'][:5]
+    elif game['round'] == 'river':
+        game['round'] = 'showdown'
+        visible_community_cards = game['community_cards']
+        # In showdown, we also reveal the bot's cards
+        bot_cards = game['player_hands'].get(bot_name, [])
+        player_cards = game['player_hands'].get(username, [])
+        
+        # Evaluate hands and determine winner using poker rules
+        player_hand = evaluate_hand(player_cards, game['community_cards'])
+        bot_hand = evaluate_hand(bot_cards, game['community_cards'])
+        player_hand_description = get_hand_description(player_hand)
+        bot_hand_description = get_hand_description(bot_hand)
+        
+        winner_result = determine_winner(player_cards, bot_cards, game['community_cards'])
+        
+        if winner_result == 'player':
+            winner = username
+        elif winner_result == 'bot':
+            winner = bot_name
+        else:
+            # In case of a tie, split the pot
+            game['chips'][username] += game['pot'] // 2
+            game['chips'][bot_name] += game['pot'] // 2
+            game['pot'] = 0
+            winner = "tie"
+        
+        # Award pot to winner if not a tie
+        if winner and winner != "tie":
+            game['chips'][winner] += game['pot']
+            game['pot'] = 0
+        
+        game['winner'] = winner
+        metrics.SHOWDOWNS.inc('tie' if winner == 'tie' else winner_result)
+        game['player_hand'] = player_hand_description
+        game['bot_hand'] = bot_hand_description
+    
+    response = {
+        'status': 'success', 
+        'round': game['round'], 
+        'visible_cards': game['visible_cards'],
+        'community_cards': visible_community_cards,
+        'player_chips': game['chips'][username],
+        'bot_chips': game['chips'][bot_name],
+        'pot': game['pot']
+    }
+    
+    if bot_cards:
+        response['bot_cards'] = bot_cards
+    
+    if winner:
+        response['winner'] = winner
+        
+        if winner == "tie":
+            response['message'] = f"It's a tie! The pot is split."
+            response['player_hand'] = player_hand_description
+            response['bot_hand'] = bot_hand_description
+        else:
+            winner_name = 'You' if winner == username else 'Bot'
+            if winner == username:
+                response['message'] = f"You win with {player_hand_description}! Bot had {bot_hand_description}."
+            else:
+                response['message'] = f"Bot wins with {bot_hand_description}! You had {player_hand_description}."
+            
+            response['player_hand'] = player_hand_description
+            response['bot_hand'] = bot_hand_description
+    
+    return response
+
+def game_view(game, username):
+    """
+    The state of a game as the player sees it, with cards as integer codes.
+    The board only includes the cards that have been revealed.
+    """
+    showdown = game['round'] == 'showdown'
+    return {
+        'round': game['round'],
+        'community_cards': encode_cards(game['community_cards'][:game.get('visible_cards', 0)]),
+        'player_cards': encode_cards(game['player_hands'].get(username, [])),
+        'bot_cards': encode_cards(game['player_hands'].get('bot', [])) if showdown else [],
+        'player_chips': game['chips'][username],
+        'bot_chips': game['chips']['bot'],
+        'pot': game['pot'],
+        'current_bet': game['current_bet'],
+        'winner': game.get('winner') if showdown else None,
+        'player_hand': game.get('player_hand') if showdown else None,
+        'bot_hand': game.get('bot_hand') if showdown else None
+    }
+
+def record_state(game, username):
+    """
+    Compare the game's view with the last recorded one and bump the state
+    version if anything changed, remembering the version each field last changed in
+    Returns: the current state version
+    """
+    view = game_view(game, username)
+    state = game.setdefault('state', {})
+    field_versions = game.setdefault('field_versions', {})
+    changed = [key for key, value in view.items() if key not in state or state[key] != value]
+    
+    if changed:
+        game['version'] = game.get('version', 0) + 1
+        for key in changed:
+            state[key] = view[key]
+            field_versions[key] = game['version']
+    
+    return game.get('version', 0)
+
+def compact_response(game, response, since=None):
+    """
+    Build the compact form of a response: the state version, the message and
+    only the fields that changed after the client's version 'since'. Without a
+    usable version the client gets every field.
+    """
+    version = game.get('version', 0)
+    if not isinstance(since, int) or since < 0 or since > version:
+        since = 0
+    
+    compact = {'v': version}
+    for key, short_key in COMPACT_FIELDS.items():
+        if game['field_versions'].get(key, 0) > since:
+            compact[short_key] = game['state'][key]
+    
+    for key, short_key in COMPACT_RESPONSE_FIELDS.items():
+        if key in response:
+            compact[short_key] = response[key]
+    
+    if 'message' in response:
+        compact['m'] = response['message']
+    if 'error' in response:
+        compact['error'] = response['error']
+    return compact
+
+def public_event(command, response, username, previous_visible=0):
+    """
+    Build the event broadcast to a game's watchers from a command's response.
+    Hole cards and the face-down board are never included before showdown, and
+    advance events carry only the newly revealed cards.
+    """
+    event = {
+        'type': command,
+        'player': username,
+        'player_chips': response.get('player_chips'),
+        'bot_chips': response.get('bot_chips'),
+        'pot': response.get('pot')
+    }
+    if 'message' in response:
+        event['message'] = response['message']
+    if 'current_bet' in response:
+        event['current_bet'] = response['current_bet']
+    
+    if command == 'advance':
+        event['round'] = response['round']
+        event['visible_cards'] = response['visible_cards']
+        event['revealed'] = response['community_cards'][previous_visible:response['visible_cards']]
+        for key in ('bot_cards', 'winner', 'player_hand', 'bot_hand'):
+            if key in response:
+                event[key] = response[key]
+    
+    return event
+
+def apply_command(game_id, username, command_type, action=None, bet_amount=0, origin=None):
+    """
+    Run a single deal, action or advance against a game and push its public
+    event to everyone watching the game except the origin subscription
+    Returns: the full response data for the player who sent the command
+    """
+    game = games[game_id]
+    previous_visible = game.get('visible_cards', 0)
+    
+    if command_type == 'deal':
+        response = deal_hand(game, username)
+    elif command_type == 'action':
+        response = play_action(game, username, action, bet_amount)
+        # Tell the player whether to act again, advance or deal the next hand
+        response['street_complete'] = game['action_outcome'] == 'street_closed'
+        response['hand_over'] = game['action_outcome'] == 'hand_over'
+    else:
+        response = advance_game(game, username)
+    
+    if command_type in ('deal', 'advance'):
+        odds_cache.pop(game_id, None)  # A new hand or street changes everyone's odds
+    if game.get('action_outcome') == 'hand_over' and command_type == 'action' or game['round'] == 'showdown':
+        settle_hand(game, username)
+    
+    event = public_event(command_type, response, username, previous_visible)
+    if command_type == 'action':
+        event['action'] = action
+    elif command_type == 'advance' and game['round'] == 'showdown':
+        # Everyone sees both hands once the hand is over
+        event['player_cards'] = game['player_hands'].get(username, [])
+    Game_Events.publish(game_id, event, origin)
+    
+    return response
+
+def settle_hand(game, username):
+    """
+    Record a finished hand on the player's user record, moving their bankroll
+    by what they won or lost, and move them on the leaderboard. Each hand is
+    recorded once, when it ends or when it is abandoned for a new deal;
+    showcase tables have no users to record.
+    """
+    if game.get('showcase') or game.get('hand_settled', True):
+        return
+    game['hand_settled'] = True
+    user = User_Model.record_result(username, game['chips'][username] - game['hand_start_chips'])
+    if user is not None:
+        LEADERBOARD.update(user)
+
+def settle_open_hands(username):
+    """
+    Settle every hand the player has left unfinished, at any of their tables,
+    recording the chips already put in. Called when they start another game
+    or log out, so walking away from a losing hand costs what it would have
+    """
+    for game in list(games.values()):
+        if username in game.get('players', ()):
+            settle_hand(game, username)
+
+def play_street(game_id, username, action, bet_amount=0, origin=None):
+    """
+    Apply a player action and the bot's response, then advance the game if
+    that closed the betting round. When a player is all-in there is nothing
+    left to bet, so the remaining streets are dealt through to showdown.
+    Returns: the action's response merged with the last advance's response
+    """
+    game = games[game_id]
+    response = apply_command(game_id, username, 'action', action, bet_amount, origin)
+    outcome = game['action_outcome']
+    
+    combined = dict(response, action_message=response.get('message'), rounds=[])
+    while outcome == 'street_closed' and game['round'] != 'showdown':
+        advanced = apply_command(game_id, username, 'advance', origin=origin)
+        combined.update(advanced)
+        combined['rounds'].append(advanced['round'])
+        if game['chips'][username] > 0 and game['chips']['bot'] > 0:
+            break
+    
+    if 'winner' in combined:
+        combined['message'] = f"{combined['action_message']} {combined['message']}"
+    else:
+        combined['message'] = combined['action_message']
+    combined['round'] = game['round']
+    combined['current_bet'] = game['current_bet']
+    combined['street_complete'] = outcome == 'street_closed'
+    combined['hand_over'] = outcome == 'hand_over' or game['round'] == 'showdown'
+    return combined
+
+def hand_odds(game_id, username):
+    """
+    The player's equity against a random opponent hand and their outs, from
+    their hole cards and the revealed board only. Cached until the next deal
+    or advance, so refreshing the odds display costs a dictionary lookup.
+    Returns: the odds response
+    Raises: ValueError if the player has no cards in this game,
+    TooManyRequestsError if the work queue is full
+    """
+    game = games[game_id]
+    hole = encode_cards(game['player_hands'].get(username, []))
+    if not hole:
+        raise ValueError('No hand has been dealt')
+    board = encode_cards(game['community_cards'][:game.get('visible_cards', 0)])
+    street = (game['round'], tuple(hole), tuple(board))
+    
+    cached = odds_cache.get(game_id, {}).get(username)
+    if cached is not None and cached[0] == street:
+        metrics.CACHE_LOOKUPS.inc('odds', 'hit')
+        return cached[1]
+    metrics.CACHE_LOOKUPS.inc('odds', 'miss')
+    
+    with BOT_WORK.admit(), metrics.SUBSYSTEM_SECONDS.time('game', 'odds'):
+        chances = equity(hole, board)
+        player_outs = [card_name(card) for card in outs(hole, board)]
+    response = {
+        'status': 'success',
+        'round': game['round'],
+        **chances,
+        'outs': player_outs,
+        'out_count': len(player_outs)
+    }
+    odds_cache.setdefault(game_id, {})[username] = (street, response)
+    return response
+
+def parse_script(script):
+    """
+    Parse an action script: a list, or comma-separated string, of steps
+    'deal', 'fold', 'call' or 'raise:<amount>'
+    Returns: a list of (step, bet_amount) pairs
+    Raises: ValueError if a step is invalid or the script is too long
+    """
+    if isinstance(script, str):
+        script = [step.strip() for step in script.split(',') if step.strip()]
+    if not isinstance(script, list) or not script:
+        raise ValueError('The script must list at least one step')
+    if len(script) > MAX_SCRIPT_STEPS:
+        raise ValueError(f'Scripts are limited to {MAX_SCRIPT_STEPS} steps')
+    
+    steps = []
+    for step in script:
+        name, _, amount = str(step).partition(':')
+        if name not in ('deal', 'fold', 'call', 'raise') or (amount and name != 'raise'):
+            raise ValueError(f'Invalid step: {step}')
+        try:
+            steps.append((name, int(amount) if amount else 0))
+        except ValueError:
+            raise ValueError(f'Invalid raise amount: {step}')
+    return steps
+
+def run_script(game_id, username, script, origin=None):
+    """
+    Run an action script for automated clients, one step after the other,
+    stopping early once a hand is over and the next step isn't a deal
+    Returns: every step's response and how many steps ran
+    """
+    steps = parse_script(script)
+    results = []
+    for index, (step, bet_amount) in enumerate(steps):
+        if step == 'deal':
+            results.append(apply_command(game_id, username, 'deal', origin=origin))
+            continue
+        if results and results[-1].get('hand_over'):
+            break
+        results.append(play_street(game_id, username, step, bet_amount, origin))
+    
+    return {
+        'status': 'success',
+        'steps': len(results),
+        'results': results,
+        'hand_over': results[-1].get('hand_over', False),
+        'message': results[-1].get('message')
+    }
+
+def run_game_command(game_id, username, command, origin=None, house=False):
+    """
+    Run a deal, action, advance, play or script command against a game,
+    broadcasting its events. Commands the bot answers wait for a slot in the
+    shared work queue, except the scheduler's, which are turned away at once
+    rather than hold up every other table. Showcase tables only take the
+    scheduler's own commands, which it marks with house=True
+    Returns: the response in the format the command asked for
+    Raises: TooManyRequestsError if the work queue is full
+    """
+    game = games[game_id]
+    command_type = command.get('type')
+    if game.get('showcase') and not house:
+        return {'error': 'Bot tables can only be watched'}
+    slot = BOT_WORK.admit(wait=not house) if command_type in ('action', 'play', 'script') else nullcontext()
+    
+    try:
+        with slot:
+            if command_type in ('deal', 'action', 'advance'):
+                response = apply_command(game_id, username, command_type, command.get('action'),
+                                         int(command.get('bet_amount', 0)), origin)
+            elif command_type == 'play':
+                response = play_street(game_id, username, command.get('action'), int(command.get('bet_amount', 0)), origin)
+            elif command_type == 'script':
+                response = run_script(game_id, username, command.get('script'), origin)
+            else:
+                return {'error': f'Unknown command: {command_type}'}
+    except ValueError as e:
+        return {'error': str(e)}
+    
+    record_state(game, username)
+    if command.get('format') == 'compact':
+        return compact_response(game, response, command.get('since'))
+    return response
+
+def json_response(value):
+    """
+    A JSON response encoded by the serialization module (faster than jsonify)
+    Returns: the response
+    """
+    return Response(dumps(value), mimetype='application/json')
+
+def response_options():
+    """
+    Read the response format options from the query string:
+    ?format=compact&since=<state version>
+    """
+    return {'format': request.args.get('format'), 'since': request.args.get('since', type=int)}
+
+def handle_socket_message(game_id, username, message, subscription=None):
+    """
+    Run a JSON command received on a game socket, counted against the
+    player's game rate limit like an HTTP command
+    Returns: the encoded reply, tagged with the command's type and id
+    """
+    try:
+        command = loads(message)
+        if not isinstance(command, dict):
+            raise TypeError('A command is a JSON object')
+        admission.limit('game', user=username)
+        response = run_game_command(game_id, username, command, origin=subscription)
+    except TooManyRequestsError as e:
+        response = {'error': str(e), 'retry_after': e.retry_after}
+    except (ValueError, TypeError, AttributeError):
+        response = {'error': 'Invalid message'}
+        command = {}
+    return dumps_text(dict(response, type='reply', command=command.get('type'), id=command.get('id')))
+
+def create_bot_table(name, bot_difficulty='medium', challenger_difficulty='medium'):
+    """
+    Create a bot-only showcase table, where a second bot plays the player's
+    seat, for spectators to watch
+    Returns: the new game's ID
+    """
+    game_id = next(showcase_ids)
+    games[game_id] = {
+        "name": name,
+        "bot_difficulty": bot_difficulty,
+        "challenger_difficulty": challenger_difficulty,
+        "showcase": True,
+        "hand_over": True,
+        "players": [SHOWCASE_SEAT, "bot"],
+        "game_started": True,
+        "community_cards": [],
+        "player_hands": {},
+        "pot": 0,
+        "current_bet": 0,
+        "chips": {SHOWCASE_SEAT: 1000, "bot": 1000},
+        "bets": {SHOWCASE_SEAT: 0, "bot": 0},
+        "round": "pre-flop"
+    }
+    return game_id
+
+def showcase_step(game_id, action_seconds=SHOWCASE_ACTION_SECONDS, hand_seconds=SHOWCASE_HAND_SECONDS):
+    """
+    Play the next move at a showcase table: deal when the last hand is over
+    (topping both stacks back up when one can't post the big blind), otherwise
+    let the challenger act and the bot answer. When every slot of the work
+    queue is taken, the table comes back later rather than waiting for one,
+    so players' requests come first and other tables aren't held up.
+    Returns: the seconds until the next move, or None once the table is gone
+    """
+    game = games.get(game_id)
+    if game is None:
+        return None
+    
+    try:
+        if game['hand_over']:
+            if min(game['chips'].values()) < BIG_BLIND:
+                game['chips'] = {SHOWCASE_SEAT: 1000, "bot": 1000}
+            run_game_command(game_id, SHOWCASE_SEAT, {'type': 'deal'}, house=True)
+            game['hand_over'] = False
+            return action_seconds
+        
+        # The challenger decides like the bot does, at its own difficulty and without a read on its opponent
+        community_cards = game['community_cards'][:game.get('visible_cards', 0)]
+        view = dict(game, bot_difficulty=game['challenger_difficulty'], player_range=None)
+        action, bet_amount = choose_bot_action(view, game['player_hands'][SHOWCASE_SEAT], community_cards)
+        response = run_game_command(game_id, SHOWCASE_SEAT, {'type': 'play', 'action': action, 'bet_amount': bet_amount},
+                                    house=True)
+    except TooManyRequestsError as e:
+        return e.retry_after
+    
+    game['hand_over'] = 'error' in response or response['hand_over']
+    return hand_seconds if game['hand_over'] else action_seconds
+
+def start_bot_tables(count, action_seconds=SHOWCASE_ACTION_SECONDS, hand_seconds=SHOWCASE_HAND_SECONDS,
+                     pause_unwatched=True):
+    """
+    Create showcase tables, cycling through the bot difficulty pairings, and
+    add them to the shared background scheduler, starting at staggered times.
+    Unless pause_unwatched is off, a table only plays while someone watches it.
+    The scheduler thread is started by the process that serves requests
+    (server.start_background_work), never in a launcher's master before it forks
+    Returns: the new tables' game IDs
+    """
+    difficulties = list(itertools.product(BOT_RAISES, repeat=2))
+    game_ids = []
+    for index in range(count):
+        bot_difficulty, challenger_difficulty = difficulties[index % len(difficulties)]
+        game_id = create_bot_table(f"Bot table {index + 1}", bot_difficulty, challenger_difficulty)
+        active = partial(Game_Events.watcher_count, game_id) if pause_unwatched else None
+        SCHEDULER.add(game_id, partial(showcase_step, game_id, action_seconds, hand_seconds), active,
+                      delay=random.uniform(0, hand_seconds))
+        game_ids.append(game_id)
+    return game_ids
+
 class GameController:
     @staticmethod
     def user_games():
@@ -212,8 +1158,17 @@ class GameController:
         bot_difficulty = request.form["bot_difficulty"]
         username = session["username"]
         
+        # The player brings their bankroll to the table; the bot always starts with 1000
+        settle_open_hands(username)
+        user = User_Model.get(username=username)
+        bankroll = user.bankroll if user else RESULT_FIELDS["bankroll"]
+        if bankroll < BIG_BLIND:
+            return "You have no chips left to play with", 403
+        
         # Create a unique game ID
         game_id = random.randint(1000, 9999)
+        while game_id in games:
+            game_id = random.randint(1000, 9999)
         
         # Store the game in our global state
         games[game_id] = {
@@ -226,8 +1181,8 @@ class GameController:
             "pot": 0,
             "current_bet": 0,
             "chips": {
-                username: 1000,  # Starting chips for player
-                "bot": 1000      # Starting chips for bot
+                username: bankroll,  # Starting chips for player
+                "bot": 1000          # Starting chips for bot
             },
             "bets": {
                 username: 0,
@@ -292,221 +1247,63 @@ class GameController:
         Handle player actions (fold, call, raise)
         """
         if "username" not in session:
-            return jsonify({'error': 'Not logged in'}), 401
+            return json_response(NOT_LOGGED_IN), 401
             
         game_id = int(game_id)
         if game_id not in games:
-            return jsonify({'error': 'Game not found'}), 404
+            return json_response(GAME_NOT_FOUND), 404
         
         action = request.form['action']
         bet_amount = int(request.form.get('bet_amount', 0))
         username = session["username"]
-        game = games[game_id]
-        
-        # Get the current cards
-        bot_cards = game['player_hands'].get('bot', [])
-        community_cards = game['community_cards'][:game.get('visible_cards', 0)]
         
-        # Evaluate bot's hand strength
-        bot_hand = None
-        hand_strength = 0
-        
-        if community_cards:
-            bot_hand = evaluate_hand(bot_cards, community_cards)
-            hand_strength = bot_hand[0]  # Hand rank (0-9, higher is better)
-        
-        # Define bot behavior based on difficulty and hand strength
-        if game['bot_difficulty'] == 'easy':
-            # Easy bot: More likely to fold with weak hands, rarely raises
-            if hand_strength <= 1:  # High card or pair
-                bot_actions = ['fold'] * 60 + ['call'] * 40  # 60% fold, 40% call
-            elif hand_strength <= 3:  # Two pair or three of a kind
-                bot_actions = ['fold'] * 20 + ['call'] * 70 + ['raise'] * 10  # 20% fold, 70% call, 10% raise
-            else:  # Strong hand
-                bot_actions = ['call'] * 80 + ['raise'] * 20  # 80% call, 20% raise
-                
-            bot_action = random.choice(bot_actions)
-            bot_raise = random.randint(5, 15)  # Small raises
-            
-        elif game['bot_difficulty'] == 'medium':
-            # Medium bot: More balanced, raises with good hands
-            if hand_strength <= 1:  # High card or pair
-                bot_actions = ['fold'] * 30 + ['call'] * 60 + ['raise'] * 10  # 30% fold, 60% call, 10% raise
-            elif hand_strength <= 3:  # Two pair or three of a kind
-                bot_actions = ['fold'] * 10 + ['call'] * 60 + ['raise'] * 30  # 10% fold, 60% call, 30% raise
-            else:  # Strong hand
-                bot_actions = ['call'] * 40 + ['raise'] * 60  # 40% call, 60% raise
-                
-            bot_action = random.choice(bot_actions)
-            bot_raise = random.randint(10, 30)  # Medium raises
-            
-        else:  # hard
-            # Hard bot: Aggressive, rarely folds, bluffs occasionally
-            if hand_strength <= 1:  # High card or pair
-                # Even with weak hands, sometimes bluff
-                bot_actions = ['fold'] * 10 + ['call'] * 50 + ['raise'] * 40  # 10% fold, 50% call, 40% raise
-            elif hand_strength <= 3:  # Two pair or three of a kind
-                bot_actions = ['call'] * 40 + ['raise'] * 60  # 40% call, 60% raise
-            else:  # Strong hand
-                bot_actions = ['call'] * 20 + ['raise'] * 80  # 20% call, 80% raise
-                
-            bot_action = random.choice(bot_actions)
-            bot_raise = random.randint(20, 50)  # Large raises
-        
-        # Add additional randomness - bot occasionally switches strategy to prevent being predictable
-        if random.random() < 0.1:  # 10% chance
-            bot_action = random.choice(['fold', 'call', 'raise'])
-        
-        # If there are no community cards yet (pre-flop), make decisions based on hole cards only
-        if not community_cards:
-            # Check if bot has a high pair in hand
-            card1_value = get_card_value(bot_cards[0])[0]
-            card2_value = get_card_value(bot_cards[1])[0]
-            
-            if card1_value == card2_value and card1_value >= 10:  # High pair (10s or better)
-                if game['bot_difficulty'] == 'easy':
-                    bot_action = random.choice(['call', 'raise'])
-                else:
-                    bot_action = 'raise'
-            elif card1_value >= 12 or card2_value >= 12:  # Face card
-                if game['bot_difficulty'] == 'hard':
-                    bot_action = random.choice(['call', 'raise'])
-                else:
-                    bot_action = 'call'
-        
-        # Process player action
-        if action == 'fold':
-            # Bot wins the pot
-            game['chips']['bot'] += game['pot']
-            game['pot'] = 0
-            game['bets'][username] = 0
-            game['bets']['bot'] = 0
-            game['current_bet'] = 0
-            
-            response_data = {
-                'message': f'You folded. Bot wins the pot!',
-                'player_chips': game['chips'][username],
-                'bot_chips': game['chips']['bot'],
-                'pot': game['pot']
-            }
-            
-        elif action == 'call':
-            # Player matches the current bet
-            call_amount = game['current_bet'] - game['bets'][username]
-            if call_amount > game['chips'][username]:
-                call_amount = game['chips'][username]  # All-in
-            
-            game['chips'][username] -= call_amount
-            game['bets'][username] += call_amount
-            game['pot'] += call_amount
-            
-            # Bot's action
-            if bot_action == 'fold':
-                # Player wins the pot
-                game['chips'][username] += game['pot']
-                game['pot'] = 0
-                response_data = {
-                    'message': f'Bot folded. You win the pot!',
-                    'player_chips': game['chips'][username],
-                    'bot_chips': game['chips']['bot'],
-                    'pot': game['pot']
-                }
-                game['bets'][username] = 0
-                game['bets']['bot'] = 0
-                game['current_bet'] = 0
-                
-            else:  # Bot calls
-                # Bot matches the player's bet
-                bot_call_amount = game['current_bet'] - game['bets']['bot']
-                if bot_call_amount > game['chips']['bot']:
-                    bot_call_amount = game['chips']['bot']  # Bot all-in
-                    
-                game['chips']['bot'] -= bot_call_amount
-                game['bets']['bot'] += bot_call_amount
-                game['pot'] += bot_call_amount
-                
-                response_data = {
-                    'message': f'You called ${call_amount}. Bot called.',
-                    'player_chips': game['chips'][username],
-                    'bot_chips': game['chips']['bot'],
-                    'pot': game['pot']
-                }
-            
-        elif action == 'raise':
-            # Player raises
-            raise_amount = bet_amount
-            if raise_amount <= 0:
-                raise_amount = 10  # Default raise amount
-                
-            total_bet = game['current_bet'] + raise_amount
-            
-            # Check if player has enough chips
-            if total_bet - game['bets'][username] > game['chips'][username]:
-                total_bet = game['bets'][username] + game['chips'][username]  # All-in
-                
-            player_additional = total_bet - game['bets'][username]
-            game['chips'][username] -= player_additional
-            game['pot'] += player_additional
-            game['bets'][username] = total_bet
-            game['current_bet'] = total_bet
-            
-            # Bot's action
-            if bot_action == 'fold':
-                # Player wins the pot
-                game['chips'][username] += game['pot']
-                game['pot'] = 0
-                response_data = {
-                    'message': f'You raised to ${total_bet}. Bot folded. You win the pot!',
-                    'player_chips': game['chips'][username],
-                    'bot_chips': game['chips']['bot'],
-                    'pot': game['pot']
-                }
-                game['bets'][username] = 0
-                game['bets']['bot'] = 0
-                game['current_bet'] = 0
-                
-            elif bot_action == 'call':
-                # Bot calls the player's raise
-                bot_call_amount = total_bet - game['bets']['bot']
-                if bot_call_amount > game['chips']['bot']:
-                    bot_call_amount = game['chips']['bot']  # Bot all-in
-                    
-                game['chips']['bot'] -= bot_call_amount
-                game['bets']['bot'] += bot_call_amount
-                game['pot'] += bot_call_amount
-                
-                response_data = {
-                    'message': f'You raised to ${total_bet}. Bot called.',
-                    'player_chips': game['chips'][username],
-                    'bot_chips': game['chips']['bot'],
-                    'pot': game['pot']
-                }
+        return json_response(run_game_command(game_id, username, {'type': 'action', 'action': action, 'bet_amount': bet_amount, **response_options()}))
+    
+    @staticmethod
+    def play(game_id):
+        """
+        Apply a player action, the bot's response and, once the betting round
+        is closed, the advance to the next round, in one request. Automated
+        clients can send a 'script' of steps instead of a single action.
+        """
+        if "username" not in session:
+            return json_response(NOT_LOGGED_IN), 401
             
-            else:  # Bot raises
-                # Bot re-raises
-                bot_total_bet = total_bet + bot_raise
-                bot_additional = bot_total_bet - game['bets']['bot']
-                
-                if bot_additional > game['chips']['bot']:
-                    bot_additional = game['chips']['bot']  # Bot all-in
-                    bot_total_bet = game['bets']['bot'] + bot_additional
-                    
-                game['chips']['bot'] -= bot_additional
-                game['bets']['bot'] = bot_total_bet
-                game['pot'] += bot_additional
-                game['current_bet'] = bot_total_bet
-                
-                response_data = {
-                    'message': f'You raised to ${total_bet}. Bot re-raised to ${bot_total_bet}!',
-                    'player_chips': game['chips'][username],
-                    'bot_chips': game['chips']['bot'],
-                    'pot': game['pot'],
-                    'current_bet': game['current_bet']
-                }
+        game_id = int(game_id)
+        if game_id not in games:
+            return json_response(GAME_NOT_FOUND), 404
+        
+        username = session["username"]
+        script = request.form.get('script')
+        if script is None and request.is_json:
+            script = (request.get_json(silent=True) or {}).get('script')
+        
+        if script is not None:
+            command = {'type': 'script', 'script': script}
         else:
-            response_data = {'message': 'Invalid action'}
+            command = {'type': 'play', 'action': request.form['action'], 'bet_amount': int(request.form.get('bet_amount', 0))}
+        
+        response = run_game_command(game_id, username, {**command, **response_options()})
+        if 'error' in response:
+            return json_response(response), 400
+        return json_response(response)
+    
+    @staticmethod
+    def odds(game_id):
+        """
+        The player's current equity and outs
+        """
+        if "username" not in session:
+            return json_response(NOT_LOGGED_IN), 401
+            
+        game_id = int(game_id)
+        if game_id not in games:
+            return json_response(GAME_NOT_FOUND), 404
         
-        return jsonify(response_data)
+        try:
+            return json_response(hand_odds(game_id, session["username"]))
+        except ValueError as e:
+            return json_response({'error': str(e)}), 409
     
     @staticmethod
     def deal_cards(game_id):
@@ -515,67 +1312,11 @@ class GameController:
         """
         game_id = int(game_id)
         if game_id not in games:
-            return jsonify({'error': 'Game not found'}), 404
+            return json_response(GAME_NOT_FOUND), 404
             
         username = session["username"]
-        game = games[game_id]
         
-        # Reset bets and add blinds
-        small_blind = 5
-        big_blind = 10
-        
-        # Reset the pot and bets
-        game['pot'] = 0
-        game['bets'] = {
-            username: 0,
-            "bot": 0
-        }
-        
-        # Add small blind (player) and big blind (bot)
-        player_blind = min(small_blind, game['chips'][username])
-        bot_blind = min(big_blind, game['chips']['bot'])
-        
-        game['chips'][username] -= player_blind
-        game['chips']['bot'] -= bot_blind
-        game['pot'] = player_blind + bot_blind
-        game['bets'][username] = player_blind
-        game['bets']['bot'] = bot_blind
-        game['current_bet'] = big_blind
-        
-        # Define a deck of cards
-        suits = ['hearts', 'diamonds', 'clubs', 'spades']
-        values = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'jack', 'queen', 'king', 'ace']
-        
-        deck = [f"{value}_of_{suit}" for suit in suits for value in values]
-        random.shuffle(deck)
-        
-        # Deal player cards
-        game['player_hands'] = {}
-        
-        # Deal player cards
-        player_cards = [deck.pop(), deck.pop()]
-        game['player_hands'][username] = player_cards
-        
-        # Deal bot cards
-        bot_cards = [deck.pop(), deck.pop()]
-        game['player_hands']["bot"] = bot_cards
-        
-        # Deal community cards (face down initially)
-        game['community_cards'] = [deck.pop() for _ in range(5)]
-        game['visible_cards'] = 0  # No community cards visible initially
-        game['round'] = 'pre-flop'
-        
-        # Return the player's cards to the frontend
-        return jsonify({
-            'status': 'success', 
-            'message': f'Cards dealt. You posted small blind (${player_blind}), Bot posted big blind (${bot_blind})',
-            'player_cards': player_cards,
-            'community_cards': game['community_cards'],
-            'player_chips': game['chips'][username],
-            'bot_chips': game['chips']['bot'],
-            'pot': game['pot'],
-            'current_bet': game['current_bet']
-        })
+        return json_response(run_game_command(game_id, username, {'type': 'deal', **response_options()}))
     
     @staticmethod
     def advance_round(game_id):
@@ -584,94 +1325,102 @@ class GameController:
         """
         game_id = int(game_id)
         if game_id not in games:
-            return jsonify({'error': 'Game not found'}), 404
+            return json_response(GAME_NOT_FOUND), 404
             
-        game = games[game_id]
         username = session["username"]
-        bot_name = "bot"
         
-        # Reset bets for the new round but keep the pot
-        game['bets'][username] = 0
-        game['bets'][bot_name] = 0
-        game['current_bet'] = 0
+        return json_response(run_game_command(game_id, username, {'type': 'advance', **response_options()}))
+    
+    @staticmethod
+    def bot_tables():
+        """
+        List the bot-only showcase tables for the lobby, with how many people
+        watch each one (a table plays while it has watchers)
+        """
+        if "username" not in session:
+            return json_response(NOT_LOGGED_IN), 401
         
-        visible_community_cards = []
-        bot_cards = None
-        winner = None
-        player_hand_description = None
-        bot_hand_description = None
-        
-        if game['round'] == 'pre-flop':
-            game['round'] = 'flop'
-            game['visible_cards'] = 3
-            visible_community_cards = game['community_cards'][:3]
-        elif game['round'] == 'flop':
-            game['round'] = 'turn'
-            game['visible_cards'] = 4
-            visible_community_cards = game['community_cards'][:4]
-        elif game['round'] == 'turn':
-            game['round'] = 'river'
-            game['visible_cards'] = 5
-            visible_community_cards = game['community_cards'][:5]
-        elif game['round'] == 'river':
-            game['round'] = 'showdown'
-            visible_community_cards = game['community_cards']
-            # In showdown, we also reveal the bot's cards
-            bot_cards = game['player_hands'].get(bot_name, [])
-            player_cards = game['player_hands'].get(username, [])
-            
-            # Evaluate hands and determine winner using poker rules
-            player_hand = evaluate_hand(player_cards, game['community_cards'])
-            bot_hand = evaluate_hand(bot_cards, game['community_cards'])
-            player_hand_description = get_hand_description(player_hand)
-            bot_hand_description = get_hand_description(bot_hand)
-            
-            winner_result = determine_winner(player_cards, bot_cards, game['community_cards'])
-            
-            if winner_result == 'player':
-                winner = username
-            elif winner_result == 'bot':
-                winner = bot_name
-            else:
-                # In case of a tie, split the pot
-                game['chips'][username] += game['pot'] // 2
-                game['chips'][bot_name] += game['pot'] // 2
-                game['pot'] = 0
-                winner = "tie"
+        tables = [{
+            'id': game_id,
+            'name': game['name'],
+            'bot_difficulty': game['bot_difficulty'],
+            'challenger_difficulty': game['challenger_difficulty'],
+            'round': game['round'],
+            'pot': game['pot'],
+            'chips': game['chips'],
+            'watchers': Game_Events.watcher_count(game_id),
+            'events_url': url_for('game_events', game_id=game_id)
+        } for game_id, game in list(games.items()) if game.get('showcase')]
+        return json_response({'tables': tables, 'scheduler': SCHEDULER.stats()})
+    
+    @staticmethod
+    def leaderboard():
+        """
+        The players ranked by bankroll, a page at a time (?limit=10&offset=0),
+        with the logged-in player's own rank
+        """
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        response = {'leaders': LEADERBOARD.top(limit, offset), 'players': len(LEADERBOARD)}
+        if "username" in session:
+            response['rank'] = LEADERBOARD.rank(session["username"])
+        return json_response(response)
+    
+    @staticmethod
+    def game_events(game_id):
+        """
+        Stream a game's events to the browser (Server-Sent Events)
+        """
+        if "username" not in session:
+            return json_response(NOT_LOGGED_IN), 401
             
-            # Award pot to winner if not a tie
-            if winner and winner != "tie":
-                game['chips'][winner] += game['pot']
-                game['pot'] = 0
-        
-        response = {
-            'status': 'success', 
-            'round': game['round'], 
-            'visible_cards': game['visible_cards'],
-            'community_cards': visible_community_cards,
-            'player_chips': game['chips'][username],
-            'bot_chips': game['chips'][bot_name],
-            'pot': game['pot']
-        }
+        game_id = int(game_id)
+        if game_id not in games:
+            return json_response(GAME_NOT_FOUND), 404
         
-        if bot_cards:
-            response['bot_cards'] = bot_cards
+        subscription = Game_Events.subscribe(game_id, session["username"])
         
-        if winner:
-            response['winner'] = winner
+        def stream():
+            try:
+                yield "retry: 3000\n\n"
+                while not subscription.closed:
+                    encoded = subscription.get(timeout=EVENT_KEEPALIVE)
+                    if encoded is None:
+                        yield ": keep-alive\n\n"
+                    else:
+                        yield f"data: {encoded}\n\n"
+            finally:
+                Game_Events.unsubscribe(subscription)
+        
+        return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    
+    @staticmethod
+    def game_socket(ws, game_id):
+        """
+        Two-way game channel: accepts deal/action/advance/play/script commands as
+        JSON messages, replies with the response and pushes other players' events
+        """
+        if "username" not in session:
+            ws.send(dumps_text(NOT_LOGGED_IN))
+            return
             
-            if winner == "tie":
-                response['message'] = f"It's a tie! The pot is split."
-                response['player_hand'] = player_hand_description
-                response['bot_hand'] = bot_hand_description
-            else:
-                winner_name = 'You' if winner == username else 'Bot'
-                if winner == username:
-                    response['message'] = f"You win with {player_hand_description}! Bot had {bot_hand_description}."
-                else:
-                    response['message'] = f"Bot wins with {bot_hand_description}! You had {player_hand_description}."
-                
-                response['player_hand'] = player_hand_description
-                response['bot_hand'] = bot_hand_description
+        game_id = int(game_id)
+        if game_id not in games:
+            ws.send(dumps_text(GAME_NOT_FOUND))
+            return
         
-        return jsonify(response) 
\ No newline at end of file
+        username = session["username"]
+        subscription = Game_Events.subscribe(game_id, username)
+        try:
+            while not subscription.closed:
+                encoded = subscription.get(timeout=0)
+                while encoded is not None:
+                    ws.send(encoded)
+                    encoded = subscription.get(timeout=0)
+                
+                message = ws.receive(timeout=SOCKET_POLL_INTERVAL)
+                if message is not None:
+                    ws.send(handle_socket_message(game_id, username, message, subscription))
+        finally:
+            Game_Events.unsubscribe(subscription)
@@ -0,0 +1,14 @@
+from flask import Response
+
+from models import metrics
+
+# Content type of the Prometheus text exposition format
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class MetricsController:
+    @staticmethod
+    def metrics():
+        """
+        Serve the process's metrics in the Prometheus text format
+        """
+        return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
@@ -1,12 +1,18 @@
 from flask import request, render_template, redirect, url_for, session
-import os
-import sys
-
-# Add models directory to path
-fpath = os.path.join(os.path.dirname(__file__), '../models')
-sys.path.append(fpath)
 
+from controllers.GameController import settle_open_hands
 from models.user_model import User_Model, User
+from models.passwords import HasherBusyError
+
+# Seconds a client is asked to wait when the password hashing queue is full
+BUSY_RETRY_AFTER = 1
+
+def busy_response(user):
+    """
+    The page shown when the password hashing queue is full
+    """
+    page = render_template("login.html", error="The server is busy, please try again.", user=user)
+    return page, 503, {"Retry-After": str(BUSY_RETRY_AFTER)}
 
 class UserController:
     @staticmethod
@@ -25,9 +31,12 @@ class UserController:
         """
         username = request.form["username"]
         password = request.form["password"]
-        user = User_Model.get(username=username)
+        try:
+            user = User_Model.authenticate(username, password)
+        except HasherBusyError:
+            return busy_response(User(id=0, username=username, email="", password=""))
         
-        if user and user.password == password:
+        if user:
             session["username"] = username
             return redirect(url_for("user_details"))
         else:
@@ -43,14 +52,18 @@ class UserController:
         email = request.form["email"]
         password = request.form["password"]
         
-        if User_Model.exists(username=username):
-            default_user = User(id=0, username=username, email=email, password="")
-            return render_template("login.html", error="Username already exists", user=default_user)
-        
         try:
-            new_user = User_Model.create({"username": username, "email": email, "password": password})
+            # Hash before the transaction so the store isn't locked while the KDF runs.
+            password_hash = User_Model.hash_password(password)
+            with User_Model.transaction():
+                if User_Model.exists(username=username):
+                    default_user = User(id=0, username=username, email=email, password="")
+                    return render_template("login.html", error="Username already exists", user=default_user)
+                new_user = User_Model.create({"username": username, "email": email, "password_hash": password_hash})
             session["username"] = username
             return redirect(url_for("user_details"))
+        except HasherBusyError:
+            return busy_response(User(id=0, username=username, email=email, password=""))
         except ValueError as e:
             default_user = User(id=0, username=username, email=email, password="")
             return render_template("login.html", error=str(e), user=default_user)
@@ -81,14 +94,21 @@ class UserController:
             return redirect(url_for("login"))
             
         username = session["username"]
-        user = User_Model.get(username=username)
+        user_info = {"username": username, "email": request.form["email"]}
+        # Passwords are only stored as hashes, so the form leaves the field blank to keep the current one.
+        if request.form.get("password"):
+            try:
+                user_info["password_hash"] = User_Model.hash_password(request.form["password"])
+            except HasherBusyError:
+                return "The server is busy, please try again.", 503, {"Retry-After": str(BUSY_RETRY_AFTER)}
         
-        if not user:
-            return redirect(url_for("login"))
-        
-        email = request.form["email"]
-        password = request.form["password"]
-        updated_user = User_Model.update({"id": user.id, "username": username, "email": email, "password": password})
+        with User_Model.transaction():
+            user = User_Model.get(username=username)
+            
+            if not user:
+                return redirect(url_for("login"))
+            
+            updated_user = User_Model.update({"id": user.id, **user_info})
         
         return redirect(url_for("user_details"))
     
@@ -97,5 +117,7 @@ class UserController:
         """
         Handles user logout
         """
+        if "username" in session:
+            settle_open_hands(session["username"])
         session.pop("username", None)
         return redirect(url_for("login")) 
\ No newline at end of file
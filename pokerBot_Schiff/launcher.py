@@ -0,0 +1,131 @@
+"""
+Production launcher: pre-forks worker processes that serve the app.
+
+The master imports the app and builds every registered read-only table
+(models/tables.py) once, then forks the workers. The workers inherit those
+pages and share them copy-on-write, so adding a worker costs neither the
+startup time nor the resident memory of another copy of the tables. The
+master restarts workers that die and stops them all on SIGTERM or Ctrl+C.
+
+Games are kept in each worker's memory. The workers either share one
+listening socket (the default, for a single worker or a stateless setup) or,
+with --worker-ports, listen on consecutive ports so a proxy with session
+affinity can keep each player on the same worker.
+
+Usage (POSIX only):
+    python launcher.py --workers 4 --port 8080
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+from werkzeug.serving import make_server
+
+# A worker that dies sooner than this after starting is restarted after a pause
+MIN_WORKER_LIFETIME = 1.0
+
+def load_app():
+    """Import the app and build the shared tables (runs in the master, before forking)"""
+    from server import app
+    from models import buckets, flops, hand_ranks, tables  # noqa: F401 (importing a table module registers its tables)
+
+    for name, seconds in tables.build_all().items():
+        print(f"Built table {name} in {seconds * 1000:.0f} ms")
+    return app
+
+def listen(host, port, backlog=1024):
+    sock = socket.create_server((host, port), backlog=backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def serve(app, sock):
+    """Worker main loop: serve requests on the inherited socket with a thread per request"""
+    from server import start_background_work
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+    start_background_work()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C reaches the master, which stops the workers
+    print(f"Worker {os.getpid()} serving on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+def spawn(app, sock):
+    pid = os.fork()
+    if pid == 0:
+        # The master froze the shared objects; collecting the worker's own garbage doesn't touch them
+        gc.enable()
+        status = 0
+        try:
+            serve(app, sock)
+        except SystemExit:
+            pass
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            status = 1
+        finally:
+            os._exit(status)
+    return pid
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the app on pre-forked worker processes.")
+    parser.add_argument("--host", default=os.environ.get("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8080)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--worker-ports", action="store_true",
+                        help="give each worker its own port (port, port + 1, ...) instead of sharing one")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("The pre-fork launcher needs os.fork; run server.py or asgi.py instead.")
+
+    # Keep the collector from touching (and so copying) the pages of objects built before the fork
+    gc.disable()
+    app = load_app()
+    if args.worker_ports:
+        sockets = [listen(args.host, args.port + index) for index in range(args.workers)]
+    else:
+        sockets = [listen(args.host, args.port)] * args.workers
+    gc.collect()
+    gc.freeze()
+
+    workers = {}  # pid -> (index, start time)
+    for index in range(args.workers):
+        workers[spawn(app, sockets[index])] = (index, time.monotonic())
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index, started = workers.pop(pid, (None, None))
+        if stopping or index is None:
+            continue
+        print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; restarting it")
+        if time.monotonic() - started < MIN_WORKER_LIFETIME:
+            time.sleep(MIN_WORKER_LIFETIME)
+        workers[spawn(app, sockets[index])] = (index, time.monotonic())
+
+if __name__ == "__main__":
+    main()
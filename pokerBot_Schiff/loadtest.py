@@ -0,0 +1,325 @@
+"""
+Load test: virtual users register, create games and play hands through the
+deal, action and advance endpoints, pausing between requests like people do.
+
+Each virtual user runs on its own thread with its own session, acting on
+what the server answers (acting again after a bot re-raise, advancing once
+a betting round closes, starting a new game when a stack runs low). Think
+times follow a log-normal distribution around --think seconds; use
+--think 0 to find the maximum throughput. The report gives throughput,
+p50/p95/p99 latency and the error rate per endpoint.
+
+Without --url, the app runs in this process through the Flask test client,
+with a throwaway user store: that measures the application code alone.
+With --url, requests go over HTTP to a running server (server.py, asgi.py
+or launcher.py), which includes the server and network stack; start it with
+RATE_LIMITS=0, since every virtual user comes from the same address.
+
+Usage:
+    python loadtest.py --users 50 --hands 20
+    python loadtest.py --users 200 --duration 60 --url http://127.0.0.1:8080
+    python loadtest.py --users 50 --think 0 --seed 1 --json
+"""
+import argparse
+import contextlib
+import http.client
+import http.cookies
+import json
+import math
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+# Spread of the log-normal think time around its median
+THINK_SIGMA = 0.6
+
+# How the virtual users play: action weights, and how often they re-raise before just calling
+ACTION_WEIGHTS = {'call': 70, 'raise': 22, 'fold': 8}
+RAISE_RANGE = (10, 50)
+MAX_ACTIONS_PER_STREET = 3
+
+# A game is replaced once either stack can't cover the blinds
+MIN_STACK = 10
+
+DIFFICULTIES = ['easy', 'medium', 'hard']
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list (0 for an empty one)"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+class Load_Stats:
+    """Latencies and errors per endpoint, shared by the virtual users"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.hands = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def hand_played(self):
+        with self._lock:
+            self.hands += 1
+
+    def report(self):
+        """Throughput, latency percentiles (ms) and error rates per endpoint, plus totals"""
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        endpoints = {}
+        all_latencies = []
+        with self._lock:
+            for endpoint, values in sorted(self.latencies.items()):
+                values = sorted(values)
+                all_latencies.extend(values)
+                errors = self.errors.get(endpoint, 0)
+                endpoints[endpoint] = {
+                    'requests': len(values),
+                    'errors': errors,
+                    'error_rate': errors / len(values),
+                    'throughput': len(values) / elapsed,
+                    'p50_ms': percentile(values, 0.50) * 1000,
+                    'p95_ms': percentile(values, 0.95) * 1000,
+                    'p99_ms': percentile(values, 0.99) * 1000,
+                }
+            total_errors = sum(self.errors.values())
+            hands = self.hands
+        all_latencies.sort()
+        return {
+            'seconds': elapsed,
+            'hands': hands,
+            'hands_per_second': hands / elapsed,
+            'requests': len(all_latencies),
+            'throughput': len(all_latencies) / elapsed,
+            'error_rate': total_errors / len(all_latencies) if all_latencies else 0.0,
+            'p50_ms': percentile(all_latencies, 0.50) * 1000,
+            'p95_ms': percentile(all_latencies, 0.95) * 1000,
+            'p99_ms': percentile(all_latencies, 0.99) * 1000,
+            'endpoints': endpoints,
+        }
+
+def format_report(report):
+    lines = [f"{'endpoint':<32} {'requests':>8} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+    rows = list(report['endpoints'].items()) + [('total', report)]
+    for endpoint, row in rows:
+        lines.append(f"{endpoint:<32} {row['requests']:>8} {row['error_rate']:>7.2%} {row['throughput']:>8.1f} "
+                     f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}")
+    lines.append(f"{report['hands']} hands in {report['seconds']:.1f} s ({report['hands_per_second']:.1f} hands/s)")
+    return "\n".join(lines)
+
+class Flask_Transport:
+    """Requests through the Flask test client, one client (and cookie jar) per virtual user"""
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, form=None):
+        """Returns (status, Location header, JSON body or None)"""
+        response = self.client.open(path, method=method, data=form)
+        return response.status_code, response.headers.get('Location'), response.get_json(silent=True)
+
+class HTTP_Transport:
+    """Requests over a keep-alive HTTP connection, one per virtual user"""
+    def __init__(self, base_url, timeout=30):
+        url = urllib.parse.urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(url.hostname, url.port, timeout=timeout)
+        self.cookies = http.cookies.SimpleCookie()
+
+    def request(self, method, path, form=None):
+        """Returns (status, Location header, JSON body or None)"""
+        headers = {}
+        body = None
+        if form is not None:
+            body = urllib.parse.urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{name}={morsel.value}" for name, morsel in self.cookies.items())
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()  # Reconnect on the next request
+            raise
+        for header in response.headers.get_all('Set-Cookie') or []:
+            self.cookies.load(header)
+        body_json = None
+        if response.headers.get('Content-Type', '').startswith('application/json'):
+            body_json = json.loads(data)
+        return response.status, response.headers.get('Location'), body_json
+
+class Virtual_User:
+    """One simulated player: registers, creates a game and plays hands"""
+    def __init__(self, name, transport, stats, rng, think):
+        self.name = name
+        self.transport = transport
+        self.stats = stats
+        self.rng = rng
+        self.think = think
+        self.game_id = None
+
+    def call(self, method, path, endpoint, form=None, expect=200):
+        """Send a request and record it; returns (status, location, body), with body None on failure"""
+        start = time.perf_counter()
+        try:
+            status, location, body = self.transport.request(method, path, form)
+        except Exception:
+            self.stats.record(endpoint, time.perf_counter() - start, False)
+            return None, None, None
+        ok = status == expect and not (isinstance(body, dict) and 'error' in body)
+        self.stats.record(endpoint, time.perf_counter() - start, ok)
+        return status, location, body if ok else None
+
+    def pause(self):
+        if self.think > 0:
+            time.sleep(self.rng.lognormvariate(math.log(self.think), THINK_SIGMA))
+
+    def register(self):
+        status, location, _ = self.call('POST', '/register', 'POST /register', {
+            'username': self.name, 'email': f'{self.name}@example.com', 'password': f'pw-{self.name}'
+        }, expect=302)
+        return status == 302 and location is not None and 'user_details' in location
+
+    def start_game(self):
+        status, location, _ = self.call('POST', '/start_game', 'POST /start_game', {
+            'game_name': f'{self.name} table', 'bot_difficulty': self.rng.choice(DIFFICULTIES)
+        }, expect=302)
+        if status != 302 or not location:
+            return False
+        self.game_id = int(location.rstrip('/').rsplit('/', 1)[1])
+        return True
+
+    def choose_action(self, actions_this_street):
+        if actions_this_street >= MAX_ACTIONS_PER_STREET:
+            return 'call', 0
+        action = self.rng.choices(list(ACTION_WEIGHTS), weights=list(ACTION_WEIGHTS.values()))[0]
+        return action, self.rng.randint(*RAISE_RANGE) if action == 'raise' else 0
+
+    def play_hand(self):
+        """Deal and play one hand to its end; returns False if the game needs replacing"""
+        base = f'/api/game/{self.game_id}'
+        self.pause()
+        _, _, dealt = self.call('POST', f'{base}/deal', 'POST /api/game/<id>/deal')
+        if dealt is None:
+            return False
+        if min(dealt['player_chips'], dealt['bot_chips']) < MIN_STACK:
+            return False
+
+        actions_this_street = 0
+        for _ in range(4 * (MAX_ACTIONS_PER_STREET + 2)):  # A hand has at most 4 streets
+            self.pause()
+            action, bet_amount = self.choose_action(actions_this_street)
+            _, _, acted = self.call('POST', f'{base}/action', 'POST /api/game/<id>/action',
+                                    {'action': action, 'bet_amount': bet_amount})
+            if acted is None:
+                return False
+            if acted.get('hand_over'):
+                break
+            if not acted.get('street_complete'):
+                actions_this_street += 1  # The bot re-raised
+                continue
+            self.pause()
+            _, _, advanced = self.call('POST', f'{base}/advance', 'POST /api/game/<id>/advance')
+            if advanced is None:
+                return False
+            if advanced['round'] == 'showdown':
+                break
+            actions_this_street = 0
+        self.stats.hand_played()
+        return True
+
+    def run(self, hands, deadline):
+        if not self.register():
+            return
+        played = 0
+        while played < hands and time.perf_counter() < deadline:
+            if self.game_id is None:
+                self.pause()
+                if not self.start_game():
+                    return
+            if self.play_hand():
+                played += 1
+            else:
+                self.game_id = None
+
+def run_load(transport_factory, users=10, hands=10, duration=None, think=1.0, ramp=0.0, seed=None, prefix=None):
+    """
+    Run virtual users until each has played its hands (or the duration runs out)
+    Returns: the Load_Stats of the run
+    """
+    master = random.Random(seed)
+    prefix = prefix or f"load{master.getrandbits(24):06x}"
+    deadline = time.perf_counter() + duration if duration else math.inf
+    stats = Load_Stats()
+    threads = []
+    for index in range(users):
+        user = Virtual_User(f"{prefix}_{index}", transport_factory(), stats, random.Random(master.getrandbits(64)), think)
+        thread = threading.Thread(target=user.run, args=(hands, deadline), name=user.name, daemon=True)
+        threads.append(thread)
+    for index, thread in enumerate(threads):
+        if ramp and users > 1:
+            time.sleep(ramp / (users - 1) if index else 0)
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.finished = time.perf_counter()
+    return stats
+
+@contextlib.contextmanager
+def in_process_app():
+    """The app, with a throwaway user store for the length of the block"""
+    from server import app
+    from models import admission
+    from models.user_model import User_Model
+
+    data_dir, db_name = User_Model._DATA_DIR, User_Model._DB_NAME
+    backend, storage = User_Model._BACKEND, User_Model._storage
+    User_Model._DATA_DIR = tempfile.mkdtemp(prefix='loadtest')
+    limited = admission._enabled
+    admission.configure(enabled=False)  # Every virtual user comes from the same address
+    try:
+        User_Model.initialize_DB('users.json', backend='json')
+        yield app
+    finally:
+        admission.configure(enabled=limited)
+        shutil.rmtree(User_Model._DATA_DIR, ignore_errors=True)
+        User_Model._DATA_DIR, User_Model._DB_NAME = data_dir, db_name
+        User_Model._BACKEND, User_Model._storage = backend, storage
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the full game flow with virtual users and report latencies.")
+    parser.add_argument('--users', type=int, default=10, help='virtual users (default 10)')
+    parser.add_argument('--hands', type=int, default=20, help='hands per user (default 20)')
+    parser.add_argument('--duration', type=float, help='stop after this many seconds')
+    parser.add_argument('--think', type=float, default=1.0, help='median think time in seconds (default 1, 0 for none)')
+    parser.add_argument('--ramp', type=float, default=0.0, help='seconds over which to start the users')
+    parser.add_argument('--seed', type=int, help='seed for reproducible user behaviour')
+    parser.add_argument('--prefix', help='username prefix (default: random, so runs against one server don\'t collide)')
+    parser.add_argument('--url', help='base URL of a running server (default: run the app in this process)')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    options = dict(users=args.users, hands=args.hands, duration=args.duration, think=args.think,
+                   ramp=args.ramp, seed=args.seed, prefix=args.prefix)
+    if args.url:
+        stats = run_load(lambda: HTTP_Transport(args.url), **options)
+    else:
+        with in_process_app() as app:
+            stats = run_load(lambda: Flask_Transport(app), **options)
+
+    report = stats.report()
+    print(json.dumps(report, indent=4) if args.json else format_report(report))
+    sys.exit(1 if report['error_rate'] else 0)
+
+if __name__ == "__main__":
+    main()
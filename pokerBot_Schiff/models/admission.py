@@ -0,0 +1,247 @@
+# /models/admission.py
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from models.metrics import Counter, Gauge
+
+# Admission control. Two layers keep one abusive or buggy client from pushing
+# everyone else's latency up:
+#
+#   - Token buckets, per user and per IP address, for each group of endpoints
+#     (game commands, logins). A client may burst up to the bucket size, then
+#     gets as many requests as the bucket refills.
+#   - One bounded queue for the expensive work (bot decisions, equity), shared
+#     by every client: a few jobs run at once, a few more may wait briefly for
+#     a slot, and beyond that requests are turned away instead of piling up.
+#
+# Either way the request is refused with TooManyRequestsError, which carries
+# how many seconds the client should wait before trying again (the server
+# answers 429 with a Retry-After header).
+
+# Limit name -> (requests per second, burst)
+DEFAULT_LIMITS = {
+    "game_user": (10.0, 30),
+    "game_ip": (50.0, 150),  # Several players can share an address
+    "auth_user": (0.2, 5),   # Slows password guessing against one account from one address
+    "auth_ip": (1.0, 20),
+}
+MAX_KEYS = 10000
+
+LIMITED_REQUESTS = Counter("poker_requests_limited_total", "Requests refused by admission control, by limit.", ["limit"])
+
+
+class TooManyRequestsError(RuntimeError):
+    """
+    Raised when a client is over its rate limit or the work queue is full.
+
+    Attributes:
+        retry_after (int): Seconds until the request is likely to be accepted.
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Rate_Limiter:
+    """
+    Token buckets for one limit, one bucket per key (a username or an IP
+    address). Only the most recently seen keys are kept; a forgotten key
+    starts again with a full bucket, which is what it would have refilled to.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, max_keys: int = MAX_KEYS,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initializes the limiter.
+
+        Args:
+            name (str): The limit's label in the metrics.
+            rate (float): Requests per second each key gets back.
+            burst (int): The most requests a key can make at once.
+            max_keys (int, optional): How many keys to track. Defaults to MAX_KEYS.
+            clock (Callable[[], float], optional): The time source, in seconds.
+                Defaults to time.monotonic.
+
+        Raises:
+            ValueError: If the rate or burst isn't positive.
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("A rate limit needs a positive rate and burst.")
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, key: str) -> None:
+        """
+        Takes a token from a key's bucket.
+
+        Args:
+            key (str): The username or address making the request.
+
+        Raises:
+            TooManyRequestsError: If the bucket is empty.
+        """
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        if not allowed:
+            LIMITED_REQUESTS.inc(self.name)
+            raise TooManyRequestsError("Too many requests, please slow down.",
+                                       math.ceil((1 - tokens) / self.rate))
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class Work_Queue:
+    """
+    Bounds how much expensive work runs at once across all requests.
+    """
+
+    def __init__(self, slots: int = None, max_waiting: int = 16, max_wait: float = 1.0):
+        """
+        Initializes the queue.
+
+        Args:
+            slots (int, optional): Jobs that may run at once. Defaults to the CPU count.
+            max_waiting (int, optional): Jobs that may wait for a slot before new
+                ones are turned away. Defaults to 16.
+            max_wait (float, optional): The longest a job waits for a slot, in
+                seconds. Defaults to 1.
+        """
+        self.slots = slots or os.cpu_count() or 1
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._average = 0.01  # Seconds per job, a moving average
+        self._condition = threading.Condition()
+
+    def retry_after(self) -> int:
+        """
+        Estimates how long until a new job would get a slot: the jobs ahead
+        of it, shared between the slots, at the average job time.
+
+        Returns:
+            int: Seconds, at least 1.
+        """
+        return max(1, math.ceil(self._average * (self.running + self.waiting + 1) / self.slots))
+
+    @contextmanager
+    def admit(self, wait: bool = True) -> Iterator[None]:
+        """
+        Runs the block in a slot, waiting up to max_wait for one.
+
+        Args:
+            wait (bool, optional): Whether to wait for a slot; without waiting a
+                job is turned away at once when every slot is taken (for
+                background work that would rather come back later). Defaults to True.
+
+        Raises:
+            TooManyRequestsError: If the queue is full or no slot came free in time.
+        """
+        with self._condition:
+            if self.running >= self.slots:
+                if not wait or self.waiting >= self.max_waiting:
+                    self._reject()
+                self.waiting += 1
+                try:
+                    free = self._condition.wait_for(lambda: self.running < self.slots, self.max_wait)
+                finally:
+                    self.waiting -= 1
+                if not free:
+                    self._reject()
+            self.running += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._condition:
+                self.running -= 1
+                self._average += (elapsed - self._average) * 0.1
+                self._condition.notify()
+
+    def _reject(self) -> None:
+        self.rejected += 1
+        LIMITED_REQUESTS.inc("work_queue")
+        raise TooManyRequestsError("The server is busy, please try again.", self.retry_after())
+
+    def resize(self, slots: Optional[int] = None, max_waiting: Optional[int] = None) -> None:
+        """
+        Changes the number of slots or the queue length.
+
+        Args:
+            slots (int, optional): Jobs that may run at once.
+            max_waiting (int, optional): Jobs that may wait for a slot.
+        """
+        with self._condition:
+            if slots:
+                self.slots = slots
+            if max_waiting is not None:
+                self.max_waiting = max_waiting
+            self._condition.notify_all()
+
+
+LIMITERS: Dict[str, Rate_Limiter] = {name: Rate_Limiter(name, rate, burst) for name, (rate, burst) in DEFAULT_LIMITS.items()}
+BOT_WORK = Work_Queue()
+_enabled = True
+
+Gauge("poker_bot_work_running", "Bot and equity jobs running.", function=lambda: BOT_WORK.running)
+Gauge("poker_bot_work_waiting", "Bot and equity jobs waiting for a slot.", function=lambda: BOT_WORK.waiting)
+
+
+def configure(enabled: bool = None, limits: Dict[str, Tuple[float, int]] = None) -> None:
+    """
+    Turns the rate limits on or off, or changes them.
+
+    Args:
+        enabled (bool, optional): Whether requests are rate limited.
+        limits (Dict[str, Tuple[float, int]], optional): New (rate, burst) pairs
+            by limit name; the buckets of a changed limit start over.
+    """
+    global _enabled
+    if enabled is not None:
+        _enabled = enabled
+    for name, (rate, burst) in (limits or {}).items():
+        LIMITERS[name] = Rate_Limiter(name, rate, burst)
+
+
+def limit(group: str, user: Optional[str] = None, address: Optional[str] = None) -> None:
+    """
+    Counts a request against its group's per-user and per-address limits.
+    Logins count per account and address together: counted per account
+    alone, anyone could lock an account out by failing to log in as it.
+
+    Args:
+        group (str): "game" or "auth".
+        user (str, optional): The username, if known (for logins, the one in the form).
+        address (str, optional): The client's IP address, if known.
+
+    Raises:
+        TooManyRequestsError: If either limit is used up.
+    """
+    if not _enabled:
+        return
+    if address:
+        LIMITERS[f"{group}_ip"].check(address)
+    if user:
+        LIMITERS[f"{group}_user"].check(f"{user}@{address}" if group == "auth" else user)
@@ -0,0 +1,175 @@
+# /models/buckets.py
+import bisect
+import os
+from typing import Optional, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:  # Only the river, worked out at lookup time, needs it
+    numpy = None
+
+from models import flops, hand_ranks, tables
+from models.cards import combo_index
+from models.table_file import open_table_file
+
+# Card abstraction: every (hole cards, board) situation falls in one of a few
+# buckets of hands that play alike, numbered from weakest to strongest, each
+# with its mean expected hand strength (EHS: the share of opponent hands beaten
+# once the board is complete, ties counting half, averaged over the runouts).
+#
+# build_buckets.py computes the preflop, flop and turn buckets offline for
+# every canonical board and hole combination, and writes them to a table file.
+# A lookup renames the suits to the board's canonical form, then reads the
+# bucket at [board id, combination]. There are too many river boards to store,
+# and the river has no runouts left, so a river bucket is its hand strength,
+# worked out at lookup time in one NumPy pass over the opponent's hands.
+#
+# Cards are the integer codes of models/cards.py (suit * 13 + rank).
+TABLE_NAME = "buckets"
+TABLE_VERSION = 1
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "tables", "buckets.tbl")
+
+# Streets by the number of board cards
+STREETS = {0: "preflop", 3: "flop", 4: "turn", 5: "river"}
+TABLE_STREETS = ("preflop", "flop", "turn")
+
+
+def pack_board(key: Sequence[Tuple[int, int]]) -> int:
+    """
+    Packs a canonical board key into one integer: its card codes, in order,
+    as the digits of a base-52 number.
+
+    Args:
+        key (Sequence[Tuple[int, int]]): A key from flops.canonical_form.
+
+    Returns:
+        int: The packed board.
+    """
+    packed = 0
+    for rank, suit in key:
+        packed = packed * 52 + suit * 13 + rank
+    return packed
+
+
+def canonical_situation(hole: Sequence[int], board: Sequence[int]) -> Tuple[int, int]:
+    """
+    Renames the suits of a situation the way its board is canonicalized.
+
+    Args:
+        hole (Sequence[int]): The two hole cards.
+        board (Sequence[int]): The community cards (none preflop).
+
+    Returns:
+        Tuple[int, int]: The packed canonical board and the combination index
+            of the renamed hole cards.
+    """
+    if not board:
+        return 0, combo_index(*hole)
+    key, names = flops.canonical_form(board)
+    first, second = (names[card // 13] * 13 + card % 13 for card in hole)
+    return pack_board(key), combo_index(first, second)
+
+
+def canonical_streets(hole: Sequence[int], board: Sequence[int]) -> Tuple[int, Tuple[int, ...], int]:
+    """
+    Renames the suits of a situation the way its flop is canonicalized, keeping
+    the turn and river apart: boards that hold the same cards but dealt them on
+    different streets stay different situations.
+
+    Args:
+        hole (Sequence[int]): The two hole cards.
+        board (Sequence[int]): The community cards, in the order they were dealt (a flop, or more).
+
+    Returns:
+        Tuple[int, Tuple[int, ...], int]: The packed canonical flop, the renamed
+            turn and river cards, and the combination index of the renamed hole cards.
+    """
+    key, names = flops.canonical_form(board[:3])
+    first, second, *later = (names[card // 13] * 13 + card % 13 for card in (*hole, *board[3:]))
+    return pack_board(key), tuple(later), combo_index(first, second)
+
+
+class Hand_Buckets:
+    """
+    The bucket table, mapped from its table file. Without the file (it is
+    built offline), lookups find nothing and callers use their own measure.
+    """
+
+    def __init__(self, path: str = TABLE_PATH):
+        """
+        Opens the table file, if it has been built.
+
+        Args:
+            path (str, optional): The table file. Defaults to data/tables/buckets.tbl.
+
+        Raises:
+            TableFormatError: If the file is corrupt or out of date.
+        """
+        self.buckets = {}
+        self.assignments = {}
+        self.boards = {}
+        self.strengths = {}
+        try:
+            self.file = open_table_file(path, TABLE_NAME, TABLE_VERSION)
+        except FileNotFoundError:
+            self.file = None
+            return
+        self.buckets = self.file.metadata["buckets"]
+        for street in self.file.metadata["streets"]:
+            self.assignments[street] = self.file.view(street)
+            self.strengths[street] = self.file.view(f"{street}_strength").tolist()
+            if street != "preflop":
+                self.boards[street] = self.file.view(f"{street}_boards")
+
+    def lookup(self, hole: Sequence[int], board: Sequence[int]) -> Optional[Tuple[int, float]]:
+        """
+        Finds a situation's bucket.
+
+        Args:
+            hole (Sequence[int]): The two hole cards.
+            board (Sequence[int]): The revealed community cards (0, 3, 4 or 5).
+
+        Returns:
+            Optional[Tuple[int, float]]: The bucket and its mean EHS (0 to 1), or
+                None if the street's buckets aren't available.
+        """
+        street = STREETS[len(board)]
+        if street == "river":
+            return self._river(hole, board)
+        if street not in self.assignments:
+            return None
+        packed, combo = canonical_situation(hole, board)
+        board_id = bisect.bisect_left(self.boards[street], packed) if board else 0
+        bucket = self.assignments[street][board_id, combo]
+        return bucket, self.strengths[street][bucket]
+
+    def _river(self, hole: Sequence[int], board: Sequence[int]) -> Optional[Tuple[int, float]]:
+        if numpy is None or "river" not in self.buckets:
+            return None
+        from models import ranges  # Needs NumPy too
+        range_tables = tables.get_table(ranges.TABLE_NAME)
+        evaluator = tables.get_table(hand_ranks.TABLE_NAME)
+        live = ~range_tables.dead_mask(list(hole) + list(board))
+        hands = numpy.concatenate([range_tables.combos[live], numpy.tile(board, (int(live.sum()), 1))], axis=1)
+        theirs = evaluator.evaluate_many(hands)
+        mine = evaluator.evaluate(list(hole) + list(board))
+        strength = float(((theirs < mine).sum() + (theirs == mine).sum() / 2) / len(theirs))
+        return min(int(strength * self.buckets["river"]), self.buckets["river"] - 1), strength
+
+
+tables.register_table(TABLE_NAME, Hand_Buckets)
+
+
+def lookup(hole: Sequence[int], board: Sequence[int]) -> Optional[Tuple[int, float]]:
+    """
+    Finds a situation's bucket in the shared table.
+
+    Args:
+        hole (Sequence[int]): The two hole cards.
+        board (Sequence[int]): The revealed community cards (0, 3, 4 or 5).
+
+    Returns:
+        Optional[Tuple[int, float]]: The bucket and its mean EHS, or None if
+            the street's buckets aren't available.
+    """
+    return tables.get_table(TABLE_NAME).lookup(hole, board)
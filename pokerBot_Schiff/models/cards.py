@@ -0,0 +1,67 @@
+# /models/cards.py
+from typing import List
+
+SUITS = ['hearts', 'diamonds', 'clubs', 'spades']
+VALUES = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'jack', 'queen', 'king', 'ace']
+
+# Card names in code order: code = suit index * 13 + value index
+CARD_NAMES = [f"{value}_of_{suit}" for suit in SUITS for value in VALUES]
+CARD_CODES = {name: code for code, name in enumerate(CARD_NAMES)}
+
+
+def card_code(name: str) -> int:
+    """
+    Converts a card name to its integer code.
+
+    Args:
+        name (str): The card name, e.g. "queen_of_hearts".
+
+    Returns:
+        int: The card's code, from 0 (2 of hearts) to 51 (ace of spades).
+
+    Raises:
+        KeyError: If the name isn't a card.
+    """
+    return CARD_CODES[name]
+
+
+def card_name(code: int) -> str:
+    """
+    Converts an integer card code back to the card name.
+
+    Args:
+        code (int): The card's code.
+
+    Returns:
+        str: The card name.
+    """
+    return CARD_NAMES[code]
+
+
+def encode_cards(names: List[str]) -> List[int]:
+    """
+    Converts a list of card names to their codes.
+
+    Args:
+        names (List[str]): The card names.
+
+    Returns:
+        List[int]: The codes, in the same order.
+    """
+    return [CARD_CODES[name] for name in names]
+
+
+def combo_index(first: int, second: int) -> int:
+    """
+    Numbers a two-card combination in itertools.combinations(range(52), 2)
+    order, from 0 to 1325.
+
+    Args:
+        first (int): One card's code.
+        second (int): The other card's code.
+
+    Returns:
+        int: The combination's index.
+    """
+    low, high = min(first, second), max(first, second)
+    return low * (101 - low) // 2 + high - 1
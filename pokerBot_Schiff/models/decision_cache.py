@@ -0,0 +1,152 @@
+# /models/decision_cache.py
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from models.metrics import CACHE_LOOKUPS, Gauge
+
+# Bot decisions shared across tables. The bots at every table reach the same
+# situations (the same hole cards and board up to a renaming of the suits, on
+# the same street, at the same difficulty, after the same betting), and
+# working out what to do in one can mean an equity calculation. The cache
+# keeps the computed strategy (how likely each action is) for the most
+# recently used situations; each game still makes its own random draw.
+DEFAULT_ENTRIES = 100000
+
+
+def _size(value: Any) -> int:
+    """
+    Estimates the memory a key or value holds: the object itself and, for
+    tuples, what it contains.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, tuple):
+        size += sum(_size(item) for item in value)
+    return size
+
+
+class Decision_Cache:
+    """
+    A bounded, least-recently-used cache of bot strategies, safe to share
+    between threads.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_ENTRIES, name: str = "bot_decision"):
+        """
+        Initializes the cache.
+
+        Args:
+            max_entries (int, optional): How many situations to keep. Defaults to DEFAULT_ENTRIES.
+            name (str, optional): The cache's label in the cache lookup metrics.
+                Defaults to "bot_decision".
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Looks up a situation, marking it as recently used.
+
+        Args:
+            key (Hashable): The situation.
+
+        Returns:
+            Optional[Any]: The cached strategy, or None.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        CACHE_LOOKUPS.inc(self.name, "miss" if value is None else "hit")
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Stores a situation's strategy, evicting the least recently used
+        situations beyond the limit.
+
+        Args:
+            key (Hashable): The situation.
+            value (Any): The strategy.
+        """
+        size = _size(key) + _size(value)
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._sizes[key]
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self.bytes += size
+            self._evict()
+
+    def resize(self, max_entries: int) -> None:
+        """
+        Changes the limit, evicting entries if it shrank.
+
+        Args:
+            max_entries (int): How many situations to keep (0 disables the cache).
+
+        Raises:
+            ValueError: If the limit is negative.
+        """
+        if max_entries < 0:
+            raise ValueError("The cache size can't be negative.")
+        with self._lock:
+            self.max_entries = max_entries
+            self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            key, _ = self._entries.popitem(last=False)
+            self.bytes -= self._sizes.pop(key)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Empties the cache and resets its statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.hits = self.misses = self.evictions = self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Reports how well the cache is doing.
+
+        Returns:
+            Dict[str, Any]: entries, max_entries, hits, misses, hit_rate,
+                evictions and bytes (the estimated memory the entries hold).
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "bytes": self.bytes,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+DECISION_CACHE = Decision_Cache()
+
+Gauge("poker_bot_cache_entries", "Situations in the shared bot decision cache.", function=lambda: len(DECISION_CACHE))
+Gauge("poker_bot_cache_bytes", "Estimated memory held by the shared bot decision cache.",
+      function=lambda: DECISION_CACHE.bytes)
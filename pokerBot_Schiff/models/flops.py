@@ -0,0 +1,188 @@
+# /models/flops.py
+import itertools
+from array import array
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from models import tables
+
+# Canonical flops and their board texture.
+#
+# Suits have no order in hold'em, so two flops that differ only by a renaming
+# of the suits (A♠K♠2♥ and A♦K♦2♣) play the same. Of the 22,100 flops, 1,755
+# are distinct once suits are canonicalized. Each canonical flop gets an ID,
+# in order of its ranks, and its texture is worked out once when the table is
+# built; at the table, reading a flop's texture is two array lookups.
+#
+# Cards are the integer codes of models/cards.py (suit * 13 + rank).
+TABLE_NAME = "flops"
+CANONICAL_FLOPS = 1755
+
+# Suit textures
+RAINBOW, TWO_TONE, MONOTONE = range(3)
+
+# High card classes, by the flop's top card
+LOW, MIDDLE, BROADWAY, ACE = range(4)  # 2-7, 8-9, T-K, A
+
+# Every straight as a set of ranks, the wheel playing the ace low
+_STRAIGHTS = [set(range(low, low + 5)) for low in range(9)] + [{12, 0, 1, 2, 3}]
+
+
+class Flop_Texture(NamedTuple):
+    """
+    What a flop looks like, the same for every flop with the same canonical ID.
+
+    Attributes:
+        id (int): The canonical flop ID, 0 to 1754.
+        ranks (Tuple[int, ...]): The ranks, highest first (0 is a two, 12 an ace).
+        paired (int): 0 if the ranks are all different, 1 for a pair, 2 for trips.
+        suits (int): RAINBOW, TWO_TONE (a flush draw is possible) or MONOTONE
+            (a flush is possible).
+        connected (int): The most flop ranks any one straight uses, 1 to 3; at 3
+            a player can already hold a straight, at 2 a draw to one.
+        high_card (int): LOW, MIDDLE, BROADWAY or ACE.
+        wet (bool): Whether the flop gives draws: two-tone or monotone, or with
+            a straight possible.
+    """
+    id: int
+    ranks: Tuple[int, ...]
+    paired: int
+    suits: int
+    connected: int
+    high_card: int
+    wet: bool
+
+
+def canonical_form(cards: Sequence[int]) -> Tuple[Tuple[Tuple[int, int], ...], Dict[int, int]]:
+    """
+    The form of a board that every board with the same suit pattern shares:
+    (rank, suit) pairs, highest rank first, with the suits renamed 0, 1, 2...
+    in order of first appearance. Cards of equal rank can be listed either way
+    round, so the smallest of those orders is kept.
+
+    Args:
+        cards (Sequence[int]): The board cards (a flop, or more).
+
+    Returns:
+        Tuple: The canonical key, and the renaming of all four suits that turns
+            the board into it (suits not on the board take the names left, in
+            order), so other cards can be renamed the same way.
+    """
+    ordered = sorted(cards, key=lambda card: card % 13, reverse=True)
+    forms = []
+    for order in itertools.permutations(ordered):
+        if [card % 13 for card in order] != [card % 13 for card in ordered]:
+            continue
+        names: Dict[int, int] = {}
+        key = tuple((card % 13, names.setdefault(card // 13, len(names))) for card in order)
+        forms.append((key, names))
+    key, names = min(forms, key=lambda form: form[0])
+    for suit in range(4):
+        names.setdefault(suit, len(names))
+    return key, names
+
+
+def canonical_key(cards: Sequence[int]) -> Tuple[Tuple[int, int], ...]:
+    """
+    The canonical form of a flop (see canonical_form).
+
+    Args:
+        cards (Sequence[int]): The three flop cards.
+
+    Returns:
+        Tuple[Tuple[int, int], ...]: The canonical key.
+    """
+    return canonical_form(cards)[0]
+
+
+def _texture(flop_id: int, key: Tuple[Tuple[int, int], ...]) -> Flop_Texture:
+    ranks = tuple(rank for rank, _ in key)
+    distinct = set(ranks)
+    suits = len({suit for _, suit in key})
+    connected = max(len(straight & distinct) for straight in _STRAIGHTS)
+    top = ranks[0]
+    high_card = ACE if top == 12 else BROADWAY if top >= 8 else MIDDLE if top >= 6 else LOW
+    suit_texture = {3: RAINBOW, 2: TWO_TONE, 1: MONOTONE}[suits]
+    return Flop_Texture(
+        id=flop_id,
+        ranks=ranks,
+        paired=3 - len(distinct),
+        suits=suit_texture,
+        connected=connected,
+        high_card=high_card,
+        wet=suit_texture != RAINBOW or connected == 3,
+    )
+
+
+class Flop_Index:
+    """
+    Maps every flop, its cards in any order, to its canonical ID and texture.
+    """
+
+    def __init__(self):
+        keys = {cards: canonical_key(cards) for cards in itertools.combinations(range(52), 3)}
+        # Numbered in key order (highest ranks first), so the IDs never change
+        canonical = sorted(set(keys.values()), reverse=True)
+        self.textures: List[Flop_Texture] = [_texture(flop_id, key) for flop_id, key in enumerate(canonical)]
+        ids = {key: flop_id for flop_id, key in enumerate(canonical)}
+
+        # Indexed by first * 2704 + second * 52 + third, for every order of the cards
+        self.ids = array("H", [0xFFFF]) * (52 ** 3)
+        for cards, key in keys.items():
+            flop_id = ids[key]
+            for first, second, third in itertools.permutations(cards):
+                self.ids[first * 2704 + second * 52 + third] = flop_id
+
+    def flop_id(self, cards: Sequence[int]) -> int:
+        """
+        Looks up a flop's canonical ID.
+
+        Args:
+            cards (Sequence[int]): The three flop cards, in any order.
+
+        Returns:
+            int: The canonical ID, 0 to 1754.
+
+        Raises:
+            ValueError: If the cards aren't three different cards.
+        """
+        if len(cards) != 3:
+            raise ValueError("A flop is three cards.")
+        first, second, third = cards
+        flop_id = self.ids[first * 2704 + second * 52 + third] if 0 <= min(cards) and max(cards) < 52 else 0xFFFF
+        if flop_id == 0xFFFF:
+            raise ValueError("A flop is three different cards.")
+        return flop_id
+
+    def texture(self, cards: Sequence[int]) -> Flop_Texture:
+        """
+        Looks up a flop's texture.
+
+        Args:
+            cards (Sequence[int]): The three flop cards, in any order.
+
+        Returns:
+            Flop_Texture: The texture of the flop's canonical form.
+
+        Raises:
+            ValueError: If the cards aren't three different cards.
+        """
+        return self.textures[self.flop_id(cards)]
+
+
+tables.register_table(TABLE_NAME, Flop_Index)
+
+
+def texture(cards: Sequence[int]) -> Flop_Texture:
+    """
+    Looks up a flop's texture in the shared index.
+
+    Args:
+        cards (Sequence[int]): The three flop cards, in any order.
+
+    Returns:
+        Flop_Texture: The flop's texture.
+
+    Raises:
+        ValueError: If the cards aren't three different cards.
+    """
+    return tables.get_table(TABLE_NAME).texture(cards)
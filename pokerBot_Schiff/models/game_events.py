@@ -0,0 +1,198 @@
+# /models/game_events.py
+import asyncio
+import itertools
+import queue
+import threading
+from typing import Dict, Optional, Set
+
+from models.metrics import Gauge, SUBSYSTEM_SECONDS
+from models.serialization import dumps_text
+
+
+class Game_Subscription:
+    """
+    One watcher's feed of events for a game.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, game_id: int, username: str = None, max_pending: int = 256):
+        """
+        Initializes the subscription.
+
+        Args:
+            game_id (int): The game being watched.
+            username (str, optional): The watching user. Defaults to None.
+            max_pending (int, optional): How many undelivered events may pile up
+                before the watcher is considered too slow and dropped. Defaults to 256.
+        """
+        self.id = next(self._ids)
+        self.game_id = game_id
+        self.username = username
+        self.closed = False
+        self._queue = queue.Queue(maxsize=max_pending)
+        # Set when an asyncio task waits on the subscription (see get_async)
+        self._loop = None
+        self._wakeup = None
+
+    def put(self, encoded: str) -> bool:
+        """
+        Queues an encoded event, closing the subscription if it is full.
+
+        Returns:
+            bool: False if the event could not be queued.
+        """
+        try:
+            self._queue.put_nowait(encoded)
+        except queue.Full:
+            # A watcher that fell this far behind has to reconnect and start from fresh state.
+            self.closed = True
+            return False
+        finally:
+            self.wake()
+        return True
+
+    def wake(self) -> None:
+        """
+        Wakes an asyncio task waiting in get_async. Safe to call from any thread.
+        """
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # The waiting event loop has already shut down
+                pass
+
+    def get(self, timeout: float = None) -> Optional[str]:
+        """
+        Waits for the next encoded event.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Defaults to waiting forever.
+
+        Returns:
+            Optional[str]: The JSON-encoded event, or None on timeout.
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def get_async(self, timeout: float = None) -> Optional[str]:
+        """
+        Waits for the next encoded event without blocking the event loop, so
+        one loop can hold many idle watchers.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Defaults to waiting forever.
+
+        Returns:
+            Optional[str]: The JSON-encoded event, or None on timeout or when
+                the subscription is closed.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._wakeup = asyncio.Event()
+            self._loop = loop
+        while not self.closed:
+            self._wakeup.clear()
+            try:
+                return self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return None
+
+
+class Game_Events:
+    """
+    Process-wide publish/subscribe hub that pushes game state changes to
+    everyone watching a game. Each event is encoded once, however many
+    watchers receive it.
+    """
+    _subscribers: Dict[int, Set[Game_Subscription]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def subscribe(cls, game_id: int, username: str = None) -> Game_Subscription:
+        """
+        Starts watching a game.
+
+        Args:
+            game_id (int): The game to watch.
+            username (str, optional): The watching user. Defaults to None.
+
+        Returns:
+            Game_Subscription: The new subscription.
+        """
+        subscription = Game_Subscription(game_id, username)
+        with cls._lock:
+            cls._subscribers.setdefault(game_id, set()).add(subscription)
+        return subscription
+
+    @classmethod
+    def unsubscribe(cls, subscription: Game_Subscription) -> None:
+        """
+        Stops a subscription.
+
+        Args:
+            subscription (Game_Subscription): The subscription to stop.
+        """
+        subscription.closed = True
+        subscription.wake()
+        with cls._lock:
+            watchers = cls._subscribers.get(subscription.game_id)
+            if watchers is not None:
+                watchers.discard(subscription)
+                if not watchers:
+                    del cls._subscribers[subscription.game_id]
+
+    @classmethod
+    @SUBSYSTEM_SECONDS.time("game_events", "publish")
+    def publish(cls, game_id: int, event: Dict, origin: Game_Subscription = None) -> int:
+        """
+        Pushes an event to every watcher of a game.
+
+        Args:
+            game_id (int): The game the event belongs to.
+            event (Dict): The event, with a "type" key.
+            origin (Game_Subscription, optional): The subscription whose action caused
+                the event; it already has the full reply and is skipped. Defaults to None.
+
+        Returns:
+            int: The number of watchers the event was delivered to.
+        """
+        with cls._lock:
+            watchers = list(cls._subscribers.get(game_id, ()))
+        if not watchers:
+            return 0
+        encoded = dumps_text(event)
+        delivered = 0
+        for subscription in watchers:
+            if subscription is origin:
+                continue
+            if subscription.put(encoded):
+                delivered += 1
+            else:
+                cls.unsubscribe(subscription)
+        return delivered
+
+    @classmethod
+    def watcher_count(cls, game_id: int) -> int:
+        """
+        Counts the watchers of a game.
+
+        Args:
+            game_id (int): The game.
+
+        Returns:
+            int: The number of open subscriptions.
+        """
+        with cls._lock:
+            return len(cls._subscribers.get(game_id, ()))
+
+
+Gauge("poker_game_watchers", "Open event subscriptions across all games.",
+      function=lambda: sum(len(watchers) for watchers in list(Game_Events._subscribers.values())))
@@ -0,0 +1,302 @@
+# /models/hand_ranks.py
+import itertools
+import os
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:  # Only evaluate_many needs it
+    numpy = None
+
+from models import tables
+from models.table_file import TableFormatError, generate as generate_table_file, open_table_file
+
+# Lookup-table evaluation of 5 to 7 card hands.
+#
+# Every 5-card hand falls into one of 7462 equivalence classes; a hand's
+# strength is its class number, 1 (7-5-4-3-2 offsuit) to 7462 (royal flush),
+# so comparing two hands is comparing two integers. The tables hold the best
+# strength for every set of ranks a hand can contain:
+#
+#   flush     indexed by the 13-bit rank mask of the suit holding 5+ cards
+#   ranks     indexed by a perfect hash of the hand's rank counts, for hands
+#             without a flush (all that matters is how many of each rank)
+#   offsets   the perfect hash: hash = sum of offsets[rank][cards left][count]
+#
+# Cards are the integer codes of models/cards.py (suit * 13 + rank).
+TABLE_NAME = "hand_ranks"
+TABLE_VERSION = 1
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "tables", "hand_ranks.tbl")
+
+# Hand categories, numbered like evaluate_hand in controllers/GameController.py
+HIGH_CARD, PAIR, TWO_PAIR, THREE_OF_A_KIND, STRAIGHT, FLUSH, FULL_HOUSE, FOUR_OF_A_KIND, STRAIGHT_FLUSH, ROYAL_FLUSH = range(10)
+
+_RANKS = 13
+_MAX_CARDS = 7
+
+
+def rank_five(ranks: Sequence[int], flush: bool) -> Tuple[int, Tuple[int, ...]]:
+    """
+    Ranks a 5-card hand from scratch. This is the reference the tables are
+    built from, kept simple rather than fast.
+
+    Args:
+        ranks (Sequence[int]): The five card ranks, 0 (two) to 12 (ace).
+        flush (bool): Whether all five cards share a suit.
+
+    Returns:
+        Tuple[int, Tuple[int, ...]]: The category and the tie-breaking card
+            values (2 to 14), comparable as a tuple.
+    """
+    values = tuple(sorted((rank + 2 for rank in ranks), reverse=True))
+    counts = {value: values.count(value) for value in values}
+    groups = sorted(counts.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    straight_high = None
+    if len(counts) == 5:
+        if values[0] - values[4] == 4:
+            straight_high = values[0]
+        elif values == (14, 5, 4, 3, 2):
+            straight_high = 5
+
+    if straight_high and flush:
+        return (ROYAL_FLUSH if straight_high == 14 else STRAIGHT_FLUSH), (straight_high,)
+    if groups[0][1] == 4:
+        return FOUR_OF_A_KIND, (groups[0][0], groups[1][0])
+    if groups[0][1] == 3 and groups[1][1] == 2:
+        return FULL_HOUSE, (groups[0][0], groups[1][0])
+    if flush:
+        return FLUSH, values
+    if straight_high:
+        return STRAIGHT, (straight_high,)
+    if groups[0][1] == 3:
+        return THREE_OF_A_KIND, tuple(value for value, _ in groups)
+    if groups[0][1] == 2 and groups[1][1] == 2:
+        return TWO_PAIR, tuple(value for value, _ in groups)
+    if groups[0][1] == 2:
+        return PAIR, tuple(value for value, _ in groups)
+    return HIGH_CARD, values
+
+
+def _count_vectors(total: int) -> List[Tuple[int, ...]]:
+    """
+    Every way to hold `total` cards as counts per rank (at most 4 of a rank),
+    in the lexicographic order the perfect hash numbers them.
+    """
+    vectors = []
+
+    def extend(prefix, left):
+        if len(prefix) == _RANKS:
+            if left == 0:
+                vectors.append(tuple(prefix))
+            return
+        for count in range(min(4, left) + 1):
+            extend(prefix + [count], left - count)
+
+    extend([], total)
+    return vectors
+
+
+def _hash_offsets() -> List[int]:
+    """
+    Builds the perfect hash of rank counts: offsets[(rank * 8 + left) * 5 + count]
+    is how many count vectors with `left` cards on ranks rank..12 come before
+    those holding `count` cards of this rank.
+    """
+    # ways[r][t]: ways to place t cards on the ranks r..12
+    ways = [[0] * (_MAX_CARDS + 1) for _ in range(_RANKS + 1)]
+    ways[_RANKS][0] = 1
+    for rank in range(_RANKS - 1, -1, -1):
+        for total in range(_MAX_CARDS + 1):
+            ways[rank][total] = sum(ways[rank + 1][total - count] for count in range(min(4, total) + 1))
+
+    offsets = [0] * (_RANKS * 8 * 5)
+    for rank in range(_RANKS):
+        for left in range(_MAX_CARDS + 1):
+            before = 0
+            for count in range(5):
+                offsets[(rank * 8 + left) * 5 + count] = before
+                if count <= left:
+                    before += ways[rank + 1][left - count]
+    return offsets
+
+
+def _hash(counts: Sequence[int], offsets: Sequence[int]) -> int:
+    left = sum(counts)
+    index = 0
+    for rank, count in enumerate(counts):
+        if count:
+            index += offsets[(rank * 8 + left) * 5 + count]
+            left -= count
+    return index
+
+
+def generate():
+    """
+    Builds the tables (takes a few seconds).
+
+    Returns:
+        Tuple: (sections, metadata, version) for models.table_file.write_table_file.
+    """
+    # Number the 7462 classes of 5-card hands from weakest to strongest
+    classes = set()
+    for combination in itertools.combinations_with_replacement(range(_RANKS), 5):
+        if max(combination.count(rank) for rank in combination) <= 4:
+            classes.add(rank_five(combination, False))
+            if len(set(combination)) == 5:
+                classes.add(rank_five(combination, True))
+    strength = {hand_class: number for number, hand_class in enumerate(sorted(classes), start=1)}
+
+    flush = [0] * (1 << _RANKS)
+    for size in range(5, _MAX_CARDS + 1):
+        for ranks in itertools.combinations(range(_RANKS), size):
+            mask = sum(1 << rank for rank in ranks)
+            flush[mask] = max(strength[rank_five(five, True)] for five in itertools.combinations(ranks, 5))
+
+    offsets = _hash_offsets()
+    best_five: Dict[Tuple[int, ...], int] = {}
+    rank_sections = {}
+    for total in range(5, _MAX_CARDS + 1):
+        vectors = _count_vectors(total)
+        values = []
+        for position, counts in enumerate(vectors):
+            assert _hash(counts, offsets) == position
+            cards = [rank for rank, count in enumerate(counts) for _ in range(count)]
+            best = 0
+            for five in set(itertools.combinations(cards, 5)):
+                if five not in best_five:
+                    best_five[five] = strength[rank_five(five, False)] if max(map(five.count, five)) <= 4 else 0
+                best = max(best, best_five[five])
+            values.append(best)
+        rank_sections[f"ranks_{total}"] = ("H", (len(values),), values)
+
+    # Weakest strength of each category, to map a strength back to its category
+    category_floors = [min(number for (category, _), number in strength.items() if category == c) for c in range(10)]
+
+    sections = {
+        "flush": ("H", (len(flush),), flush),
+        "offsets": ("I", (len(offsets),), offsets),
+        "category_floors": ("H", (10,), category_floors),
+        **rank_sections,
+    }
+    return sections, {"classes": len(strength)}, TABLE_VERSION
+
+
+class Hand_Ranks:
+    """
+    The evaluation tables, mapped from their table file.
+    """
+    def __init__(self, path: str = TABLE_PATH):
+        """
+        Opens the table file, generating it first if it is missing or out of date.
+
+        Args:
+            path (str, optional): The table file. Defaults to data/tables/hand_ranks.tbl.
+        """
+        try:
+            self.file = open_table_file(path, TABLE_NAME, TABLE_VERSION)
+        except (FileNotFoundError, TableFormatError):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            generate_table_file(TABLE_NAME, path)
+            self.file = open_table_file(path, TABLE_NAME, TABLE_VERSION)
+        self.flush = self.file.view("flush")
+        self.ranks = {total: self.file.view(f"ranks_{total}") for total in range(5, _MAX_CARDS + 1)}
+        # Small and hit on every evaluation, so copied into lists
+        self.offsets = self.file.view("offsets").tolist()
+        self.category_floors = self.file.view("category_floors").tolist()
+        self._arrays = None  # NumPy arrays over the same sections, for evaluate_many
+
+    def evaluate(self, cards: Sequence[int]) -> int:
+        """
+        Scores the best 5-card hand among 5 to 7 cards.
+
+        Args:
+            cards (Sequence[int]): The card codes.
+
+        Returns:
+            int: The hand's strength, 1 to 7462; higher is better.
+        """
+        counts = [0] * _RANKS
+        suit_masks = [0, 0, 0, 0]
+        for card in cards:
+            suit, rank = divmod(card, _RANKS)
+            counts[rank] += 1
+            suit_masks[suit] |= 1 << rank
+        for mask in suit_masks:
+            if mask.bit_count() >= 5:
+                # With 5+ cards of one suit among 7 there can't be quads or a full house
+                return self.flush[mask]
+        return self.ranks[len(cards)][_hash(counts, self.offsets)]
+
+    def evaluate_many(self, hands):
+        """
+        Scores many hands of the same size in one pass: the same lookups as
+        evaluate, done with NumPy over every row at once.
+
+        Args:
+            hands (numpy.ndarray): The card codes, one hand of 5 to 7 distinct
+                cards per row.
+
+        Returns:
+            numpy.ndarray: Each hand's strength, 1 to 7462.
+
+        Raises:
+            ImportError: If NumPy isn't installed.
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for evaluate_many(); use evaluate() instead.")
+        if self._arrays is None:
+            self._arrays = (
+                self.file.array("flush"),
+                {total: self.file.array(f"ranks_{total}") for total in range(5, _MAX_CARDS + 1)},
+                numpy.asarray(self.offsets, dtype=numpy.int64),
+            )
+        flush_table, rank_tables, offsets = self._arrays
+
+        hands = numpy.asarray(hands, dtype=numpy.int64)
+        rows, total = hands.shape
+        suits, ranks = numpy.divmod(hands, _RANKS)
+        counts = numpy.bincount((ranks + numpy.arange(rows)[:, None] * _RANKS).ravel(),
+                                minlength=rows * _RANKS).reshape(rows, _RANKS)
+        # The perfect hash, term by term: the cards left on this rank and above, and the count on it
+        left = total - numpy.cumsum(counts, axis=1) + counts
+        index = offsets[(numpy.arange(_RANKS) * 8 + left) * 5 + counts].sum(axis=1)
+        strengths = rank_tables[total][index].astype(numpy.int32)
+
+        bits = numpy.left_shift(1, ranks)
+        for suit in range(4):
+            in_suit = suits == suit
+            flush = in_suit.sum(axis=1) >= 5
+            if flush.any():
+                strengths[flush] = flush_table[(bits * in_suit)[flush].sum(axis=1)]
+        return strengths
+
+    def category(self, strength: int) -> int:
+        """
+        Returns the category (HIGH_CARD to ROYAL_FLUSH) of a strength.
+
+        Args:
+            strength (int): A strength returned by evaluate.
+
+        Returns:
+            int: The category.
+        """
+        for category in range(ROYAL_FLUSH, HIGH_CARD, -1):
+            if strength >= self.category_floors[category]:
+                return category
+        return HIGH_CARD
+
+
+tables.register_table(TABLE_NAME, Hand_Ranks)
+
+
+def evaluate(cards: Sequence[int]) -> int:
+    """
+    Scores the best 5-card hand among 5 to 7 cards with the shared tables.
+
+    Args:
+        cards (Sequence[int]): The card codes.
+
+    Returns:
+        int: The hand's strength, 1 to 7462; higher is better.
+    """
+    return tables.get_table(TABLE_NAME).evaluate(cards)
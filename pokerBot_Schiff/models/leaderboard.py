@@ -0,0 +1,287 @@
+# /models/leaderboard.py
+import math
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models.metrics import Gauge
+from models.user_model import User, User_Model
+
+# The players ranked by bankroll, kept in order as hands finish.
+#
+# The ranking is an indexable skip list: a sorted linked list with express
+# lanes, where every link also records how many places it skips. Moving a
+# player (a removal and an insertion) and finding a player's rank take
+# O(log n) steps, and reading k places from any rank takes O(log n + k), so a
+# leaderboard page never sorts the user base.
+#
+# Each process keeps its own copy, built from the user store on first use. Hands
+# finished in other processes (the workers of launcher.py share the store) show
+# up when the copy is rebuilt, at most max_age seconds later.
+MAX_LEVELS = 32
+DEFAULT_MAX_AGE = 60.0
+
+# Places are ordered by key: highest bankroll first, ties by username
+Key = Tuple[int, str]
+_END: Key = (math.inf, "")
+
+
+class _Node:
+    __slots__ = ("key", "value", "next", "width")
+
+    def __init__(self, key: Key, value: Any, levels: int):
+        self.key = key
+        self.value = value
+        self.next: List[Optional["_Node"]] = [None] * levels
+        self.width: List[int] = [0] * levels  # Places skipped by each link
+
+
+class Rank_Index:
+    """
+    An indexable skip list of (key, value) entries, in key order.
+    """
+
+    def __init__(self):
+        self._end = _Node(_END, None, 0)
+        self._head = _Node(None, None, MAX_LEVELS)
+        self._head.next = [self._end] * MAX_LEVELS
+        self._head.width = [1] * MAX_LEVELS
+        self._size = 0
+
+    def insert(self, key: Key, value: Any) -> None:
+        """
+        Adds an entry. O(log n).
+
+        Args:
+            key (Key): Its place in the order; keys are unique.
+            value (Any): What the entry holds.
+        """
+        chain = [self._head] * MAX_LEVELS
+        steps = [0] * MAX_LEVELS
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level].key < key:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        # Each level holds about half the nodes of the one below
+        levels = min(MAX_LEVELS, 1 - int(math.log2(1 - random.random())))
+        new = _Node(key, value, levels)
+        skipped = 0
+        for level in range(levels):
+            previous = chain[level]
+            new.next[level] = previous.next[level]
+            previous.next[level] = new
+            new.width[level] = previous.width[level] - skipped
+            previous.width[level] = skipped + 1
+            skipped += steps[level]
+        for level in range(levels, MAX_LEVELS):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key: Key) -> None:
+        """
+        Removes an entry. O(log n).
+
+        Args:
+            key (Key): The entry's key.
+
+        Raises:
+            KeyError: If there is no such entry.
+        """
+        chain = [self._head] * MAX_LEVELS
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+        target = node.next[0]
+        if target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def rank(self, key: Key) -> int:
+        """
+        Finds an entry's place. O(log n).
+
+        Args:
+            key (Key): The entry's key.
+
+        Returns:
+            int: Its place, from 1.
+
+        Raises:
+            KeyError: If there is no such entry.
+        """
+        place = 0
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level].key < key:
+                place += node.width[level]
+                node = node.next[level]
+        if node.next[0].key != key:
+            raise KeyError(key)
+        return place + 1
+
+    def slice(self, start: int, count: int) -> List[Tuple[Key, Any]]:
+        """
+        Reads consecutive entries. O(log n + count).
+
+        Args:
+            start (int): The place to start from, from 0.
+            count (int): How many entries to read.
+
+        Returns:
+            List[Tuple[Key, Any]]: The entries, in order.
+        """
+        if start >= self._size:
+            return []
+        # Walk the express lanes to the node just before the start
+        node = self._head
+        remaining = start
+        for level in reversed(range(MAX_LEVELS)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        entries = []
+        node = node.next[0]
+        while node is not self._end and len(entries) < count:
+            entries.append((node.key, node.value))
+            node = node.next[0]
+        return entries
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class Leaderboard:
+    """
+    The players ranked by bankroll, updated as their hands finish. Safe to
+    share between threads.
+    """
+
+    def __init__(self, loader: Callable[[], List[User]] = None, max_age: float = DEFAULT_MAX_AGE,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initializes the leaderboard; it is built on first use.
+
+        Args:
+            loader (Callable[[], List[User]], optional): Returns every user, to build
+                the ranking from. Defaults to User_Model.get_all.
+            max_age (float, optional): Seconds before the ranking is rebuilt from
+                the store, to pick up other processes' results (0 to never rebuild).
+                Defaults to DEFAULT_MAX_AGE.
+            clock (Callable[[], float], optional): The time source, in seconds.
+                Defaults to time.monotonic.
+        """
+        self.loader = loader or User_Model.get_all
+        self.max_age = max_age
+        self.clock = clock
+        self._index = None
+        self._keys: Dict[str, Key] = {}
+        self._built_at = 0.0
+        self._lock = threading.RLock()
+
+    def _fresh(self) -> Rank_Index:
+        if self._index is None or (self.max_age and self.clock() - self._built_at > self.max_age):
+            self.rebuild()
+        return self._index
+
+    def rebuild(self) -> None:
+        """
+        Builds the ranking from every user in the store.
+        """
+        users = self.loader()
+        with self._lock:
+            self._index = Rank_Index()
+            self._keys = {}
+            for user in users:
+                self._insert(user)
+            self._built_at = self.clock()
+
+    def _insert(self, user: User) -> None:
+        key = (-user.bankroll, user.username)
+        self._index.insert(key, {
+            "username": user.username,
+            "bankroll": user.bankroll,
+            "hands_played": user.hands_played,
+            "hands_won": user.hands_won,
+        })
+        self._keys[user.username] = key
+
+    def update(self, user: User) -> None:
+        """
+        Moves a player to their place for their current bankroll. O(log n).
+
+        Args:
+            user (User): The player, with their updated results.
+        """
+        with self._lock:
+            if self._index is None:
+                return  # Built from the store, which already has the result, on first use
+            self._discard(user.username)
+            self._insert(user)
+
+    def remove(self, username: str) -> None:
+        """
+        Drops a player from the ranking.
+
+        Args:
+            username (str): The player.
+        """
+        with self._lock:
+            if self._index is not None:
+                self._discard(username)
+
+    def _discard(self, username: str) -> None:
+        key = self._keys.pop(username, None)
+        if key is not None:
+            self._index.remove(key)
+
+    def top(self, count: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Reads a page of the ranking. O(log n + count).
+
+        Args:
+            count (int, optional): How many places. Defaults to 10.
+            offset (int, optional): How many places to skip. Defaults to 0.
+
+        Returns:
+            List[Dict[str, Any]]: rank, username, bankroll, hands_played and
+                hands_won for each place.
+        """
+        with self._lock:
+            entries = self._fresh().slice(offset, count)
+        return [dict(value, rank=offset + place) for place, (_, value) in enumerate(entries, 1)]
+
+    def rank(self, username: str) -> Optional[int]:
+        """
+        Finds a player's place. O(log n).
+
+        Args:
+            username (str): The player.
+
+        Returns:
+            Optional[int]: Their rank, from 1, or None if they aren't ranked.
+        """
+        with self._lock:
+            index = self._fresh()
+            key = self._keys.get(username)
+            return index.rank(key) if key is not None else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._fresh())
+
+
+LEADERBOARD = Leaderboard()
+
+Gauge("poker_leaderboard_players", "Players on the leaderboard of this process.",
+      function=lambda: len(LEADERBOARD._index) if LEADERBOARD._index is not None else 0)
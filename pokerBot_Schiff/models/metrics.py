@@ -0,0 +1,288 @@
+# /models/metrics.py
+import bisect
+import contextlib
+import functools
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+# In-process metrics rendered in the Prometheus text format on /metrics.
+#
+# Each metric is a family of series keyed by label values, passed positionally
+# in the order the metric declares its label names:
+#
+#     REQUESTS.inc("play", "200")
+#     with SUBSYSTEM_SECONDS.time("user_store", "get"):
+#         ...
+#
+# Recording takes a dict lookup and a short lock, a few hundred nanoseconds.
+# Every process keeps its own metrics; under the pre-fork launcher, scrape each
+# worker (--worker-ports) or sum the series across workers.
+
+# Latency buckets in seconds, from sub-millisecond lookups to slow password hashes
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+_registry: Dict[str, "Metric"] = {}
+_registry_lock = threading.Lock()
+
+
+class Metric:
+    """
+    Base class for a family of series sharing a name and label names.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        """
+        Creates and registers a metric.
+
+        Args:
+            name (str): The metric name, e.g. "poker_hands_dealt_total".
+            help (str): A one-line description.
+            labels (Sequence[str], optional): The label names. Defaults to none.
+
+        Raises:
+            ValueError: If a metric with the same name is already registered.
+        """
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            if name in _registry:
+                raise ValueError(f"A metric named '{name}' is already registered.")
+            _registry[name] = self
+
+    def _label_text(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [f'{label}="{_escape(str(value))}"' for label, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """
+        Returns the metric in the Prometheus text exposition format.
+        """
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    A monotonically increasing count per label set.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """
+        Adds to a series.
+
+        Args:
+            *label_values (str): The label values, in the metric's label order.
+            amount (float, optional): How much to add. Defaults to 1.
+        """
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        """
+        Returns a series' current value (0 if it hasn't been recorded).
+        """
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._label_text(labels)} {_number(value)}" for labels, value in values]
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down, either set directly or read from a function
+    at scrape time.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), function: Callable[[], float] = None):
+        """
+        Creates and registers a gauge.
+
+        Args:
+            name (str): The metric name.
+            help (str): A one-line description.
+            labels (Sequence[str], optional): The label names. Defaults to none.
+            function (Callable[[], float], optional): Called on every scrape to read the
+                value of an unlabelled gauge, instead of it being set. Defaults to None.
+        """
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._function = function
+
+    def set(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def value(self, *label_values: str) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._values.get(label_values, 0)
+
+    @contextlib.contextmanager
+    def track(self, *label_values: str) -> Iterator[None]:
+        """
+        Counts the block as in flight while it runs.
+        """
+        self.inc(*label_values)
+        try:
+            yield
+        finally:
+            self.dec(*label_values)
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            return [f"{self.name} {_number(self._function())}"]
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._label_text(labels)} {_number(value)}" for labels, value in values]
+
+
+class Histogram(Metric):
+    """
+    A distribution of observations (usually durations in seconds) in fixed
+    buckets, with their count and sum.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Creates and registers a histogram.
+
+        Args:
+            name (str): The metric name, e.g. "poker_request_duration_seconds".
+            help (str): A one-line description.
+            labels (Sequence[str], optional): The label names. Defaults to none.
+            buckets (Sequence[float], optional): The bucket upper bounds, ascending.
+                Defaults to DEFAULT_BUCKETS.
+        """
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: [count in each bucket (the last is +Inf), total count, sum]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """
+        Records an observation.
+
+        Args:
+            value (float): The observed value.
+            *label_values (str): The label values, in the metric's label order.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def time(self, *label_values: str) -> "_Timer":
+        """
+        Times a block or a function (use as a context manager or decorator).
+
+        Args:
+            *label_values (str): The label values of the series to record into.
+        """
+        return _Timer(self, label_values)
+
+    def count(self, *label_values: str) -> int:
+        """
+        Returns how many observations a series holds.
+        """
+        series = self._series.get(label_values)
+        return series[1] if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series_list = sorted((labels, [list(series[0]), series[1], series[2]])
+                                 for labels, series in self._series.items())
+        lines = []
+        for labels, (counts, total, value_sum) in series_list:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{self._label_text(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_count{self._label_text(labels)} {total}")
+            lines.append(f"{self.name}_sum{self._label_text(labels)} {_number(value_sum)}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, label_values: LabelValues):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self._start, *self.label_values)
+
+    def __call__(self, function: Callable) -> Callable:
+        # A fresh timer per call, so concurrent calls don't share a start time
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            with _Timer(self.histogram, self.label_values):
+                return function(*args, **kwargs)
+        return timed
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def render() -> str:
+    """
+    Returns every registered metric in the Prometheus text exposition format.
+    """
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# The app's metrics. Modules record into these; the /metrics route renders them.
+REQUEST_SECONDS = Histogram("poker_request_duration_seconds", "Time spent handling HTTP requests.", ["route", "method"])
+REQUESTS = Counter("poker_requests_total", "HTTP requests handled.", ["route", "status"])
+REQUESTS_IN_FLIGHT = Gauge("poker_requests_in_flight", "HTTP requests being handled.", ["route"])
+SUBSYSTEM_SECONDS = Histogram("poker_subsystem_duration_seconds",
+                              "Time spent in internal subsystems (user store, passwords, game logic).",
+                              ["subsystem", "operation"])
+HANDS_DEALT = Counter("poker_hands_dealt_total", "Hands dealt.")
+SHOWDOWNS = Counter("poker_showdowns_total", "Hands decided at showdown, by winner.", ["winner"])
+BOT_DECISIONS = Counter("poker_bot_decisions_total", "Bot decisions, by difficulty and action.", ["difficulty", "action"])
+CACHE_LOOKUPS = Counter("poker_cache_lookups_total", "Cache lookups, by cache and result (hit or miss).", ["cache", "result"])
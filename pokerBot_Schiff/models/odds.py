@@ -0,0 +1,144 @@
+# /models/odds.py
+import itertools
+import math
+import random
+from typing import Dict, List, Sequence
+
+try:
+    import numpy
+except ImportError:  # Exact equity scores opponent hands one by one without it
+    numpy = None
+
+from models import hand_ranks, tables
+
+# A player's chances from what they can see: their hole cards and the revealed
+# board. The opponent's cards are unknown, so equity is measured against every
+# possible opponent hand (a uniformly random one), with the rest of the board
+# run out. Cards are the integer codes of models/cards.py.
+
+# Enumerate every (opponent hand, runout) when there are at most this many, else
+# sample: the river (990 opponent hands) and the turn (46 rivers by 990) are exact
+EXACT_LIMIT = 50000
+SAMPLES = 4000
+
+DECK = range(52)
+
+
+def _evaluator():
+    return tables.get_table(hand_ranks.TABLE_NAME)
+
+
+def equity(hole: Sequence[int], board: Sequence[int], samples: int = SAMPLES) -> Dict:
+    """
+    Computes a player's equity against a random opponent hand.
+
+    Args:
+        hole (Sequence[int]): The player's two hole cards.
+        board (Sequence[int]): The revealed community cards (0 to 5).
+        samples (int, optional): How many (opponent hand, runout) deals to sample
+            when there are too many to enumerate. Defaults to SAMPLES.
+
+    Returns:
+        Dict: win, tie and lose probabilities, equity (win plus half the ties),
+            the method ("exact" or "sampled") and the number of deals evaluated.
+
+    Raises:
+        ValueError: If the cards are invalid or repeated.
+    """
+    hole, board = list(hole), list(board)
+    known = hole + board
+    if len(hole) != 2 or len(board) > 5 or len(set(known)) != len(known) or not all(0 <= card < 52 for card in known):
+        raise ValueError("Equity needs two distinct hole cards and up to five board cards.")
+    evaluator = _evaluator()
+    evaluate = evaluator.evaluate
+    unseen = [card for card in DECK if card not in known]
+    missing = 5 - len(board)
+    deals = math.comb(len(unseen), 2) * math.comb(len(unseen) - 2, missing)
+
+    wins = ties = 0
+    if deals <= EXACT_LIMIT:
+        # Enumerate the runouts, then every opponent hand from the cards left
+        method, evaluated = "exact", deals
+        for runout in itertools.combinations(unseen, missing):
+            full_board = board + list(runout)
+            mine = evaluate(hole + full_board)
+            rest = [card for card in unseen if card not in runout]
+            if numpy is not None:
+                # Every opponent hand against this board in one pass
+                opponents = numpy.array(list(itertools.combinations(rest, 2)))
+                theirs = evaluator.evaluate_many(
+                    numpy.hstack([opponents, numpy.tile(full_board, (len(opponents), 1))]))
+                wins += int((mine > theirs).sum())
+                ties += int((mine == theirs).sum())
+                continue
+            for opponent in itertools.combinations(rest, 2):
+                theirs = evaluate(list(opponent) + full_board)
+                wins += mine > theirs
+                ties += mine == theirs
+    else:
+        # The same cards always draw the same sample, so the numbers don't jitter between requests
+        method, evaluated = "sampled", samples
+        rng = random.Random(bytes(known))
+        for _ in range(samples):
+            drawn = rng.sample(unseen, 2 + missing)
+            full_board = board + drawn[2:]
+            mine = evaluate(hole + full_board)
+            theirs = evaluate(drawn[:2] + full_board)
+            wins += mine > theirs
+            ties += mine == theirs
+
+    return {
+        "win": wins / evaluated,
+        "tie": ties / evaluated,
+        "lose": (evaluated - wins - ties) / evaluated,
+        "equity": (wins + ties / 2) / evaluated,
+        "method": method,
+        "deals": evaluated,
+    }
+
+
+def _board_category(cards: List[int]) -> int:
+    """
+    The category the community cards make on their own. Fewer than five cards
+    can only hold pairs, trips or quads.
+    """
+    if len(cards) >= 5:
+        table = _evaluator()
+        return table.category(table.evaluate(cards))
+    counts = sorted((sum(card % 13 == rank for card in cards) for rank in {card % 13 for card in cards}), reverse=True)
+    if counts[0] == 4:
+        return hand_ranks.FOUR_OF_A_KIND
+    if counts[0] == 3:
+        return hand_ranks.THREE_OF_A_KIND
+    if counts[0] == 2:
+        return hand_ranks.TWO_PAIR if len(counts) > 1 and counts[1] == 2 else hand_ranks.PAIR
+    return hand_ranks.HIGH_CARD
+
+
+def outs(hole: Sequence[int], board: Sequence[int]) -> List[int]:
+    """
+    Finds the unseen cards that would improve the player's hand category on
+    the next street, leaving out improvements the board makes for everyone
+    (a card that pairs the board doesn't count as an out for two pair).
+
+    Args:
+        hole (Sequence[int]): The player's two hole cards.
+        board (Sequence[int]): The revealed community cards; outs only exist
+            on the flop and the turn.
+
+    Returns:
+        List[int]: The outs, in card code order.
+    """
+    hole, board = list(hole), list(board)
+    if len(board) not in (3, 4):
+        return []
+    table = _evaluator()
+    current = table.category(table.evaluate(hole + board))
+    found = []
+    for card in DECK:
+        if card in hole or card in board:
+            continue
+        improved = table.category(table.evaluate(hole + board + [card]))
+        if improved > current and improved > _board_category(board + [card]):
+            found.append(card)
+    return found
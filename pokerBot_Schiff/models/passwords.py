@@ -0,0 +1,216 @@
+# /models/passwords.py
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models.metrics import SUBSYSTEM_SECONDS
+
+_SCHEME = "scrypt"
+
+
+class HasherBusyError(RuntimeError):
+    """
+    Raised when the password hashing queue is full.
+    """
+
+
+class Password_Hasher:
+    """
+    Hashes and verifies passwords with scrypt on a bounded worker pool.
+
+    Hashes are stored as "scrypt$<n>$<r>$<p>$<salt>$<hash>", so every record
+    carries the cost parameters it was hashed with and can be rehashed when
+    they change. hashlib.scrypt releases the GIL, so the pool's threads run
+    in parallel; capping the pool and its queue keeps a burst of logins from
+    taking every core and request thread away from the game endpoints.
+    """
+    def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1, workers: int = None, max_queue: int = 64):
+        """
+        Initializes the hasher.
+
+        Args:
+            n (int, optional): The scrypt CPU/memory cost. Defaults to 2 ** 14.
+            r (int, optional): The scrypt block size. Defaults to 8.
+            p (int, optional): The scrypt parallelization. Defaults to 1.
+            workers (int, optional): The number of worker threads. Defaults to the CPU count.
+            max_queue (int, optional): How many jobs may wait for a worker before new
+                ones are rejected. Defaults to 64.
+        """
+        self.n = n
+        self.r = r
+        self.p = p
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._stats = {"max_queued": 0, "completed": 0, "rejected": 0}
+        if hasattr(os, "register_at_fork"):
+            # The pool's threads don't survive a fork; forked workers start their own.
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() and ref()._after_fork())
+
+    def _after_fork(self) -> None:
+        self._executor = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+
+    def _derive(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p,
+            maxmem=256 * n * r * p + 1024 * 1024, dklen=32,
+        )
+
+    def _hash_now(self, password: str) -> str:
+        salt = os.urandom(16)
+        digest = self._derive(password, salt, self.n, self.r, self.p)
+        return "$".join([
+            _SCHEME, str(self.n), str(self.r), str(self.p),
+            base64.b64encode(salt).decode(), base64.b64encode(digest).decode(),
+        ])
+
+    def _verify_now(self, password: str, stored: str) -> bool:
+        parsed = _parse_hash(stored)
+        if parsed is None:
+            # Legacy plaintext record; it is rehashed on the next successful login.
+            return hmac.compare_digest(password.encode(), stored.encode())
+        n, r, p, salt, digest = parsed
+        try:
+            candidate = self._derive(password, salt, n, r, p)
+        except ValueError:
+            return False  # Parameters scrypt refuses (a damaged record): no password matches
+        return hmac.compare_digest(candidate, digest)
+
+    def _run(self, function: Callable, *args):
+        """
+        Runs a job on the pool and waits for its result.
+
+        Raises:
+            HasherBusyError: If max_queue jobs are already waiting.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+            if self._queued >= self.max_queue:
+                self._stats["rejected"] += 1
+                raise HasherBusyError("Too many password checks in progress.")
+            self._queued += 1
+            self._stats["max_queued"] = max(self._stats["max_queued"], self._queued)
+        return self._executor.submit(self._job, function, *args).result()
+
+    def _job(self, function: Callable, *args):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._stats["completed"] += 1
+
+    @SUBSYSTEM_SECONDS.time("passwords", "hash")
+    def hash(self, password: str) -> str:
+        """
+        Hashes a password with a fresh salt and the current parameters.
+
+        Args:
+            password (str): The plaintext password.
+
+        Returns:
+            str: The encoded hash.
+        """
+        return self._run(self._hash_now, password)
+
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        """
+        Hashes a batch of passwords in parallel, for bulk imports. This bypasses
+        the queue limit.
+
+        Args:
+            passwords (List[str]): The plaintext passwords.
+
+        Returns:
+            List[str]: The encoded hashes, in the same order.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+        return list(self._executor.map(self._hash_now, passwords))
+
+    @SUBSYSTEM_SECONDS.time("passwords", "verify")
+    def verify(self, password: str, stored: Optional[str]) -> bool:
+        """
+        Checks a password against a stored hash (or a legacy plaintext password).
+
+        Args:
+            password (str): The plaintext password to check.
+            stored (Optional[str]): The stored hash. When None, a dummy hash is
+                checked so unknown usernames take as long as wrong passwords.
+
+        Returns:
+            bool: True if the password matches, False otherwise.
+
+        Raises:
+            HasherBusyError: If the queue is full.
+        """
+        if stored is None:
+            self._run(self._hash_now, password)
+            return False
+        return self._run(self._verify_now, password, stored)
+
+    def needs_rehash(self, stored: str) -> bool:
+        """
+        Tells whether a stored password should be rehashed with the current parameters.
+
+        Args:
+            stored (str): The stored hash or legacy plaintext password.
+
+        Returns:
+            bool: True if it is plaintext or was hashed with other parameters.
+        """
+        parsed = _parse_hash(stored)
+        return parsed is None or parsed[:3] != (self.n, self.r, self.p)
+
+    def metrics(self) -> Dict[str, int]:
+        """
+        Returns the pool's queue depth and counters.
+
+        Returns:
+            Dict[str, int]: workers, queued, running, max_queued, completed and rejected.
+        """
+        with self._lock:
+            return {"workers": self.workers, "queued": self._queued, "running": self._running, **self._stats}
+
+
+def _parse_hash(stored: str) -> Optional[Tuple[int, int, int, bytes, bytes]]:
+    fields = stored.split("$")
+    if len(fields) != 6 or fields[0] != _SCHEME:
+        return None
+    try:
+        n, r, p = (int(field) for field in fields[1:4])
+        salt, digest = (base64.b64decode(field, validate=True) for field in fields[4:])
+    except ValueError:  # Includes binascii.Error
+        return None
+    return n, r, p, salt, digest
+
+
+def is_hashed(stored: str) -> bool:
+    """
+    Tells whether a stored password is an encoded scrypt hash. Anything else,
+    including a record that only looks like one, is treated as plaintext.
+
+    Args:
+        stored (str): The stored password.
+
+    Returns:
+        bool: True for hashes produced by Password_Hasher.
+    """
+    return _parse_hash(stored) is not None
@@ -0,0 +1,194 @@
+# /models/profiler.py
+import atexit
+import os
+import random
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+# Opt-in profiling of live requests.
+#
+# A sampled fraction of the requests to selected routes runs under a tracing
+# profiler (sys.setprofile, on the request's thread only). Every Python and C
+# call is recorded with the time spent in it, so even a one-millisecond request
+# yields a complete profile. The time is aggregated per call stack in the
+# collapsed format read by flamegraph.pl, speedscope and similar tools:
+#
+#     route:handle_game_action;controllers.GameController:play_action;... 1234
+#
+# one line per stack, weighted in microseconds of self time. Tracing slows a
+# sampled request down several times, so keep the rate low in production.
+
+
+class Request_Profiler:
+    """
+    Samples requests, profiles them and aggregates their stacks.
+    """
+    def __init__(self, rate: float = 0.0, routes: Iterable[str] = (), directory: str = None, flush_every: int = 50):
+        """
+        Initializes the profiler (disabled until the rate is above zero).
+
+        Args:
+            rate (float, optional): The fraction of matching requests to profile, 0 to 1.
+                Defaults to 0.
+            routes (Iterable[str], optional): The endpoint names to sample; empty means
+                every route. Defaults to every route.
+            directory (str, optional): Where to write the aggregated profile, as
+                "profile-<pid>.folded". Defaults to None (kept in memory only).
+            flush_every (int, optional): Profiled requests between writes. Defaults to 50.
+        """
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stacks: Dict[str, int] = {}
+        self._labels: Dict[object, str] = {}
+        self.profiled = 0
+        self.flush_every = flush_every
+        self.directory = None
+        self.configure(rate=rate, routes=routes, directory=directory or "")
+
+    def configure(self, rate: float = None, routes: Iterable[str] = None, directory: str = None) -> None:
+        """
+        Changes the sampling settings at runtime; arguments left as None are kept.
+
+        Args:
+            rate (float, optional): The fraction of matching requests to profile, 0 to 1.
+            routes (Iterable[str], optional): The endpoint names to sample; empty means every route.
+            directory (str, optional): Where to write the aggregated profile; "" stops writing.
+
+        Raises:
+            ValueError: If the rate is outside 0 to 1.
+        """
+        if rate is not None:
+            rate = float(rate)
+            if not 0 <= rate <= 1:
+                raise ValueError("The sampling rate must be between 0 and 1.")
+            self.rate = rate
+        if routes is not None:
+            self.routes = frozenset(route for route in routes if route)
+        if directory is not None:
+            self.directory = directory or None
+
+    def settings(self) -> Dict:
+        """
+        Returns the current settings and how many requests have been profiled.
+        """
+        return {"rate": self.rate, "routes": sorted(self.routes), "directory": self.directory, "profiled": self.profiled}
+
+    def start(self, route: str) -> bool:
+        """
+        Starts profiling the current thread if this request is sampled.
+
+        Args:
+            route (str): The request's endpoint name.
+
+        Returns:
+            bool: Whether the request is being profiled.
+        """
+        if not self.rate or (self.routes and route not in self.routes) or random.random() >= self.rate:
+            return False
+        if sys.getprofile() is not None:
+            return False  # Someone else (a debugger, cProfile) is already profiling this thread
+        tracer = _Stack_Tracer(f"route:{route}", self._labels)
+        self._local.tracer = tracer
+        sys.setprofile(tracer)
+        return True
+
+    def stop(self) -> None:
+        """
+        Stops profiling the current thread, if it is, and adds its stacks to the aggregate.
+        """
+        tracer = getattr(self._local, "tracer", None)
+        if tracer is None:
+            return
+        sys.setprofile(None)
+        self._local.tracer = None
+        tracer.finish()
+        with self._lock:
+            for stack, nanoseconds in tracer.stacks.items():
+                self._stacks[stack] = self._stacks.get(stack, 0) + nanoseconds
+            self.profiled += 1
+            flush = self.directory and self.profiled % self.flush_every == 0
+        if flush:
+            self.flush()
+
+    def collapsed(self, route: str = None) -> str:
+        """
+        Returns the aggregated profile in collapsed-stack format, in microseconds.
+
+        Args:
+            route (str, optional): Only include requests to this endpoint. Defaults to all.
+        """
+        prefix = f"route:{route};" if route else ""
+        with self._lock:
+            stacks = sorted(self._stacks.items())
+        return "".join(f"{stack} {nanoseconds // 1000}\n" for stack, nanoseconds in stacks
+                       if stack.startswith(prefix) and nanoseconds >= 1000)
+
+    def reset(self) -> None:
+        """
+        Discards the aggregated profile.
+        """
+        with self._lock:
+            self._stacks = {}
+            self.profiled = 0
+
+    def flush(self) -> Optional[str]:
+        """
+        Writes the aggregated profile to the configured directory.
+
+        Returns:
+            Optional[str]: The file written, or None if no directory is configured.
+        """
+        if not self.directory:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"profile-{os.getpid()}.folded")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.collapsed())
+        os.replace(tmp_path, path)
+        return path
+
+
+class _Stack_Tracer:
+    """
+    A sys.setprofile callback that charges the time between events to the
+    current call stack.
+    """
+    def __init__(self, root: str, labels: Dict[object, str]):
+        self.paths = [root]
+        self.stacks: Dict[str, int] = {}
+        self.labels = labels  # Shared cache of function labels, by code object
+        self.last = time.perf_counter_ns()
+
+    def __call__(self, frame, event, arg) -> None:
+        now = time.perf_counter_ns()
+        path = self.paths[-1]
+        self.stacks[path] = self.stacks.get(path, 0) + now - self.last
+        if event == "call":
+            code = frame.f_code
+            label = self.labels.get(code)
+            if label is None:
+                label = self.labels[code] = _label(frame.f_globals.get("__name__", "?"), code.co_qualname)
+            self.paths.append(path + ";" + label)
+        elif event == "c_call":
+            # Builtin methods are bound to a new object on every call, so their labels aren't cached
+            self.paths.append(path + ";" + _label(getattr(arg, "__module__", None) or "builtins", arg.__qualname__))
+        elif len(self.paths) > 1:
+            # A return from a frame entered before tracing started has nothing to pop
+            self.paths.pop()
+        self.last = time.perf_counter_ns()
+
+    def finish(self) -> None:
+        path = self.paths[-1]
+        self.stacks[path] = self.stacks.get(path, 0) + time.perf_counter_ns() - self.last
+
+
+def _label(module: str, name: str) -> str:
+    return f"{module}:{name}".replace(";", ":").replace(" ", "_")
+
+
+# The app's profiler, configured by server.py and adjusted on /admin/profile
+PROFILER = Request_Profiler()
+atexit.register(PROFILER.flush)
@@ -0,0 +1,203 @@
+# /models/ranges.py
+import itertools
+import math
+from typing import Optional, Sequence
+
+try:
+    import numpy
+except ImportError:  # Without NumPy there are no ranges; the bots play their hand alone
+    numpy = None
+
+from models import hand_ranks, tables
+
+# Opponent ranges: what a player may be holding, as a weight for each of the
+# 1,326 two-card combinations. A range starts uniform, and each action the
+# player takes multiplies the weights by how likely each combination was to
+# take it. Cards known to be elsewhere (the observer's own hole cards, the
+# board) remove the combinations holding them through precomputed masks, and
+# equity against a range is one NumPy pass over every (runout, combination).
+#
+# Cards are the integer codes of models/cards.py (suit * 13 + rank).
+TABLE_NAME = "ranges"
+COMBOS = 1326
+
+# Runouts are enumerated when there are at most this many (the turn), else sampled
+EXACT_RUNOUTS = 50
+RUNOUTS = 100
+
+# How likely a hand is to take an action, by its strength percentile p among the
+# hands still possible (1 is the best): floor + (1 - floor) * p ** power. Weak
+# hands call less than strong ones, and raises mostly come from the top.
+ACTION_LIKELIHOOD = {
+    "call": (0.4, 1),
+    "raise": (0.15, 3),
+}
+
+
+def available() -> bool:
+    """
+    Returns whether ranges can be used (NumPy is installed).
+    """
+    return numpy is not None
+
+
+def _chen_score(first: int, second: int) -> float:
+    """
+    The Chen formula's preflop score of two hole cards, unrounded.
+    """
+    high, low = max(first % 13, second % 13), min(first % 13, second % 13)
+    score = {12: 10, 11: 8, 10: 7, 9: 6}.get(high, (high + 2) / 2)
+    if high == low:
+        return max(score * 2, 5)
+    if first // 13 == second // 13:
+        score += 2
+    gap = high - low - 1
+    score -= (0, 1, 2, 4)[gap] if gap < 4 else 5
+    if gap <= 1 and high < 10:
+        score += 1
+    return score
+
+
+class Range_Tables:
+    """
+    The combinations and the masks shared by every range.
+    """
+
+    def __init__(self):
+        self.combos = numpy.array(list(itertools.combinations(range(52), 2)), dtype=numpy.int64)
+        # card_masks[card] marks the combinations holding the card
+        self.card_masks = numpy.zeros((52, COMBOS), dtype=bool)
+        self.card_masks[self.combos[:, 0], numpy.arange(COMBOS)] = True
+        self.card_masks[self.combos[:, 1], numpy.arange(COMBOS)] = True
+        # Preflop strength percentile of each combination, by Chen score
+        scores = numpy.array([_chen_score(first, second) for first, second in self.combos])
+        self.preflop = numpy.searchsorted(numpy.sort(scores), scores, side="right") / COMBOS
+
+    def dead_mask(self, cards: Sequence[int]):
+        """
+        Marks the combinations holding any of the cards.
+
+        Args:
+            cards (Sequence[int]): The dead cards.
+
+        Returns:
+            numpy.ndarray: A boolean mask over the combinations.
+        """
+        return self.card_masks[list(cards)].any(axis=0)
+
+
+if numpy is not None:
+    tables.register_table(TABLE_NAME, Range_Tables)
+
+
+class Player_Range:
+    """
+    The hands one player may hold, as seen by an observer.
+    """
+
+    def __init__(self, weights: Optional[Sequence[float]] = None):
+        """
+        Args:
+            weights (Sequence[float], optional): A weight per combination, in
+                itertools.combinations(range(52), 2) order. Defaults to uniform.
+
+        Raises:
+            ImportError: If NumPy isn't installed.
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for ranges.")
+        self.weights = numpy.ones(COMBOS) if weights is None else numpy.array(weights, dtype=float)
+
+    def live_weights(self, dead: Sequence[int]):
+        """
+        The weights with the combinations holding dead cards removed.
+
+        Args:
+            dead (Sequence[int]): Cards the player can't hold.
+
+        Returns:
+            numpy.ndarray: The weights.
+        """
+        return numpy.where(tables.get_table(TABLE_NAME).dead_mask(dead), 0.0, self.weights)
+
+    def strengths(self, board: Sequence[int], dead: Sequence[int] = ()):
+        """
+        Each combination's strength percentile among the combinations still
+        possible: by Chen score preflop, by made hand on the board after.
+
+        Args:
+            board (Sequence[int]): The revealed community cards.
+            dead (Sequence[int], optional): Other cards the player can't hold.
+
+        Returns:
+            numpy.ndarray: Percentiles from 0 to 1; dead combinations get 0.
+        """
+        range_tables = tables.get_table(TABLE_NAME)
+        live = ~range_tables.dead_mask(list(board) + list(dead))
+        if not board:
+            return numpy.where(live, range_tables.preflop, 0.0)
+        hands = numpy.concatenate([range_tables.combos[live], numpy.tile(board, (int(live.sum()), 1))], axis=1)
+        scores = tables.get_table(hand_ranks.TABLE_NAME).evaluate_many(hands)
+        percentiles = numpy.zeros(COMBOS)
+        percentiles[live] = numpy.searchsorted(numpy.sort(scores), scores, side="right") / len(scores)
+        return percentiles
+
+    def narrow(self, action: str, board: Sequence[int], dead: Sequence[int] = ()) -> None:
+        """
+        Updates the range with an action the player took.
+
+        Args:
+            action (str): "call" or "raise"; other actions say nothing.
+            board (Sequence[int]): The community cards when the player acted.
+            dead (Sequence[int], optional): Other cards the player can't hold.
+        """
+        if action not in ACTION_LIKELIHOOD:
+            return
+        floor, power = ACTION_LIKELIHOOD[action]
+        self.weights = self.weights * (floor + (1 - floor) * self.strengths(board, dead) ** power)
+
+    def equity(self, hole: Sequence[int], board: Sequence[int], samples: int = RUNOUTS) -> float:
+        """
+        Computes a hand's equity against the range, over the runouts of the board.
+
+        Args:
+            hole (Sequence[int]): The two hole cards played against the range.
+            board (Sequence[int]): The revealed community cards (0 to 5).
+            samples (int, optional): How many runouts to sample when there are
+                more than EXACT_RUNOUTS. Defaults to RUNOUTS.
+
+        Returns:
+            float: The equity, wins plus half the ties, weighted by the range.
+
+        Raises:
+            ValueError: If the cards are invalid or no hand in the range is possible.
+        """
+        hole, board = list(hole), list(board)
+        known = hole + board
+        if len(hole) != 2 or len(board) > 5 or len(set(known)) != len(known) or not all(0 <= card < 52 for card in known):
+            raise ValueError("Equity needs two distinct hole cards and up to five board cards.")
+        range_tables = tables.get_table(TABLE_NAME)
+        evaluator = tables.get_table(hand_ranks.TABLE_NAME)
+        weights = self.live_weights(known)
+        if not weights.any():
+            raise ValueError("No hand in the range is possible.")
+
+        unseen = numpy.array([card for card in range(52) if card not in known], dtype=numpy.int64)
+        missing = 5 - len(board)
+        if math.comb(len(unseen), missing) <= EXACT_RUNOUTS:
+            runouts = list(itertools.combinations(unseen, missing))
+            runouts = numpy.array(runouts, dtype=numpy.int64).reshape(len(runouts), missing)
+        else:
+            # Seeded by the cards, so the same spot always gets the same answer
+            rng = numpy.random.default_rng(known)
+            runouts = unseen[numpy.argsort(rng.random((samples, len(unseen))), axis=1)[:, :missing]]
+        boards = numpy.concatenate([numpy.tile(numpy.array(board, dtype=numpy.int64), (len(runouts), 1)), runouts], axis=1)
+        mine = evaluator.evaluate_many(numpy.concatenate([numpy.tile(hole, (len(boards), 1)), boards], axis=1))
+
+        # Every (runout, combination) pair where the combination is still possible
+        possible = (weights > 0) & ~range_tables.card_masks[runouts].any(axis=1)
+        runout_index, combo_index = numpy.nonzero(possible)
+        theirs = evaluator.evaluate_many(numpy.concatenate([range_tables.combos[combo_index], boards[runout_index]], axis=1))
+        results = (mine[runout_index] > theirs) + 0.5 * (mine[runout_index] == theirs)
+        pair_weights = weights[combo_index]
+        return float((pair_weights * results).sum() / pair_weights.sum())
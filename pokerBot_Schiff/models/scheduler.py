@@ -0,0 +1,217 @@
+# /models/scheduler.py
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from models.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# A cooperative scheduler for background tables (the bot-only showcase games).
+#
+# Every table is a step function that plays a little (one action) and returns
+# how long to wait before its next step. One thread runs the steps of all the
+# tables, in order of when they are due: a table that just stepped goes behind
+# every table already waiting, so when the thread falls behind the tables take
+# turns round-robin and none is starved. Waiting tables cost an entry in a heap,
+# not a thread, so thousands of them fit in a fraction of one core.
+#
+# A table can have an activity check (is anyone watching?). An inactive table
+# is paused: instead of stepping, it is checked again every idle_interval
+# seconds, which is a lookup rather than a hand of poker.
+
+# Step function: plays one step, returns the seconds until the next one (None to stop)
+Step = Callable[[], Optional[float]]
+
+STEPS = Counter("poker_scheduler_steps_total", "Background table steps, by result (played, paused or error).", ["result"])
+
+
+class Table_Scheduler:
+    """
+    Runs the steps of many background tables on one thread.
+    """
+
+    def __init__(self, idle_interval: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Initializes the scheduler.
+
+        Args:
+            idle_interval (float, optional): Seconds between checks of a paused
+                table. Defaults to 1.
+            clock (Callable[[], float], optional): The time source, in seconds.
+                Defaults to time.monotonic.
+        """
+        self.idle_interval = idle_interval
+        self.clock = clock
+        # Table ID -> [step, activity check, the number of its entry in the heap]
+        self._tables: Dict[Hashable, list] = {}
+        self._due: List[Tuple[float, int, Hashable]] = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.paused = set()
+        self.steps = 0
+        self.lag = 0.0  # How late the last step ran, in seconds
+        if hasattr(os, "register_at_fork"):
+            # The thread doesn't survive a fork; a forked worker runs its own.
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() and ref()._after_fork())
+
+    def _after_fork(self) -> None:
+        self._condition = threading.Condition()
+        self._thread = None
+        if self._running:
+            self._running = False
+            self.start()
+
+    def add(self, table_id: Hashable, step: Step, active: Callable[[], bool] = None, delay: float = 0.0) -> None:
+        """
+        Schedules a table, replacing any table with the same ID.
+
+        Args:
+            table_id (Hashable): The table's ID.
+            step (Step): Plays one step and returns the seconds until the next
+                one, or None when the table is done.
+            active (Callable[[], bool], optional): Whether the table should play
+                now; without it the table always plays.
+            delay (float, optional): Seconds until the first step. Defaults to 0.
+        """
+        with self._condition:
+            self._tables[table_id] = [step, active, None]
+            self._schedule(table_id, self.clock() + delay)
+            self._condition.notify()
+
+    def remove(self, table_id: Hashable) -> None:
+        """
+        Stops scheduling a table (its queued turn is skipped).
+
+        Args:
+            table_id (Hashable): The table's ID.
+        """
+        with self._condition:
+            self._tables.pop(table_id, None)
+            self.paused.discard(table_id)
+
+    def _schedule(self, table_id: Hashable, due: float) -> None:
+        entry = next(self._order)
+        self._tables[table_id][2] = entry
+        heapq.heappush(self._due, (due, entry, table_id))
+
+    def run_pending(self, limit: int = None) -> int:
+        """
+        Runs the steps that are due, earliest first.
+
+        Args:
+            limit (int, optional): The most steps to run. Defaults to all that are due.
+
+        Returns:
+            int: The number of tables stepped or checked.
+        """
+        ran = 0
+        while limit is None or ran < limit:
+            with self._condition:
+                now = self.clock()
+                if not self._due or self._due[0][0] > now:
+                    break
+                due, entry, table_id = heapq.heappop(self._due)
+                table = self._tables.get(table_id)
+                if table is None or table[2] != entry:
+                    continue  # Removed, or replaced and queued again
+                step, active, _ = table
+            ran += 1
+            self.lag = now - due
+            delay = self._step(table_id, step, active)
+            with self._condition:
+                if self._tables.get(table_id) is not table:
+                    continue
+                if delay is None:
+                    del self._tables[table_id]
+                else:
+                    self._schedule(table_id, self.clock() + delay)
+        return ran
+
+    def _step(self, table_id: Hashable, step: Step, active: Optional[Callable[[], bool]]) -> Optional[float]:
+        if active is not None and not active():
+            self.paused.add(table_id)
+            STEPS.inc("paused")
+            return self.idle_interval
+        self.paused.discard(table_id)
+        try:
+            delay = step()
+        except Exception:
+            # One broken table mustn't stop the others
+            logger.exception("Background table %s failed and was removed", table_id)
+            STEPS.inc("error")
+            return None
+        self.steps += 1
+        STEPS.inc("played")
+        return delay
+
+    def start(self) -> None:
+        """
+        Starts the scheduler thread, if it isn't running.
+        """
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="table-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        Stops the scheduler thread after the step it is running.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the thread. Defaults to waiting forever.
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while self._running:
+            # Run in small batches so add, remove and stop get a look in
+            self.run_pending(limit=100)
+            with self._condition:
+                if not self._running:
+                    break
+                wait = None if not self._due else self._due[0][0] - self.clock()
+                if wait is None or wait > 0:
+                    self._condition.wait(wait)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Reports on the scheduler.
+
+        Returns:
+            Dict[str, float]: tables, paused, steps (played so far) and lag
+                (how late the last step ran, in seconds).
+        """
+        with self._condition:
+            return {
+                "tables": len(self._tables),
+                "paused": len(self.paused),
+                "steps": self.steps,
+                "lag": self.lag,
+            }
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+
+SCHEDULER = Table_Scheduler()
+
+Gauge("poker_scheduler_tables", "Background tables on the scheduler.", function=lambda: len(SCHEDULER))
+Gauge("poker_scheduler_paused_tables", "Background tables paused with no one watching.",
+      function=lambda: len(SCHEDULER.paused))
+Gauge("poker_scheduler_lag_seconds", "How late the last background table step ran.", function=lambda: SCHEDULER.lag)
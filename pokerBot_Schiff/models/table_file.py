@@ -0,0 +1,308 @@
+# /models/table_file.py
+import argparse
+import importlib
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import zlib
+from typing import Any, Dict, List, Tuple
+
+try:
+    import numpy
+except ImportError:  # Tables are still readable through memoryviews
+    numpy = None
+
+# File layout (all integers little-endian):
+#
+#   header      magic "PKBTABLE", format version (u16), reserved (u16),
+#               directory length (u32), CRC-32 of the directory (u32)
+#   directory   UTF-8 JSON: {"name", "version", "metadata",
+#               "sections": {name: {"format", "shape", "offset", "nbytes", "crc32"}}}
+#   sections    raw little-endian arrays, each starting on a 64-byte boundary
+#
+# "format" is a struct format character, so a section maps straight onto a
+# memoryview (memoryview.cast) or a NumPy array without copying or parsing.
+MAGIC = b"PKBTABLE"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sHHII")
+_ALIGN = 64
+_FORMATS = {"b": "i1", "B": "u1", "h": "i2", "H": "u2", "i": "i4", "I": "u4",
+            "q": "i8", "Q": "u8", "f": "f4", "d": "f8"}
+
+# Table generators for the CLI: name -> "module:function". A generator returns
+# (sections, metadata, version) ready for write_table_file.
+GENERATORS = {
+    "hand_ranks": "models.hand_ranks:generate",
+}
+
+Section = Tuple[str, Tuple[int, ...], Any]
+
+
+class TableFormatError(ValueError):
+    """
+    Raised when a table file is truncated, corrupt or of an unknown version.
+    """
+
+
+def write_table_file(path: str, name: str, version: int, sections: Dict[str, Section], metadata: Dict = None) -> None:
+    """
+    Writes a table file atomically (to a temporary file renamed over the target).
+
+    Args:
+        path (str): The file to write.
+        name (str): The table's name.
+        version (int): The version of the table's content, checked by loaders.
+        sections (Dict[str, Section]): The arrays, by name, as (format, shape, data)
+            where format is a struct format character and data is a buffer
+            (bytes, array.array, NumPy array...) or a sequence of numbers.
+        metadata (Dict, optional): JSON-serializable information about the table.
+
+    Raises:
+        ValueError: If a format is unknown or data doesn't match its shape.
+    """
+    blobs = []
+    directory = {"name": name, "version": version, "metadata": metadata or {}, "sections": {}}
+    for section_name, (fmt, shape, data) in sections.items():
+        if fmt not in _FORMATS:
+            raise ValueError(f"Unknown section format '{fmt}'.")
+        count = math.prod(shape)
+        if isinstance(data, (list, tuple, range)):
+            blob = struct.pack(f"<{len(data)}{fmt}", *data)
+        else:
+            blob = bytes(memoryview(data).cast("B"))
+        if len(blob) != count * struct.calcsize(fmt):
+            raise ValueError(f"Section '{section_name}' holds {len(blob)} bytes, not {count} of '{fmt}'.")
+        blobs.append(blob)
+        directory["sections"][section_name] = {
+            "format": fmt, "shape": list(shape), "nbytes": len(blob), "crc32": zlib.crc32(blob),
+        }
+
+    # The sections start after the directory, whose length depends on their offsets
+    start = _aligned(_HEADER.size)
+    while True:
+        position = start
+        for entry, blob in zip(directory["sections"].values(), blobs):
+            entry["offset"] = position
+            position = _aligned(position + len(blob))
+        encoded = json.dumps(directory).encode()
+        if _aligned(_HEADER.size + len(encoded)) <= start:
+            break
+        start = _aligned(_HEADER.size + len(encoded))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(encoded), zlib.crc32(encoded)))
+        f.write(encoded)
+        for entry, blob in zip(directory["sections"].values(), blobs):
+            f.write(b"\0" * (entry["offset"] - f.tell()))
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _aligned(position: int) -> int:
+    return (position + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class Table_File:
+    """
+    A table file mapped into memory. Sections are exposed as zero-copy views of
+    the mapping, so opening a file costs a header parse however big the tables
+    are, and every process mapping the same file shares one page-cache copy.
+    """
+    def __init__(self, path: str, verify: bool = True):
+        """
+        Opens and maps a table file.
+
+        Args:
+            path (str): The file to open.
+            verify (bool, optional): Whether to check every section's CRC-32, which
+                reads the whole file. The directory is always checked. Defaults to True.
+
+        Raises:
+            TableFormatError: If the file is not a valid table file.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise TableFormatError(f"'{path}' is empty.")
+        self._views: List[memoryview] = []
+        try:
+            self._read_directory()
+            if verify:
+                self.verify()
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_directory(self) -> None:
+        if len(self._mmap) < _HEADER.size:
+            raise TableFormatError(f"'{self.path}' is truncated.")
+        magic, version, _, length, crc = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise TableFormatError(f"'{self.path}' is not a table file.")
+        if version != FORMAT_VERSION:
+            raise TableFormatError(f"'{self.path}' uses table format {version}; this code reads {FORMAT_VERSION}.")
+        encoded = self._mmap[_HEADER.size:_HEADER.size + length]
+        if len(encoded) != length or zlib.crc32(encoded) != crc:
+            raise TableFormatError(f"The directory of '{self.path}' is corrupt.")
+        directory = json.loads(encoded)
+        self.name: str = directory["name"]
+        self.version: int = directory["version"]
+        self.metadata: Dict = directory["metadata"]
+        self.sections: Dict[str, Dict] = directory["sections"]
+        for section_name, entry in self.sections.items():
+            if entry["offset"] + entry["nbytes"] > len(self._mmap):
+                raise TableFormatError(f"Section '{section_name}' of '{self.path}' is truncated.")
+
+    def verify(self) -> None:
+        """
+        Checks the CRC-32 of every section.
+
+        Raises:
+            TableFormatError: If a section doesn't match its checksum.
+        """
+        with memoryview(self._mmap) as data:
+            for section_name, entry in self.sections.items():
+                if zlib.crc32(data[entry["offset"]:entry["offset"] + entry["nbytes"]]) != entry["crc32"]:
+                    raise TableFormatError(f"Section '{section_name}' of '{self.path}' is corrupt.")
+
+    def view(self, section_name: str) -> memoryview:
+        """
+        Returns a section as a read-only memoryview of the mapping, shaped and
+        typed as written.
+
+        Args:
+            section_name (str): The section's name.
+
+        Returns:
+            memoryview: The section. Indexing it returns Python numbers.
+
+        Raises:
+            KeyError: If there is no such section.
+        """
+        entry = self.sections[section_name]
+        if sys.byteorder != "little" and struct.calcsize(entry["format"]) > 1:
+            raise TableFormatError("Table sections are little-endian; use array() on this platform.")
+        start = entry["offset"]
+        with memoryview(self._mmap) as data:
+            view = data[start:start + entry["nbytes"]].cast(entry["format"], entry["shape"])
+        self._views.append(view)
+        return view
+
+    def array(self, section_name: str):
+        """
+        Returns a section as a read-only NumPy array over the mapping.
+
+        Args:
+            section_name (str): The section's name.
+
+        Returns:
+            numpy.ndarray: The section.
+
+        Raises:
+            KeyError: If there is no such section.
+            ImportError: If NumPy isn't installed.
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for array(); use view() instead.")
+        entry = self.sections[section_name]
+        return numpy.frombuffer(
+            self._mmap, dtype="<" + _FORMATS[entry["format"]],
+            count=math.prod(entry["shape"]), offset=entry["offset"],
+        ).reshape(entry["shape"])
+
+    def close(self) -> None:
+        """
+        Releases the views handed out by view() and unmaps the file. NumPy arrays
+        keep the mapping alive until they are garbage collected.
+        """
+        for view in self._views:
+            view.release()
+        self._views = []
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> "Table_File":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_table_file(path: str, name: str, version: int, verify: bool = True) -> Table_File:
+    """
+    Opens a table file, checking that it holds the expected table and version.
+
+    Args:
+        path (str): The file to open.
+        name (str): The expected table name.
+        version (int): The expected content version.
+        verify (bool, optional): Whether to check the sections' checksums. Defaults to True.
+
+    Returns:
+        Table_File: The mapped file.
+
+    Raises:
+        TableFormatError: If the file is invalid, or holds another table or version.
+    """
+    table_file = Table_File(path, verify=verify)
+    if (table_file.name, table_file.version) != (name, version):
+        table_file.close()
+        raise TableFormatError(
+            f"'{path}' holds {table_file.name} v{table_file.version}, not {name} v{version}; regenerate it."
+        )
+    return table_file
+
+
+def generate(generator_name: str, path: str) -> None:
+    """
+    Runs a registered generator and writes its table.
+
+    Args:
+        generator_name (str): A key of GENERATORS.
+        path (str): The file to write.
+    """
+    module_name, function_name = GENERATORS[generator_name].split(":")
+    generator = getattr(importlib.import_module(module_name), function_name)
+    sections, metadata, version = generator()
+    write_table_file(path, generator_name, version, sections, metadata)
+
+
+if __name__ == "__main__":
+    # Usage: python -m models.table_file generate hand_ranks data/tables/hand_ranks.tbl
+    #        python -m models.table_file info data/tables/hand_ranks.tbl
+    #        python -m models.table_file verify data/tables/hand_ranks.tbl
+    parser = argparse.ArgumentParser(description="Generate and inspect binary lookup table files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate_command = commands.add_parser("generate", help="build a table and write it to a file")
+    generate_command.add_argument("table", choices=sorted(GENERATORS), help="the table to build")
+    generate_command.add_argument("path", help="the file to write")
+    info_command = commands.add_parser("info", help="show a table file's directory")
+    info_command.add_argument("path")
+    verify_command = commands.add_parser("verify", help="check a table file's checksums")
+    verify_command.add_argument("path")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "generate":
+            os.makedirs(os.path.dirname(os.path.abspath(args.path)), exist_ok=True)
+            generate(args.table, args.path)
+            print(f"Wrote {args.table} to {args.path} ({os.path.getsize(args.path)} bytes)")
+        else:
+            with Table_File(args.path, verify=args.command == "verify") as table_file:
+                if args.command == "verify":
+                    print(f"{args.path}: {table_file.name} v{table_file.version}, {len(table_file.sections)} sections OK")
+                else:
+                    print(json.dumps({"name": table_file.name, "version": table_file.version,
+                                      "metadata": table_file.metadata, "sections": table_file.sections}, indent=4))
+    except TableFormatError as e:
+        sys.exit(str(e))
@@ -0,0 +1,68 @@
+# /models/tables.py
+import threading
+import time
+from typing import Any, Callable, Dict
+
+# Large read-only lookup tables (hand evaluation, equities, bot policies) are
+# registered here by the modules that use them and built on first use. The
+# pre-fork launcher builds them all in the master process, so the workers share
+# the pages copy-on-write instead of each building a private copy.
+_builders: Dict[str, Callable[[], Any]] = {}
+_tables: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def register_table(name: str, builder: Callable[[], Any]) -> None:
+    """
+    Registers a read-only table.
+
+    Args:
+        name (str): The table's name.
+        builder (Callable[[], Any]): Builds (or loads) the table. It is called at
+            most once per process.
+
+    Raises:
+        ValueError: If another builder is already registered under the name.
+    """
+    with _lock:
+        if _builders.get(name, builder) is not builder:
+            raise ValueError(f"A table named '{name}' is already registered.")
+        _builders[name] = builder
+
+
+def get_table(name: str) -> Any:
+    """
+    Returns a table, building it on first use.
+
+    Args:
+        name (str): The table's name.
+
+    Returns:
+        Any: The table.
+
+    Raises:
+        KeyError: If no table is registered under the name.
+    """
+    table = _tables.get(name)
+    if table is None:
+        with _lock:
+            table = _tables.get(name)
+            if table is None:
+                table = _tables[name] = _builders[name]()
+    return table
+
+
+def build_all() -> Dict[str, float]:
+    """
+    Builds every registered table that hasn't been built yet.
+
+    Returns:
+        Dict[str, float]: The seconds each newly built table took, by name.
+    """
+    timings = {}
+    for name in list(_builders):
+        if name not in _tables:
+            start = time.perf_counter()
+            get_table(name)
+            timings[name] = time.perf_counter() - start
+    return timings
@@ -1,13 +1,23 @@
 # /models/User_Model.py
-import json
+import contextlib
+import itertools
 import os
-from typing import Dict, List, Union
+from typing import Dict, Iterator, List, Union
+
+from models.metrics import Gauge, SUBSYSTEM_SECONDS
+from models.passwords import Password_Hasher
+from models.user_storage import BACKENDS, RESULT_FIELDS, User_Storage, backend_for, iter_user_file
+
+# Seat names the game gives its own players (the bot, and the challenger at the
+# bot-only showcase tables), which no account may take
+RESERVED_USERNAMES = frozenset({"bot", "challenger"})
 
 class User:
     """
     Represents a user in the PokerBot system.
     """
-    def __init__(self, id: int, username: str, email: str, password: str):
+    def __init__(self, id: int, username: str, email: str, password: str,
+                 bankroll: int = RESULT_FIELDS["bankroll"], hands_played: int = 0, hands_won: int = 0):
         """
         Initializes a User object.
 
@@ -16,11 +26,17 @@ class User:
             username (str): The username of the user.
             email (str): The email address of the user.
             password (str): The password of the user.
+            bankroll (int, optional): The user's chips across all their games. Defaults to 1000.
+            hands_played (int, optional): The hands the user has finished. Defaults to 0.
+            hands_won (int, optional): The hands the user has finished with more chips. Defaults to 0.
         """
         self.id = id
         self.username = username
         self.email = email
         self.password = password
+        self.bankroll = bankroll
+        self.hands_played = hands_played
+        self.hands_won = hands_won
 
     def to_dict(self) -> Dict[str, Union[int, str]]:
         """
@@ -34,6 +50,9 @@ class User:
             "username": self.username,
             "email": self.email,
             "password": self.password,
+            "bankroll": self.bankroll,
+            "hands_played": self.hands_played,
+            "hands_won": self.hands_won,
         }
 
     @classmethod
@@ -52,30 +71,48 @@ class User:
             username=data["username"],
             email=data["email"],
             password=data["password"],
+            **{field: data.get(field, default) for field, default in RESULT_FIELDS.items()},
         )
 
 class User_Model:
     """
     Manages user data, providing methods for CRUD operations.
+
+    The records live in a pluggable storage backend (see models/user_storage.py)
+    selected by initialize_DB. Passwords are stored as scrypt hashes computed
+    on the worker pool of _hasher (see models/passwords.py).
     """
     _DB_NAME = "users.json"  # Default database name
     _DATA_DIR = "data" # Directory where JSON files are stored.
+    _BACKEND = "json" # Name of the storage backend in use.
+    _storage: User_Storage = None
+    _hasher = Password_Hasher()
 
     @classmethod
-    def initialize_DB(cls, db_name: str = None) -> None:
+    def initialize_DB(cls, db_name: str = None, backend: str = None) -> None:
         """
-        Initializes the database (creates the JSON file if it doesn't exist).
+        Initializes the database (creates the storage file if it doesn't exist).
 
         Args:
             db_name (str, optional): The name of the database file. Defaults to None.
+            backend (str, optional): The storage backend, "json" or "sqlite". Defaults
+                to a guess based on the extension of the database file.
+
+        Raises:
+            ValueError: If the backend is unknown.
         """
         if db_name:
             cls._DB_NAME = db_name
+        elif backend == "sqlite" and backend_for(cls._DB_NAME) != "sqlite":
+            cls._DB_NAME = "users.db"
+        backend = backend or backend_for(cls._DB_NAME)
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown storage backend '{backend}'.")
         if not os.path.exists(cls._DATA_DIR):
             os.makedirs(cls._DATA_DIR) #create data directory
-        if not os.path.exists(os.path.join(cls._DATA_DIR, cls._DB_NAME)):
-            with open(os.path.join(cls._DATA_DIR, cls._DB_NAME), "w") as f:
-                json.dump([], f)
+        cls._BACKEND = backend
+        cls._storage = BACKENDS[backend](cls._get_db_path())
+        cls._storage.initialize()
 
     @classmethod
     def _get_db_path(cls) -> str:
@@ -83,38 +120,54 @@ class User_Model:
         Helper method to get the full path to the database file.
         """
         return os.path.join(cls._DATA_DIR, cls._DB_NAME)
+
+    @classmethod
+    def _get_storage(cls) -> User_Storage:
+        """
+        Helper method to get the storage backend, defaulting to the JSON file.
+        """
+        if cls._storage is None:
+            cls._storage = BACKENDS[cls._BACKEND](cls._get_db_path())
+        return cls._storage
     
+    @classmethod
+    @contextlib.contextmanager
+    def transaction(cls) -> Iterator[None]:
+        """
+        Runs several operations as one unit of work: the store is read once, the
+        changes are committed with a single write when the block ends, and
+        nothing is kept if it raises.
+
+        Example:
+            with User_Model.transaction():
+                if not User_Model.exists(username="new_user"):
+                    User_Model.create({...})
+        """
+        with cls._get_storage().transaction():
+            yield
+
     @classmethod
     def _load_users(cls) -> List[Dict[str, Union[int, str]]]:
         """
-        Loads user data from the JSON file.
+        Loads user data from the storage backend.
 
         Returns:
             List[Dict[str, Union[int, str]]]: A list of user dictionaries.
         """
-        try:
-            with open(cls._get_db_path(), "r") as f:
-                users_data = json.load(f)
-            return users_data
-        except FileNotFoundError:
-            # Handle the case where the file doesn't exist (e.g., during initialization)
-            return []
-        except json.JSONDecodeError:
-            # Handle the case where the file is empty or corrupted
-            return []
+        return cls._get_storage().load_all()
 
     @classmethod
     def _save_users(cls, users_data: List[Dict[str, Union[int, str]]]) -> None:
         """
-        Saves user data to the JSON file.
+        Saves user data to the storage backend.
 
         Args:
             users_data (List[Dict[str, Union[int, str]]]): A list of user dictionaries.
         """
-        with open(cls._get_db_path(), "w") as f:
-            json.dump(users_data, f, indent=4)
+        cls._get_storage().replace_all(users_data)
 
     @classmethod
+    @SUBSYSTEM_SECONDS.time("user_model", "exists")
     def exists(cls, username: str = None, id: int = None) -> bool:
         """
         Checks if a user exists by username or ID.
@@ -129,43 +182,167 @@ class User_Model:
         if username is None and id is None:
             raise ValueError("Either username or id must be provided.")
 
-        users_data = cls._load_users()
-        for user_data in users_data:
-            if username is not None and user_data["username"] == username:
-                return True
-            if id is not None and user_data["id"] == id:
-                return True
-        return False
+        return cls._get_storage().find(username=username, id=id) is not None
 
     @classmethod
+    @SUBSYSTEM_SECONDS.time("user_model", "create")
     def create(cls, user_info: Dict[str, str]) -> User:
         """
         Creates a new user.
 
         Args:
             user_info (Dict[str, str]): A dictionary containing user information
-                (username, email, password).
+                (username, email, and either password or a password_hash made by
+                hash_password).
 
         Returns:
             User: The newly created User object.
 
         Raises:
-            ValueError: If the username already exists.
+            ValueError: If the username already exists or is reserved.
+        """
+        user_data = cls._new_user_data(user_info)
+        if "password_hash" not in user_info:
+            user_data["password"] = cls._hasher.hash(user_data["password"])
+        return User.from_dict(cls._get_storage().insert(user_data))
+
+    @classmethod
+    def _new_user_data(cls, user_info: Dict[str, str]) -> Dict[str, str]:
         """
-        if "username" not in user_info or "email" not in user_info or "password" not in user_info:
+        Helper method to validate the information for a new user. The password
+        is not hashed here.
+
+        Raises:
+            ValueError: If the username, email or password is missing, or the
+                username is reserved.
+        """
+        if "username" not in user_info or "email" not in user_info or (
+                "password" not in user_info and "password_hash" not in user_info):
             raise ValueError("username, email, and password are required.")
+        if user_info["username"].lower() in RESERVED_USERNAMES:
+            raise ValueError(f"The username {user_info['username']} is reserved.")
 
-        if cls.exists(username=user_info["username"]):
-            raise ValueError(f"User with username '{user_info['username']}' already exists.")
+        return {
+            "username": user_info["username"],
+            "email": user_info["email"],
+            "password": user_info.get("password_hash", user_info.get("password")),
+        }
 
-        users_data = cls._load_users()
-        next_id = 1 if not users_data else max(user["id"] for user in users_data) + 1
-        new_user = User(id=next_id, **user_info)
-        users_data.append(new_user.to_dict())
-        cls._save_users(users_data)
-        return new_user
+    @classmethod
+    def hash_password(cls, password: str) -> str:
+        """
+        Hashes a password on the worker pool. Callers that write inside a
+        transaction hash first and pass the result as password_hash, so the
+        store isn't locked while the KDF runs.
+
+        Args:
+            password (str): The plaintext password.
+
+        Returns:
+            str: The encoded hash.
+
+        Raises:
+            HasherBusyError: If the hashing queue is full.
+        """
+        return cls._hasher.hash(password)
+
+    @classmethod
+    @SUBSYSTEM_SECONDS.time("user_model", "authenticate")
+    def authenticate(cls, username: str, password: str) -> Union[User, None]:
+        """
+        Checks a username and password. A password stored in plaintext or hashed
+        with outdated parameters is rehashed with the current ones.
+
+        Args:
+            username (str): The username to check.
+            password (str): The plaintext password to check.
+
+        Returns:
+            Union[User, None]: The User object if the credentials are valid, None otherwise.
+
+        Raises:
+            HasherBusyError: If the hashing queue is full.
+        """
+        user_data = cls._get_storage().find(username=username)
+        if not cls._hasher.verify(password, user_data["password"] if user_data else None):
+            return None
+        if cls._hasher.needs_rehash(user_data["password"]):
+            return cls.update({"id": user_data["id"], "password": password})
+        return User.from_dict(user_data)
+
+    @classmethod
+    @SUBSYSTEM_SECONDS.time("user_model", "create_many")
+    def create_many(cls, users_info: List[Dict[str, str]], skip_existing: bool = False) -> List[User]:
+        """
+        Creates a batch of users with a single write. The batch is validated as a
+        whole: unless skip_existing is set, one taken username rejects all of it.
+        Usernames are checked before any password is hashed, so rejected and
+        skipped users cost a lookup rather than a key derivation.
+
+        Args:
+            users_info (List[Dict[str, str]]): A list of dictionaries containing user
+                information (username, email, and password or password_hash). The
+                passwords are hashed in parallel.
+            skip_existing (bool, optional): Skip users whose username already exists
+                instead of raising. Defaults to False.
+
+        Returns:
+            List[User]: The newly created User objects.
+
+        Raises:
+            ValueError: If a required field is missing or a username already exists.
+        """
+        users_data = [cls._new_user_data(user_info) for user_info in users_info]
+        existing = cls._get_storage().find_many(usernames=[user_data["username"] for user_data in users_data])
+        taken = {user_data["username"] for user_data in existing if user_data}
+        new_users = []
+        for user_data, user_info in zip(users_data, users_info):
+            if user_data["username"] in taken:
+                if not skip_existing:
+                    raise ValueError(f"User with username '{user_data['username']}' already exists.")
+                continue
+            taken.add(user_data["username"])
+            new_users.append((user_data, user_info))
+        users_data = [user_data for user_data, _ in new_users]
+        plaintext = [user_data for user_data, user_info in new_users if "password_hash" not in user_info]
+        for user_data, password_hash in zip(plaintext, cls._hasher.hash_many([user_data["password"] for user_data in plaintext])):
+            user_data["password"] = password_hash
+        # Checked again as they are written, in case another process took a username meanwhile
+        created = cls._get_storage().insert_many(users_data, skip_existing=skip_existing)
+        return [User.from_dict(user_data) for user_data in created]
+
+    @classmethod
+    def import_users(cls, path: str, file_format: str = None, batch_size: int = 1000,
+                     skip_existing: bool = False) -> int:
+        """
+        Streams users from a CSV or JSON Lines file into the database, one batch at
+        a time, so memory use is bounded by the batch size rather than the file size.
+
+        Args:
+            path (str): The path of the file to import.
+            file_format (str, optional): "csv" or "jsonl". Defaults to a guess based on
+                the file extension.
+            batch_size (int, optional): The number of users written per batch. Defaults to 1000.
+            skip_existing (bool, optional): Skip users whose username already exists
+                instead of raising. Defaults to False.
+
+        Returns:
+            int: The number of imported users.
+
+        Raises:
+            ValueError: If a record is invalid, or a username exists and skip_existing
+                is False. Batches written before the failing one are kept.
+        """
+        records = iter_user_file(path, file_format)
+        count = 0
+        while True:
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                return count
+            count += len(cls.create_many(batch, skip_existing=skip_existing))
 
     @classmethod
+    @SUBSYSTEM_SECONDS.time("user_model", "get")
     def get(cls, username: str = None, id: int = None) -> Union[User, None]:
         """
         Retrieves a user by username or ID.
@@ -183,15 +360,34 @@ class User_Model:
         if username is None and id is None:
             raise ValueError("Either username or id must be provided.")
 
-        users_data = cls._load_users()
-        for user_data in users_data:
-            if username is not None and user_data["username"] == username:
-                return User.from_dict(user_data)
-            if id is not None and user_data["id"] == id:
-                return User.from_dict(user_data)
-        return None
+        user_data = cls._get_storage().find(username=username, id=id)
+        return User.from_dict(user_data) if user_data else None
 
     @classmethod
+    @SUBSYSTEM_SECONDS.time("user_model", "get_many")
+    def get_many(cls, usernames: List[str] = None, ids: List[int] = None) -> List[Union[User, None]]:
+        """
+        Retrieves a batch of users by username or by ID in a single lookup.
+
+        Args:
+            usernames (List[str], optional): The usernames to search for. Defaults to None.
+            ids (List[int], optional): The IDs to search for. Defaults to None.
+
+        Returns:
+            List[Union[User, None]]: One entry per requested key, in the same order,
+                None where the user does not exist.
+
+        Raises:
+            ValueError: If neither usernames nor ids is provided.
+        """
+        if usernames is None and ids is None:
+            raise ValueError("Either usernames or ids must be provided.")
+
+        users_data = cls._get_storage().find_many(usernames=usernames, ids=ids)
+        return [User.from_dict(user_data) if user_data else None for user_data in users_data]
+
+    @classmethod
+    @SUBSYSTEM_SECONDS.time("user_model", "get_all")
     def get_all(cls) -> List[User]:
         """
         Retrieves all users.
@@ -203,12 +399,14 @@ class User_Model:
         return [User.from_dict(user_data) for user_data in users_data]
 
     @classmethod
+    @SUBSYSTEM_SECONDS.time("user_model", "update")
     def update(cls, user_info: Dict[str, str]) -> User:
         """
         Updates an existing user.
 
         Args:
             user_info (Dict[str, str]): A dictionary containing the updated user information, including the user's id.
+                A new password may be given in plaintext (password) or prehashed (password_hash).
 
         Returns:
             User: The updated User object.
@@ -220,25 +418,59 @@ class User_Model:
             raise ValueError("User ID is required for updating.")
 
         user_id = user_info["id"]
-        if not cls.exists(id=user_id):
+        user_data = cls._get_storage().find(id=user_id)
+        if user_data is None:
             raise ValueError(f"User with ID '{user_id}' not found.")
 
-        users_data = cls._load_users()
-        for i, user_data in enumerate(users_data):
-            if user_data["id"] == user_id:
-                # Preserve the original ID.
-                updated_user_data = {
-                    "id": user_id,
-                    "username": user_info.get("username", user_data["username"]), # Default to current value if not provided
-                    "email": user_info.get("email", user_data["email"]),
-                    "password": user_info.get("password", user_data["password"]),
-                }
-                users_data[i] = updated_user_data
-                cls._save_users(users_data)
-                return User.from_dict(updated_user_data)
-        raise ValueError(f"User with ID '{user_id}' not found.") # added in case the loop finishes without finding the user.
+        if "password_hash" in user_info:
+            password = user_info["password_hash"]
+        elif "password" in user_info:
+            password = cls._hasher.hash(user_info["password"])
+        else:
+            password = user_data["password"]
+
+        # Preserve the original ID and the results.
+        updated_user_data = {
+            **user_data,
+            "id": user_id,
+            "username": user_info.get("username", user_data["username"]), # Default to current value if not provided
+            "email": user_info.get("email", user_data["email"]),
+            "password": password,
+        }
+        cls._get_storage().update(updated_user_data)
+        return User.from_dict(updated_user_data)
 
     @classmethod
+    @SUBSYSTEM_SECONDS.time("user_model", "record_result")
+    def record_result(cls, username: str, chips: int) -> Union[User, None]:
+        """
+        Records a finished hand on a user's record: their bankroll moves by the
+        chips they won or lost (never below zero: games opened at the same time
+        all start from the same bankroll), and the hand counts as played (and
+        as won if they came out ahead).
+
+        Args:
+            username (str): The player.
+            chips (int): The chips the player won (negative if they lost).
+
+        Returns:
+            Union[User, None]: The updated User object, or None if there is no such user.
+        """
+        if cls._get_storage().find(username=username) is None:
+            return None  # Checked before locking the store: bots and guests have no record
+        with cls.transaction():
+            user_data = cls._get_storage().find(username=username)
+            if user_data is None:
+                return None
+            user_data = {**RESULT_FIELDS, **user_data}
+            user_data["bankroll"] = max(0, user_data["bankroll"] + chips)
+            user_data["hands_played"] += 1
+            user_data["hands_won"] += chips > 0
+            cls._get_storage().update(user_data)
+        return User.from_dict(user_data)
+
+    @classmethod
+    @SUBSYSTEM_SECONDS.time("user_model", "remove")
     def remove(cls, username: str) -> None:
         """
         Removes a user by username.
@@ -249,13 +481,11 @@ class User_Model:
         Raises:
             ValueError: If the user does not exist.
         """
-        if not cls.exists(username=username):
-            raise ValueError(f"User with username '{username}' not found.")
+        cls._get_storage().delete(username)
 
-        users_data = cls._load_users()
-        for i, user_data in enumerate(users_data):
-            if user_data["username"] == username:
-                del users_data[i]
-                cls._save_users(users_data)
-                return
-        raise ValueError(f"User with username '{username}' not found.")
+
+# Password hashing pool load, read on every scrape
+Gauge("poker_password_jobs_queued", "Password hashes waiting for a worker.",
+      function=lambda: User_Model._hasher.metrics()["queued"])
+Gauge("poker_password_jobs_running", "Password hashes being computed.",
+      function=lambda: User_Model._hasher.metrics()["running"])
@@ -0,0 +1,793 @@
+# /models/user_storage.py
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sqlite3
+import threading
+import weakref
+from typing import ContextManager, Dict, Iterator, List, Optional, Union
+
+from models.metrics import CACHE_LOOKUPS
+from models import serialization
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+UserRecord = Dict[str, Union[int, str]]
+
+# Results kept on every user record, and their values for a new user (or a
+# record written before they existed)
+RESULT_FIELDS = {"bankroll": 1000, "hands_played": 0, "hands_won": 0}
+
+
+class User_Storage:
+    """
+    Base class for the storage backends used by User_Model.
+
+    A backend only deals with plain user dictionaries; validation and the
+    conversion to User objects stay in User_Model.
+    """
+    def __init__(self, path: str):
+        """
+        Initializes the backend.
+
+        Args:
+            path (str): The path of the file holding the users.
+        """
+        self.path = path
+        if hasattr(os, "register_at_fork"):
+            # Forked workers (see launcher.py) must not share locks or connections with their parent.
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() and ref()._after_fork())
+
+    def _after_fork(self) -> None:
+        """
+        Drops per-process resources inherited from the parent process.
+        """
+
+    def initialize(self) -> None:
+        """
+        Creates the underlying file if it doesn't exist.
+        """
+        raise NotImplementedError
+
+    def load_all(self) -> List[UserRecord]:
+        """
+        Loads every stored user.
+
+        Returns:
+            List[UserRecord]: A list of user dictionaries ordered by ID.
+        """
+        raise NotImplementedError
+
+    def replace_all(self, users_data: List[UserRecord]) -> None:
+        """
+        Replaces the stored users with the given list.
+
+        Args:
+            users_data (List[UserRecord]): A list of user dictionaries.
+        """
+        raise NotImplementedError
+
+    def find(self, username: str = None, id: int = None) -> Optional[UserRecord]:
+        """
+        Finds the first user matching the username or the ID.
+
+        Args:
+            username (str, optional): The username to search for. Defaults to None.
+            id (int, optional): The ID to search for. Defaults to None.
+
+        Returns:
+            Optional[UserRecord]: The user dictionary if found, None otherwise.
+        """
+        raise NotImplementedError
+
+    def insert(self, user_data: UserRecord) -> UserRecord:
+        """
+        Stores a new user, allocating its ID.
+
+        Args:
+            user_data (UserRecord): The user dictionary without an ID.
+
+        Returns:
+            UserRecord: The stored user dictionary, including its ID.
+
+        Raises:
+            ValueError: If the username already exists.
+        """
+        raise NotImplementedError
+
+    def insert_many(self, users_data: List[UserRecord], skip_existing: bool = False) -> List[UserRecord]:
+        """
+        Stores a batch of new users in one write, allocating their IDs.
+
+        Args:
+            users_data (List[UserRecord]): The user dictionaries without IDs.
+            skip_existing (bool, optional): Drop users whose username is taken instead
+                of rejecting the batch. Defaults to False.
+
+        Returns:
+            List[UserRecord]: The stored user dictionaries, including their IDs.
+
+        Raises:
+            ValueError: If a username is taken and skip_existing is False. Nothing is
+                stored in that case.
+        """
+        raise NotImplementedError
+
+    def find_many(self, usernames: List[str] = None, ids: List[int] = None) -> List[Optional[UserRecord]]:
+        """
+        Finds a batch of users by username or by ID.
+
+        Args:
+            usernames (List[str], optional): The usernames to search for. Defaults to None.
+            ids (List[int], optional): The IDs to search for. Defaults to None.
+
+        Returns:
+            List[Optional[UserRecord]]: One entry per requested key, in the same order,
+                None where no user matches.
+        """
+        raise NotImplementedError
+
+    def update(self, user_data: UserRecord) -> None:
+        """
+        Overwrites the user with the same ID.
+
+        Args:
+            user_data (UserRecord): The complete user dictionary.
+
+        Raises:
+            ValueError: If the user does not exist or the new username is taken.
+        """
+        raise NotImplementedError
+
+    def delete(self, username: str) -> None:
+        """
+        Deletes a user by username.
+
+        Args:
+            username (str): The username of the user to delete.
+
+        Raises:
+            ValueError: If the user does not exist.
+        """
+        raise NotImplementedError
+
+    def transaction(self) -> ContextManager[None]:
+        """
+        Groups the operations made inside the with block into a unit of work that
+        reads the store once and commits once. Other writers are locked out until
+        the block ends; if it raises, none of its changes are kept. Nested
+        transactions join the outer one.
+        """
+        raise NotImplementedError
+
+
+class JSON_User_Storage(User_Storage):
+    """
+    Stores the users in a JSON snapshot file plus an append-only change log.
+
+    Every write appends one create/update/remove record to "<path>.log"
+    instead of rewriting the snapshot. After _COMPACT_EVERY records the log is
+    folded into a new snapshot, which is written to a temporary file and
+    atomically renamed over the old one. The log header records which snapshot
+    it belongs to, so a log left behind by a crash after the rename, or by
+    someone replacing the snapshot by hand, is ignored. A lock file serializes
+    writers across processes, and readers only apply the part of the log they
+    haven't seen yet.
+
+    The next user ID is kept in memory and persisted in the log header and
+    the create records, so allocating one is O(1) and IDs are never reused.
+    """
+    _COMPACT_EVERY = 1000  # Log records before the log is folded into the snapshot.
+    _FSYNC = True  # Flush every log append to disk.
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.log_path = path + ".log"
+        self.lock_path = path + ".lock"
+        self._mutex = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        self._pending = None  # Records of the open transaction, if any.
+        self._snapshot_stamp = None
+        self._log_offset = 0  # Bytes of the log already applied.
+        self._log_valid = False  # Whether the log header matches the snapshot.
+        self._log_records = 0
+        self._users: Dict[int, UserRecord] = {}
+        self._ids: Dict[str, int] = {}
+        self._next_id = 1
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool):
+        """
+        Holds the in-process mutex and the inter-process file lock.
+        """
+        with self._mutex:
+            if self._lock_depth:
+                # Already held by this thread, e.g. inside a transaction.
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            if self._lock_file is None:
+                self._lock_file = open(self.lock_path, "a+")
+            fd = self._lock_file.fileno()
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            else:
+                self._lock_file.seek(0)
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            self._lock_depth = 1
+            try:
+                yield
+            finally:
+                self._lock_depth = 0
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    self._lock_file.seek(0)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    def _after_fork(self) -> None:
+        # An inherited lock file shares its flock with the parent and every sibling.
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self._mutex = threading.RLock()
+        self._lock_depth = 0
+
+    def _stamp(self) -> Optional[List[int]]:
+        """
+        Returns a fingerprint of the snapshot file, or None if it is missing.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    def _apply(self, record: Dict) -> None:
+        """
+        Applies one change log record to the in-memory state.
+        """
+        if record["op"] == "remove":
+            user_id = self._ids.pop(record["username"], None)
+            self._users.pop(user_id, None)
+            return
+        user_data = record["user"]
+        self._next_id = max(self._next_id, user_data["id"] + 1)
+        previous = self._users.get(user_data["id"])
+        if previous is not None:
+            self._ids.pop(previous["username"], None)
+        self._users[user_data["id"]] = user_data
+        self._ids[user_data["username"]] = user_data["id"]
+
+    def _refresh(self) -> None:
+        """
+        Brings the in-memory state up to date with the snapshot and the log.
+        """
+        if self._pending is not None:
+            return  # The open transaction holds the lock, so nothing can have changed.
+        stamp = self._stamp()
+        fresh = stamp == self._snapshot_stamp
+        if not fresh:
+            try:
+                with open(self.path, "rb") as f:
+                    users_data = serialization.loads(f.read())
+            except (FileNotFoundError, ValueError):
+                # Handle the case where the file is missing, empty or corrupted
+                users_data = []
+            self._users = {user_data["id"]: user_data for user_data in users_data}
+            self._ids = {user_data["username"]: user_data["id"] for user_data in users_data}
+            self._next_id = max(self._users, default=0) + 1
+            self._snapshot_stamp = stamp
+            self._log_offset = 0
+            self._log_valid = False
+            self._log_records = 0
+
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(self._log_offset)
+                data = f.read()
+        except FileNotFoundError:
+            if self._log_offset:
+                # The log vanished under us; start again from the snapshot.
+                self._snapshot_stamp = None
+                self._refresh()
+            else:
+                CACHE_LOOKUPS.inc("user_store", "hit" if fresh else "miss")
+            return
+        # A hit when the in-memory copy was already current
+        CACHE_LOOKUPS.inc("user_store", "hit" if fresh and not data else "miss")
+
+        # Only complete lines are applied; a torn last line is left for the next writer to truncate.
+        for line in data.split(b"\n")[:-1]:
+            try:
+                record = serialization.loads(line)
+            except ValueError:
+                break
+            if self._log_offset == 0:
+                self._log_valid = record.get("snapshot") == stamp
+                if self._log_valid:
+                    self._next_id = max(self._next_id, record.get("next_id", 1))
+            elif self._log_valid:
+                self._apply(record)
+                self._log_records += 1
+            self._log_offset += len(line) + 1
+
+    def _write_snapshot(self, users_data: List[UserRecord]) -> None:
+        """
+        Atomically replaces the snapshot and starts a new, empty log for it.
+        """
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(serialization.dumps(users_data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._snapshot_stamp = None
+        self._reset_log()
+
+    def _reset_log(self) -> None:
+        """
+        Truncates the log down to a header naming the current snapshot.
+        """
+        stamp = self._stamp()
+        header = serialization.dumps({"snapshot": stamp, "next_id": self._next_id}) + b"\n"
+        with open(self.log_path, "wb") as f:
+            f.write(header)
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_offset = 0
+        self._log_records = 0
+        self._refresh()
+
+    def _prepare_log(self) -> None:
+        """
+        Makes sure there is a snapshot and a log that belongs to it.
+        """
+        if self._snapshot_stamp is None:
+            self._write_snapshot([])
+        if not self._log_valid:
+            self._reset_log()
+
+    def _append(self, *records: Dict) -> None:
+        """
+        Applies records and appends them to the log, or queues them when a
+        transaction is open. Must be called with the exclusive lock held, right
+        after _refresh.
+        """
+        if self._pending is not None:
+            for record in records:
+                self._apply(record)
+            self._pending.extend(records)
+            return
+        self._prepare_log()
+        for record in records:
+            self._apply(record)
+        self._write_records(records)
+
+    def _write_records(self, records: List[Dict]) -> None:
+        """
+        Appends already applied records to the log in a single write, compacting
+        when the log is long.
+        """
+        lines = b"".join(serialization.dumps(record) + b"\n" for record in records)
+        with open(self.log_path, "r+b") as f:
+            f.truncate(self._log_offset)  # Drops a torn record left by a crash.
+            f.seek(self._log_offset)
+            f.write(lines)
+            f.flush()
+            if self._FSYNC:
+                os.fsync(f.fileno())
+        self._log_offset += len(lines)
+        self._log_records += len(records)
+        # Compacting no more often than once per len(users) records keeps the
+        # amortized cost of a write constant, even during bulk imports.
+        if self._log_records >= max(self._COMPACT_EVERY, len(self._users)):
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Folds the change log into a new snapshot.
+        """
+        with self._locked(exclusive=True):
+            self._refresh()
+            self._write_snapshot(list(self._users.values()))
+
+    @contextlib.contextmanager
+    def transaction(self):
+        with self._locked(exclusive=True):
+            if self._pending is not None:
+                yield
+                return
+            self._refresh()
+            self._prepare_log()
+            self._pending = []
+            try:
+                yield
+            except BaseException:
+                # Forget the uncommitted changes; the next read reloads from disk.
+                self._pending = None
+                self._snapshot_stamp = None
+                raise
+            pending, self._pending = self._pending, None
+            if pending:
+                self._write_records(pending)
+
+    def initialize(self) -> None:
+        if not os.path.exists(self.path):
+            with self._locked(exclusive=True):
+                if not os.path.exists(self.path):
+                    self._write_snapshot([])
+
+    def load_all(self) -> List[UserRecord]:
+        with self._locked(exclusive=False):
+            self._refresh()
+            return [dict(user_data) for user_data in self._users.values()]
+
+    def replace_all(self, users_data: List[UserRecord]) -> None:
+        with self._locked(exclusive=True):
+            self._write_snapshot(users_data)
+
+    def find(self, username: str = None, id: int = None) -> Optional[UserRecord]:
+        with self._locked(exclusive=False):
+            self._refresh()
+            matches = [self._ids.get(username), id if id in self._users else None]
+            matches = [user_id for user_id in matches if user_id is not None]
+            if not matches:
+                return None
+            # Same answer as a scan of the snapshot in file order would give.
+            order = list(self._users) if len(matches) > 1 else matches
+            first = next(user_id for user_id in order if user_id in matches)
+            return dict(self._users[first])
+
+    def insert(self, user_data: UserRecord) -> UserRecord:
+        with self._locked(exclusive=True):
+            self._refresh()
+            if user_data["username"] in self._ids:
+                raise ValueError(f"User with username '{user_data['username']}' already exists.")
+            new_user_data = {"id": self._next_id, **user_data}
+            self._append({"op": "create", "user": new_user_data})
+            return dict(new_user_data)
+
+    def insert_many(self, users_data: List[UserRecord], skip_existing: bool = False) -> List[UserRecord]:
+        with self._locked(exclusive=True):
+            self._refresh()
+            new_users_data = []
+            taken = set()
+            next_id = self._next_id
+            for user_data in users_data:
+                username = user_data["username"]
+                if username in self._ids or username in taken:
+                    if skip_existing:
+                        continue
+                    raise ValueError(f"User with username '{username}' already exists.")
+                taken.add(username)
+                new_users_data.append({"id": next_id, **user_data})
+                next_id += 1
+            if new_users_data:
+                self._append(*({"op": "create", "user": user_data} for user_data in new_users_data))
+            return [dict(user_data) for user_data in new_users_data]
+
+    def find_many(self, usernames: List[str] = None, ids: List[int] = None) -> List[Optional[UserRecord]]:
+        with self._locked(exclusive=False):
+            self._refresh()
+            if usernames is not None:
+                ids = [self._ids.get(username) for username in usernames]
+            found = [self._users.get(user_id) for user_id in ids]
+            return [dict(user_data) if user_data else None for user_data in found]
+
+    def update(self, user_data: UserRecord) -> None:
+        with self._locked(exclusive=True):
+            self._refresh()
+            if user_data["id"] not in self._users:
+                raise ValueError(f"User with ID '{user_data['id']}' not found.")
+            if self._ids.get(user_data["username"], user_data["id"]) != user_data["id"]:
+                raise ValueError(f"User with username '{user_data['username']}' already exists.")
+            self._append({"op": "update", "user": dict(user_data)})
+
+    def delete(self, username: str) -> None:
+        with self._locked(exclusive=True):
+            self._refresh()
+            if username not in self._ids:
+                raise ValueError(f"User with username '{username}' not found.")
+            self._append({"op": "remove", "username": username})
+
+
+class SQLite_User_Storage(User_Storage):
+    """
+    Stores the users in a SQLite database with unique indexes on the ID and
+    the username, so lookups and writes no longer touch every record.
+
+    The database runs in WAL mode and every thread gets its own connection.
+    The next user ID lives in a counters table, so IDs are never reused.
+    """
+    _COLUMNS = ("id", "username", "email", "password", *RESULT_FIELDS)
+    _INSERT = (f"INSERT INTO users ({', '.join(_COLUMNS)})"
+               f" VALUES ({', '.join(':' + column for column in _COLUMNS)})")
+    _IN_CHUNK = 500  # Keys per "IN (...)" query.
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._local = threading.local()
+
+    def _after_fork(self) -> None:
+        # SQLite connections must not be used across a fork.
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Returns the connection of the calling thread, opening it on first use.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.in_transaction = False
+        return conn
+
+    @contextlib.contextmanager
+    def _write(self):
+        """
+        Runs the block in a write transaction, or inside the open one if the
+        calling thread is in a transaction.
+        """
+        conn = self._connection()
+        if self._local.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def close(self) -> None:
+        """
+        Closes the connection of the calling thread.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def initialize(self) -> None:
+        with self._write() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                " id INTEGER PRIMARY KEY,"
+                " username TEXT NOT NULL,"
+                " email TEXT NOT NULL,"
+                " password TEXT NOT NULL)"
+            )
+            # Databases created before the results were kept get their columns now
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(users)")}
+            for column, default in RESULT_FIELDS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE users ADD COLUMN {column} INTEGER NOT NULL DEFAULT {default}")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS users_username ON users (username)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute(
+                "INSERT OR IGNORE INTO counters (name, value)"
+                " SELECT 'next_user_id', COALESCE(MAX(id), 0) + 1 FROM users"
+            )
+
+    def _allocate_ids(self, conn: sqlite3.Connection, count: int) -> int:
+        """
+        Reserves count consecutive user IDs and returns the first one.
+        Must be called inside a write transaction.
+        """
+        next_id = conn.execute("SELECT value FROM counters WHERE name = 'next_user_id'").fetchone()[0]
+        conn.execute("UPDATE counters SET value = ? WHERE name = 'next_user_id'", (next_id + count,))
+        return next_id
+
+    def _to_dict(self, row: sqlite3.Row) -> UserRecord:
+        return {column: row[column] for column in self._COLUMNS}
+
+    def load_all(self) -> List[UserRecord]:
+        rows = self._connection().execute("SELECT * FROM users ORDER BY id")
+        return [self._to_dict(row) for row in rows]
+
+    def replace_all(self, users_data: List[UserRecord]) -> None:
+        with self._write() as conn:
+            conn.execute("DELETE FROM users")
+            conn.executemany(self._INSERT, [{**RESULT_FIELDS, **user_data} for user_data in users_data])
+            conn.execute(
+                "UPDATE counters SET value = MAX(value, (SELECT COALESCE(MAX(id), 0) + 1 FROM users))"
+                " WHERE name = 'next_user_id'"
+            )
+
+    def find(self, username: str = None, id: int = None) -> Optional[UserRecord]:
+        row = self._connection().execute(
+            "SELECT * FROM users WHERE username = ? OR id = ? ORDER BY id LIMIT 1",
+            (username, id),
+        ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def insert(self, user_data: UserRecord) -> UserRecord:
+        return self.insert_many([user_data])[0]
+
+    def insert_many(self, users_data: List[UserRecord], skip_existing: bool = False) -> List[UserRecord]:
+        with self._write() as conn:
+            usernames = [user_data["username"] for user_data in users_data]
+            taken = {user_data["username"] for user_data in self._select_in(conn, "username", usernames)}
+            new_users_data = []
+            for user_data in users_data:
+                username = user_data["username"]
+                if username in taken:
+                    if skip_existing:
+                        continue
+                    raise ValueError(f"User with username '{username}' already exists.")
+                taken.add(username)
+                new_users_data.append(user_data)
+            next_id = self._allocate_ids(conn, len(new_users_data))
+            new_users_data = [{"id": next_id + i, **RESULT_FIELDS, **user_data}
+                              for i, user_data in enumerate(new_users_data)]
+            conn.executemany(self._INSERT, new_users_data)
+        return new_users_data
+
+    def _select_in(self, conn: sqlite3.Connection, column: str, values: List) -> List[UserRecord]:
+        """
+        Selects the users whose column is in values, in chunks that stay below
+        SQLite's limit on bound parameters.
+        """
+        users_data = []
+        for start in range(0, len(values), self._IN_CHUNK):
+            chunk = values[start:start + self._IN_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = conn.execute(f"SELECT * FROM users WHERE {column} IN ({placeholders})", chunk)
+            users_data.extend(self._to_dict(row) for row in rows)
+        return users_data
+
+    def find_many(self, usernames: List[str] = None, ids: List[int] = None) -> List[Optional[UserRecord]]:
+        conn = self._connection()
+        if usernames is not None:
+            by_key = {user_data["username"]: user_data for user_data in self._select_in(conn, "username", usernames)}
+            return [by_key.get(username) for username in usernames]
+        by_key = {user_data["id"]: user_data for user_data in self._select_in(conn, "id", ids)}
+        return [by_key.get(user_id) for user_id in ids]
+
+    def update(self, user_data: UserRecord) -> None:
+        # Only the fields given are written, so an update without the results keeps them
+        assignments = ", ".join(f"{column} = :{column}" for column in self._COLUMNS[1:] if column in user_data)
+        try:
+            with self._write() as conn:
+                cursor = conn.execute(f"UPDATE users SET {assignments} WHERE id = :id", user_data)
+        except sqlite3.IntegrityError:
+            raise ValueError(f"User with username '{user_data['username']}' already exists.")
+        if cursor.rowcount == 0:
+            raise ValueError(f"User with ID '{user_data['id']}' not found.")
+
+    def delete(self, username: str) -> None:
+        with self._write() as conn:
+            cursor = conn.execute("DELETE FROM users WHERE username = ?", (username,))
+        if cursor.rowcount == 0:
+            raise ValueError(f"User with username '{username}' not found.")
+
+    @contextlib.contextmanager
+    def transaction(self):
+        self._connection()
+        if self._local.in_transaction:
+            yield
+            return
+        with self._write():
+            self._local.in_transaction = True
+            try:
+                yield
+            finally:
+                self._local.in_transaction = False
+
+
+BACKENDS = {
+    "json": JSON_User_Storage,
+    "sqlite": SQLite_User_Storage,
+}
+
+
+def backend_for(db_name: str) -> str:
+    """
+    Guesses the backend name from a database file name.
+
+    Args:
+        db_name (str): The name of the database file.
+
+    Returns:
+        str: "sqlite" for .db/.sqlite/.sqlite3 files, "json" otherwise.
+    """
+    extension = os.path.splitext(db_name)[1].lower()
+    return "sqlite" if extension in (".db", ".sqlite", ".sqlite3") else "json"
+
+
+def migrate_json_to_sqlite(json_path: str, sqlite_path: str) -> int:
+    """
+    Imports the users of a JSON store into a SQLite store, keeping their IDs.
+
+    Args:
+        json_path (str): The path of the JSON file to read.
+        sqlite_path (str): The path of the SQLite database to fill.
+
+    Returns:
+        int: The number of imported users.
+
+    Raises:
+        ValueError: If the SQLite database already holds users.
+    """
+    source = JSON_User_Storage(json_path)
+    target = SQLite_User_Storage(sqlite_path)
+    target.initialize()
+    try:
+        if target.load_all():
+            raise ValueError(f"'{sqlite_path}' already contains users.")
+        users_data = source.load_all()
+        target.replace_all(users_data)
+        return len(users_data)
+    finally:
+        target.close()
+
+
+def iter_user_file(path: str, file_format: str = None) -> Iterator[Dict[str, str]]:
+    """
+    Streams user dictionaries from a CSV file (with a header row) or a JSON Lines
+    file, one record at a time.
+
+    Args:
+        path (str): The path of the file to read.
+        file_format (str, optional): "csv" or "jsonl". Defaults to a guess based on
+            the file extension.
+
+    Yields:
+        Dict[str, str]: One user dictionary per row or line.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip(".").lower()
+    if file_format == "csv":
+        with open(path, newline="") as f:
+            yield from csv.DictReader(f)
+    elif file_format in ("jsonl", "ndjson"):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        raise ValueError(f"Unknown user file format '{file_format}'.")
+
+
+if __name__ == "__main__":
+    # Usage: python -m models.user_storage migrate data/users.json data/users.db
+    #        python -m models.user_storage import partners.csv [--db users.db] [--skip-existing]
+    parser = argparse.ArgumentParser(description="Maintenance commands for the user store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="import a JSON user store into a SQLite database")
+    migrate.add_argument("json_path", help="the JSON file to import")
+    migrate.add_argument("sqlite_path", help="the SQLite database to create or fill")
+    bulk_import = commands.add_parser("import", help="bulk-load users from a CSV or JSONL file")
+    bulk_import.add_argument("path", help="the CSV or JSONL file to load")
+    bulk_import.add_argument("--db", default=None, help="the database name inside data/")
+    bulk_import.add_argument("--batch-size", type=int, default=1000)
+    bulk_import.add_argument("--skip-existing", action="store_true", help="skip usernames that are taken")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        count = migrate_json_to_sqlite(args.json_path, args.sqlite_path)
+        print(f"Imported {count} users into {args.sqlite_path}")
+    else:
+        from models.user_model import User_Model
+        User_Model.initialize_DB(args.db)
+        count = User_Model.import_users(args.path, batch_size=args.batch_size, skip_existing=args.skip_existing)
+        print(f"Imported {count} users into {User_Model._get_db_path()}")
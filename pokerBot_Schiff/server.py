@@ -1,35 +1,153 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, g
 import os
-import sys
-
-# Add controllers and models to the path
-fpath = os.path.join(os.path.dirname(__file__), 'controllers')
-sys.path.append(fpath)
-fpath = os.path.join(os.path.dirname(__file__), 'models')
-sys.path.append(fpath)
+import time
 
 # Import controllers
 from controllers.UserController import UserController
-from controllers.GameController import GameController
+from controllers.GameController import GameController, start_bot_tables, SHOWCASE_ACTION_SECONDS, SHOWCASE_HAND_SECONDS
+from controllers.AssetController import AssetController, asset_url, has_asset
+from controllers.MetricsController import MetricsController
+from controllers.AdminController import AdminController
 
 # Import models
 from models.user_model import User_Model
+from models import metrics
+from models.profiler import PROFILER
+from models.decision_cache import DECISION_CACHE, DEFAULT_ENTRIES
+from models.leaderboard import LEADERBOARD, DEFAULT_MAX_AGE
+from models import admission
+from models.admission import BOT_WORK, TooManyRequestsError
+from models.scheduler import SCHEDULER
+
+# WebSockets are optional; without flask-sock the game page falls back to HTTP requests
+try:
+    from flask_sock import Sock
+except ImportError:
+    Sock = None
 
 app = Flask(__name__, static_url_path='/static', static_folder='static')
 app.secret_key = "secret_key"  # Change this in a production environment
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')  # Without it, admin routes only answer local requests
 
-# Initialize the database
-User_Model.initialize_DB()
+# Initialize the database (USER_DB_BACKEND=sqlite switches to the SQLite store)
+User_Model.initialize_DB(backend=os.environ.get("USER_DB_BACKEND"))
 
 # Ensure the 'data' directory exists
 if not os.path.exists('data'):
     os.makedirs('data')
 
+# Templates resolve static files through the manifest written by build_assets.py
+@app.context_processor
+def inject_asset_helpers():
+    return {'asset_url': asset_url, 'has_asset': has_asset}
+
+# Per-route timing, counts and in-flight requests for /metrics (routes are labelled by endpoint name)
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.request_route = request.endpoint or 'unmatched'
+    metrics.REQUESTS_IN_FLIGHT.inc(g.request_route)
+
+@app.after_request
+def count_request(response):
+    metrics.REQUESTS.inc(g.request_route, str(response.status_code))
+    g.request_counted = True
+    return response
+
+@app.teardown_request
+def stop_request_timer(exc):
+    if 'request_start' not in g:
+        return
+    metrics.REQUESTS_IN_FLIGHT.dec(g.request_route)
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, g.request_route, request.method)
+    if not g.get('request_counted'):
+        # An exception that propagated out of Flask skipped the after_request hooks
+        metrics.REQUESTS.inc(g.request_route, '500')
+
+# Sampled request profiling (PROFILE_RATE=0.01 PROFILE_ROUTES=handle_game_action,play PROFILE_DIR=data/profiles);
+# the rate and routes can be changed at runtime on /admin/profile
+PROFILER.configure(
+    rate=float(os.environ.get('PROFILE_RATE', 0)),
+    routes=os.environ.get('PROFILE_ROUTES', '').split(','),
+    directory=os.environ.get('PROFILE_DIR', '')
+)
+
+# How many bot decision situations the shared cache keeps (BOT_CACHE_SIZE=0 disables it); see /admin/cache
+DECISION_CACHE.resize(int(os.environ.get('BOT_CACHE_SIZE', DEFAULT_ENTRIES)))
+
+# How stale the leaderboard may get before it is rebuilt from the user store, picking up the hands
+# finished in other worker processes (LEADERBOARD_MAX_AGE=0 never rebuilds, for a single process)
+LEADERBOARD.max_age = float(os.environ.get('LEADERBOARD_MAX_AGE', DEFAULT_MAX_AGE))
+
+# Admission control (RATE_LIMITS=0 turns the per-user and per-IP limits off; BOT_WORK_SLOTS and
+# BOT_WORK_QUEUE size the shared queue for bot and equity work, by default one slot per CPU and 16 waiting)
+admission.configure(enabled=os.environ.get('RATE_LIMITS', '1') != '0')
+BOT_WORK.resize(int(os.environ.get('BOT_WORK_SLOTS', 0)) or None, int(os.environ.get('BOT_WORK_QUEUE', 16)))
+
+# Endpoints that are rate limited, by limit group
+RATE_LIMITED = {
+    'handle_game_action': 'game', 'play': 'game', 'deal_cards': 'game', 'advance_round': 'game', 'odds': 'game',
+    'validate_login': 'auth', 'register': 'auth',
+}
+
+@app.before_request
+def limit_request():
+    group = RATE_LIMITED.get(request.endpoint)
+    if group == 'game':
+        admission.limit(group, user=session.get('username'), address=request.remote_addr)
+    elif group == 'auth':
+        admission.limit(group, user=request.form.get('username'), address=request.remote_addr)
+
+@app.errorhandler(TooManyRequestsError)
+def too_many_requests(e):
+    headers = {'Retry-After': str(e.retry_after)}
+    if request.path.startswith('/api/'):
+        return jsonify({'error': str(e), 'retry_after': e.retry_after}), 429, headers
+    return str(e), 429, headers
+
+# Bot-only showcase tables for spectators (BOT_TABLES=<count>); BOT_TABLE_ACTION_SECONDS and
+# BOT_TABLE_HAND_SECONDS pace them, and BOT_TABLES_ALWAYS=1 keeps unwatched tables playing (to warm caches)
+if int(os.environ.get('BOT_TABLES', 0)) > 0:
+    start_bot_tables(
+        int(os.environ['BOT_TABLES']),
+        action_seconds=float(os.environ.get('BOT_TABLE_ACTION_SECONDS', SHOWCASE_ACTION_SECONDS)),
+        hand_seconds=float(os.environ.get('BOT_TABLE_HAND_SECONDS', SHOWCASE_HAND_SECONDS)),
+        pause_unwatched=os.environ.get('BOT_TABLES_ALWAYS') != '1'
+    )
+
+def start_background_work():
+    """
+    Start the scheduler that plays the bot tables. Called by the process that
+    serves requests (a launcher worker after the fork, the ASGI app on startup
+    or the development server), so a pre-fork master runs no threads
+    """
+    if len(SCHEDULER):
+        SCHEDULER.start()
+
+@app.before_request
+def start_profiling():
+    PROFILER.start(request.endpoint or 'unmatched')
+
+@app.teardown_request
+def stop_profiling(exc):
+    PROFILER.stop()
+
 # Default route redirects to login
 @app.route('/')
 def index():
     return redirect(url_for('login'))
 
+# Fingerprinted static assets (long-lived, immutable caching)
+app.add_url_rule('/static/dist/<path:filename>', 'static_dist', view_func=AssetController.serve, methods=['GET'])
+
+# Prometheus metrics
+app.add_url_rule('/metrics', 'metrics', view_func=MetricsController.metrics, methods=['GET'])
+
+# Admin Routes
+app.add_url_rule('/admin/profile', 'profile', view_func=AdminController.profile, methods=['GET'])
+app.add_url_rule('/admin/profile', 'update_profile', view_func=AdminController.update_profile, methods=['POST'])
+app.add_url_rule('/admin/cache', 'decision_cache', view_func=AdminController.decision_cache, methods=['GET'])
+
 # User Management Routes
 app.add_url_rule('/login', 'login', view_func=UserController.login, methods=['GET'])
 app.add_url_rule('/validate_login', 'validate_login', view_func=UserController.validate_login, methods=['POST'])
@@ -47,9 +165,23 @@ app.add_url_rule('/update_bot_settings/<game_id>', 'update_game_settings', view_
 app.add_url_rule('/api/game/<game_id>/action', 'handle_game_action', view_func=GameController.handle_game_action, methods=['POST'])
 app.add_url_rule('/api/game/<game_id>/deal', 'deal_cards', view_func=GameController.deal_cards, methods=['POST'])
 app.add_url_rule('/api/game/<game_id>/advance', 'advance_round', view_func=GameController.advance_round, methods=['POST'])
+app.add_url_rule('/api/game/<game_id>/play', 'play', view_func=GameController.play, methods=['POST'])
+app.add_url_rule('/api/game/<game_id>/odds', 'odds', view_func=GameController.odds, methods=['GET'])
+app.add_url_rule('/api/leaderboard', 'leaderboard', view_func=GameController.leaderboard, methods=['GET'])
+app.add_url_rule('/api/bot_tables', 'bot_tables', view_func=GameController.bot_tables, methods=['GET'])
+app.add_url_rule('/api/game/<game_id>/events', 'game_events', view_func=GameController.game_events, methods=['GET'])
+
+# Two-way game channel (pip install flask-sock)
+app.config['GAME_WEBSOCKET'] = Sock is not None
+if Sock is not None:
+    sock = Sock(app)
+    sock.route('/api/game/<game_id>/ws')(GameController.game_socket)
 
 if __name__ == "__main__":
     # To run this application, you need to install Flask:
     # pip install flask
+    # This is the development server; in production run the async entry point in asgi.py
     port = int(os.environ.get("PORT", 8080))
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_work()  # In the reloader's child, which serves; not in the process watching files
     app.run(debug=True, port=port)
@@ -0,0 +1,171 @@
+import json
+import threading
+import time
+
+import pytest
+from controllers.GameController import games, handle_socket_message
+from models import admission
+from models.admission import Rate_Limiter, TooManyRequestsError, Work_Queue
+from server import app
+
+
+class Clock:
+    """
+    A clock the tests move by hand.
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def limits():
+    """
+    Fixture that gives every limit a fresh, small bucket and restores the
+    defaults afterwards.
+    """
+    admission.configure(enabled=True, limits={name: (1.0, 2) for name in admission.DEFAULT_LIMITS})
+    yield admission.LIMITERS
+    admission.configure(enabled=True, limits=admission.DEFAULT_LIMITS)
+
+def test_token_bucket():
+    """
+    Test that a key can burst up to the bucket size, is refused with the time
+    until the next token, and gets tokens back at the rate.
+    """
+    clock = Clock()
+    limiter = Rate_Limiter("test", rate=0.5, burst=2, clock=clock)
+    limiter.check("alice")
+    limiter.check("alice")
+    with pytest.raises(TooManyRequestsError) as refused:
+        limiter.check("alice")
+    assert refused.value.retry_after == 2
+    limiter.check("bob")  # Keys have their own buckets
+    clock.now = 2
+    limiter.check("alice")
+    with pytest.raises(TooManyRequestsError):
+        limiter.check("alice")
+    assert admission.LIMITED_REQUESTS.value("test") == 2
+
+def test_limiter_forgets_old_keys():
+    """
+    Test that only the most recently seen keys are tracked.
+    """
+    limiter = Rate_Limiter("test_keys", rate=1, burst=1, max_keys=2, clock=Clock())
+    for key in ("a", "b", "c"):
+        limiter.check(key)
+    assert len(limiter) == 2
+    limiter.check("a")  # Forgotten, so it starts with a full bucket
+    with pytest.raises(ValueError):
+        Rate_Limiter("bad", rate=0, burst=1)
+
+def test_work_queue_sheds_load():
+    """
+    Test that jobs beyond the slots wait, and jobs beyond the queue are
+    turned away with a retry time.
+    """
+    queue = Work_Queue(slots=1, max_waiting=1, max_wait=5)
+    started, release = threading.Event(), threading.Event()
+
+    def job():
+        with queue.admit():
+            started.set()
+            release.wait(5)
+
+    def queued_job():
+        with queue.admit():
+            pass
+
+    running = threading.Thread(target=job)
+    running.start()
+    started.wait(5)
+    waiting = threading.Thread(target=queued_job)
+    waiting.start()
+    while queue.waiting == 0:
+        time.sleep(0.001)
+    with pytest.raises(TooManyRequestsError) as refused:
+        with queue.admit():
+            pass
+    assert refused.value.retry_after >= 1
+    assert queue.rejected == 1
+    release.set()
+    running.join(5)
+    waiting.join(5)
+    assert queue.running == 0 and queue.waiting == 0
+
+def test_work_queue_wait_times_out():
+    """
+    Test that a job that can't get a slot in time is turned away.
+    """
+    queue = Work_Queue(slots=1, max_waiting=4, max_wait=0.01)
+    with queue.admit():
+        with pytest.raises(TooManyRequestsError):
+            with queue.admit():
+                pass
+    with queue.admit():
+        assert queue.running == 1
+
+def test_work_queue_without_waiting():
+    """
+    Test that a job that won't wait is turned away at once when the slots are taken.
+    """
+    queue = Work_Queue(slots=1, max_waiting=4, max_wait=5)
+    with queue.admit():
+        start = time.monotonic()
+        with pytest.raises(TooManyRequestsError):
+            with queue.admit(wait=False):
+                pass
+        assert time.monotonic() - start < 1
+    with queue.admit(wait=False):
+        assert queue.running == 1
+
+def test_login_is_limited(limits):
+    """
+    Test that logins past the limit get a 429 with Retry-After.
+    """
+    client = app.test_client()
+    for _ in range(2):
+        assert client.post("/validate_login", data={"username": "nobody", "password": "x"}).status_code != 429
+    response = client.post("/validate_login", data={"username": "nobody", "password": "x"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+def test_logins_are_limited_per_address(limits):
+    """
+    Test that failed logins naming an account from one address don't lock
+    the account out for other addresses.
+    """
+    admission.configure(limits={"auth_ip": (1.0, 100)})
+    for _ in range(2):
+        admission.limit("auth", user="victim", address="10.0.0.1")
+    with pytest.raises(TooManyRequestsError):
+        admission.limit("auth", user="victim", address="10.0.0.1")
+    admission.limit("auth", user="victim", address="10.0.0.2")
+
+def test_game_api_is_limited(limits):
+    """
+    Test that game API requests past the limit get a JSON 429 with Retry-After.
+    """
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["username"] = "limited_player"
+    for _ in range(2):
+        client.get("/api/game/0/odds")
+    response = client.get("/api/game/0/odds")
+    assert response.status_code == 429
+    assert response.json["retry_after"] == 1
+    assert response.headers["Retry-After"] == "1"
+
+def test_socket_commands_are_limited(limits, monkeypatch):
+    """
+    Test that game socket commands count against the player's limit and are
+    answered with the retry time once it is used up.
+    """
+    monkeypatch.setitem(games, -1, {})
+    message = json.dumps({"type": "unknown", "id": 7})
+    for _ in range(2):
+        assert "retry_after" not in json.loads(handle_socket_message(-1, "socket_player", message))
+    reply = json.loads(handle_socket_message(-1, "socket_player", message))
+    assert reply["retry_after"] == 1 and reply["id"] == 7
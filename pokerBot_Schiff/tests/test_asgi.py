@@ -0,0 +1,128 @@
+import asyncio
+import json
+
+import pytest
+from asgi import application, app
+from controllers.GameController import games
+from models import metrics
+from models.game_events import Game_Events
+
+
+@pytest.fixture
+def game_id():
+    """
+    Fixture that creates a game for 'alice' against the bot and removes it afterwards.
+    """
+    games[1] = {
+        "name": "test",
+        "bot_difficulty": "easy",
+        "players": ["alice", "bot"],
+        "game_started": True,
+        "community_cards": [],
+        "player_hands": {},
+        "pot": 0,
+        "current_bet": 0,
+        "chips": {"alice": 1000, "bot": 1000},
+        "bets": {"alice": 0, "bot": 0},
+        "round": "pre-flop"
+    }
+    yield 1
+    del games[1]
+
+def session_cookie(username):
+    """
+    Returns a Cookie header for a session logged in as username.
+    """
+    value = app.session_interface.get_signing_serializer(app).dumps({"username": username})
+    return (b"cookie", f"{app.config['SESSION_COOKIE_NAME']}={value}".encode())
+
+def scope(path, scope_type="http", headers=()):
+    return {"type": scope_type, "method": "GET", "path": path, "query_string": b"",
+            "headers": list(headers), "http_version": "1.1"}
+
+class Connection:
+    """
+    Drives an ASGI connection: messages put on inbox are received by the app,
+    messages the app sends are collected in sent.
+    """
+    def __init__(self, connection_scope):
+        self.inbox = asyncio.Queue()
+        self.sent = []
+        self.task = asyncio.ensure_future(application(connection_scope, self.inbox.get, self._send))
+
+    async def _send(self, message):
+        self.sent.append(message)
+
+def test_requests_go_to_flask():
+    """
+    Test that ordinary requests are answered by the Flask app.
+    """
+    async def run():
+        connection = Connection(scope("/login"))
+        await connection.inbox.put({"type": "http.request", "body": b""})
+        await asyncio.wait_for(connection.task, 5)
+        return connection.sent
+
+    sent = asyncio.run(run())
+    assert sent[0]["status"] == 200
+    assert b"<form" in sent[1]["body"]
+
+def test_event_stream(game_id):
+    """
+    Test that published events are streamed and the watcher is removed on disconnect.
+    """
+    async def run():
+        connection = Connection(scope(f"/api/game/{game_id}/events", headers=[session_cookie("alice")]))
+        await asyncio.sleep(0.05)
+        Game_Events.publish(game_id, {"type": "deal", "pot": 15})
+        await asyncio.sleep(0.05)
+        watchers = Game_Events.watcher_count(game_id)
+        await connection.inbox.put({"type": "http.disconnect"})
+        await asyncio.wait_for(connection.task, 5)
+        return connection.sent, watchers
+
+    sent, watchers = asyncio.run(run())
+    assert watchers == 1
+    assert Game_Events.watcher_count(game_id) == 0
+    assert sent[0]["status"] == 200
+    assert sent[1]["body"] == b"retry: 3000\n\n"
+    assert json.loads(sent[2]["body"].decode()[len("data: "):]) == {"type": "deal", "pot": 15}
+
+def test_event_stream_requires_login(game_id):
+    """
+    Test that the event stream refuses anonymous watchers with the usual JSON
+    error, and that the natively served route is counted like Flask's.
+    """
+    async def run():
+        connection = Connection(scope(f"/api/game/{game_id}/events"))
+        await asyncio.wait_for(connection.task, 5)
+        return connection.sent
+
+    before = metrics.REQUESTS.value("game_events", "401")
+    sent = asyncio.run(run())
+    assert sent[0]["status"] == 401
+    assert json.loads(sent[1]["body"]) == {"error": "Not logged in"}
+    assert metrics.REQUESTS.value("game_events", "401") == before + 1
+    assert metrics.REQUESTS_IN_FLIGHT.value("game_events") == 0
+
+def test_socket_commands(game_id):
+    """
+    Test that commands sent over the socket are run and answered.
+    """
+    async def run():
+        connection = Connection(scope(f"/api/game/{game_id}/ws", "websocket", [session_cookie("alice")]))
+        await connection.inbox.put({"type": "websocket.connect"})
+        await connection.inbox.put({"type": "websocket.receive", "text": json.dumps({"type": "deal", "id": 7})})
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if len(connection.sent) > 1:
+                break
+        await connection.inbox.put({"type": "websocket.disconnect"})
+        await asyncio.wait_for(connection.task, 5)
+        return connection.sent
+
+    sent = asyncio.run(run())
+    assert sent[0] == {"type": "websocket.accept"}
+    reply = json.loads(sent[1]["text"])
+    assert reply["type"] == "reply" and reply["id"] == 7
+    assert reply["player_cards"] == games[game_id]["player_hands"]["alice"]
@@ -0,0 +1,110 @@
+import gzip
+import io
+import json
+
+import pytest
+from controllers.AssetController import IMMUTABLE_CACHE, asset_url, has_asset
+from server import app
+
+build_assets = pytest.importorskip("build_assets")
+
+STYLE = b"body { background: #0a5c36; }\n" * 20
+
+
+@pytest.fixture
+def dist(tmp_path, monkeypatch):
+    """
+    Fixture that builds a small dist directory (a gzipped stylesheet and an
+    uncompressed image) and points the asset controller at it.
+    """
+    monkeypatch.setattr(build_assets, "DIST_DIR", str(tmp_path))
+    monkeypatch.setattr("controllers.AssetController.DIST_DIR", str(tmp_path))
+    monkeypatch.setattr("controllers.AssetController._manifest", None)
+    monkeypatch.setattr(build_assets, "brotli", None)
+    manifest = {}
+    build_assets.write_asset("style.css", STYLE, manifest, compress=True)
+    build_assets.write_asset("cards.png", b"\x89PNG sheet", manifest)
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+    return manifest
+
+def test_fingerprints_follow_content():
+    """
+    Test that fingerprinted names keep the extension and change with the content.
+    """
+    name = build_assets.fingerprint("style.css", STYLE)
+    assert name.startswith("style.") and name.endswith(".css")
+    assert name == build_assets.fingerprint("style.css", STYLE)
+    assert name != build_assets.fingerprint("style.css", STYLE + b"\n")
+
+def test_sprite_sheet(tmp_path, monkeypatch):
+    """
+    Test that the sprite sheet places each card in its cell, and that a card
+    that isn't a PNG keeps being drawn from its own file.
+    """
+    Image = pytest.importorskip("PIL.Image")
+    Image.new("RGB", (40, 60), "red").save(tmp_path / "ace_of_spades.png")
+    Image.new("RGB", (40, 60), "blue").save(tmp_path / "card_back.png")
+    (tmp_path / "king_of_spades.png").write_bytes(b"not a png")
+    monkeypatch.setattr(build_assets, "CARDS_DIR", str(tmp_path))
+    monkeypatch.setattr(build_assets, "CARD_NAMES", ["ace_of_spades", "king_of_spades", "card_back"])
+    monkeypatch.setattr(build_assets, "COLUMNS", 2)
+
+    sprite, offsets, size = build_assets.build_sprite()
+    assert offsets == {"ace_of_spades": (0, 0), "king_of_spades": None, "card_back": (0, 120)}
+    assert size == (160, 240)
+    with Image.open(io.BytesIO(sprite)) as sheet:
+        assert sheet.size == (320, 480)
+
+    css = build_assets.build_sprite_css("cards.0123456789.png", offsets, size).decode()
+    assert "url('cards.0123456789.png')" in css and "background-size: 160px 240px" in css
+    assert ".card.card-ace_of_spades { background-position: -0px -0px; }" in css
+    assert ".card.card-back { background-position: -0px -120px; }" in css
+    assert "url('/static/cards/king_of_spades.png')" in css
+
+def test_asset_urls(dist):
+    """
+    Test that built assets resolve to their fingerprinted URL and anything
+    else to the plain static file.
+    """
+    with app.test_request_context():
+        assert has_asset("style.css")
+        assert asset_url("style.css") == f"/static/dist/{dist['style.css']}"
+        assert not has_asset("game.js")
+        assert asset_url("game.js") == "/static/game.js"
+
+def test_assets_are_cached_forever(dist):
+    """
+    Test that fingerprinted assets are served with immutable caching.
+    """
+    response = app.test_client().get(f"/static/dist/{dist['cards.png']}")
+    assert response.status_code == 200
+    assert response.data == b"\x89PNG sheet"
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE
+    assert response.mimetype == "image/png"
+    assert "Content-Encoding" not in response.headers
+
+def test_precompressed_variants(dist):
+    """
+    Test that the gzip variant is sent to clients that accept it, the plain
+    file to the rest, and that a missing brotli variant isn't chosen.
+    """
+    client = app.test_client()
+    url = f"/static/dist/{dist['style.css']}"
+    compressed = client.get(url, headers={"Accept-Encoding": "br, gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+    assert compressed.mimetype == "text/css"
+    assert gzip.decompress(compressed.data) == STYLE
+
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.data == STYLE
+
+def test_unknown_assets_are_not_found(dist):
+    """
+    Test that only files listed in the manifest are served.
+    """
+    client = app.test_client()
+    assert client.get("/static/dist/style.0000000000.css").status_code == 404
+    assert client.get("/static/dist/manifest.json").status_code == 404
+    assert client.get(f"/static/dist/{dist['style.css']}.gz").status_code == 404
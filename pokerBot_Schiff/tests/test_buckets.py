@@ -0,0 +1,94 @@
+import os
+import random
+import pytest
+from controllers.GameController import choose_bot_action
+from models.decision_cache import Decision_Cache
+from models.buckets import Hand_Buckets, canonical_situation
+from models.cards import card_code
+
+numpy = pytest.importorskip("numpy")
+import build_buckets  # noqa: E402 (needs NumPy)
+
+
+def codes(*names):
+    return [card_code(name) for name in names]
+
+def test_canonical_situation():
+    """
+    Test that situations differing only by a renaming of the suits are the same situation.
+    """
+    flush_draw = canonical_situation(codes("king_of_hearts", "queen_of_hearts"),
+                                     codes("ace_of_hearts", "7_of_hearts", "2_of_clubs"))
+    assert flush_draw == canonical_situation(codes("queen_of_spades", "king_of_spades"),
+                                             codes("2_of_diamonds", "ace_of_spades", "7_of_spades"))
+    assert flush_draw != canonical_situation(codes("king_of_clubs", "queen_of_clubs"),
+                                             codes("ace_of_hearts", "7_of_hearts", "2_of_clubs"))
+
+def test_board_strengths():
+    """
+    Test that the river strengths of a board rank the nuts first and skip impossible hands.
+    """
+    board = codes("queen_of_spades", "jack_of_spades", "10_of_spades", "2_of_hearts", "3_of_clubs")
+    ehs, histograms = build_buckets.board_strengths(board, 1, numpy.random.default_rng(0))
+    royal = build_buckets.tables.get_table("ranges").combos.tolist().index(sorted(codes("ace_of_spades", "king_of_spades")))
+    assert ehs[royal] == 1
+    assert histograms[royal].tolist() == [0] * (build_buckets.BINS - 1) + [1]
+    assert (histograms.sum(axis=1) <= 1).all() and histograms.sum() == 47 * 46 // 2
+
+def test_pipeline(tmp_path):
+    """
+    Test that the preflop buckets order hands by strength, the chunks are
+    resumed, and streets that weren't built find nothing.
+    """
+    path = str(tmp_path / "buckets.tbl")
+    options = dict(bucket_counts=dict(build_buckets.BUCKETS, preflop=5), runouts=dict(build_buckets.RUNOUTS, preflop=200),
+                   work_dir=str(tmp_path / "work"), path=path, progress=lambda message: None)
+    metadata = build_buckets.build(["preflop"], **options)
+    assert metadata["buckets"] == {"preflop": 5, "river": 50}
+    table = Hand_Buckets(path)
+    aces, _ = table.lookup(codes("ace_of_spades", "ace_of_hearts"), [])
+    assert aces == 4
+    assert table.lookup(codes("ace_of_clubs", "ace_of_diamonds"), [])[0] == aces
+    assert table.lookup(codes("7_of_clubs", "2_of_diamonds"), [])[0] < aces
+    assert table.strengths["preflop"] == sorted(table.strengths["preflop"])
+    assert table.lookup(codes("ace_of_spades", "ace_of_hearts"), codes("2_of_clubs", "7_of_diamonds", "king_of_hearts")) is None
+    bucket, strength = table.lookup(codes("ace_of_spades", "king_of_spades"),
+                                    codes("queen_of_spades", "jack_of_spades", "10_of_spades", "2_of_hearts", "3_of_clubs"))
+    assert (bucket, strength) == (49, 1.0)
+
+    chunk = build_buckets.chunk_path(options["work_dir"], "preflop", 0)
+    saved = os.path.getmtime(chunk)
+    assert not build_buckets.compute_chunk("preflop", 0, [[]], 200, 0, options["work_dir"])
+    assert os.path.getmtime(chunk) == saved
+    with pytest.raises(SystemExit):
+        build_buckets.build(["preflop"], **dict(options, runouts=dict(build_buckets.RUNOUTS, preflop=100)))
+
+def test_kmeans():
+    """
+    Test that k-means finds well separated clusters.
+    """
+    rng = numpy.random.default_rng(0)
+    points = numpy.concatenate([rng.normal(center, 0.01, (50, 2)) for center in (0, 1, 2)])
+    centroids = build_buckets.kmeans(points, 3, rng)
+    assert sorted(numpy.round(centroids[:, 0]).tolist()) == [0, 1, 2]
+    assert len(set(build_buckets.assign(points, centroids).tolist())) == 3
+
+def test_missing_table(tmp_path):
+    """
+    Test that without the table file lookups find nothing, so the bots use the hand category.
+    """
+    table = Hand_Buckets(str(tmp_path / "missing.tbl"))
+    assert table.lookup(codes("ace_of_spades", "ace_of_hearts"), []) is None
+    assert table.lookup(codes("ace_of_spades", "ace_of_hearts"), codes("2_of_clubs", "7_of_diamonds", "king_of_hearts", "4_of_hearts", "5_of_hearts")) is None
+
+def test_bot_plays_its_bucket(monkeypatch):
+    """
+    Test that the bot's strength comes from its bucket when the table is built.
+    """
+    monkeypatch.setattr(random, "random", lambda: 0.5)  # No random change of strategy
+    board = ["2_of_clubs", "7_of_diamonds", "king_of_hearts", "9_of_spades", "3_of_hearts"]
+    weak = ["4_of_clubs", "5_of_diamonds"]
+    assert "fold" in {choose_bot_action({"bot_difficulty": "easy"}, weak, board)[0] for _ in range(100)}
+    monkeypatch.setattr("models.buckets.lookup", lambda hole, board: (49, 0.95))
+    monkeypatch.setattr("controllers.GameController.DECISION_CACHE", Decision_Cache())  # Forget the earlier strategies
+    assert {choose_bot_action({"bot_difficulty": "easy"}, weak, board)[0] for _ in range(100)} == {"call", "raise"}
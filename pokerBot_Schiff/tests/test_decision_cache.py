@@ -0,0 +1,91 @@
+import pytest
+from controllers.GameController import choose_bot_action, decision_key
+from models import metrics
+from models.decision_cache import Decision_Cache
+from server import app
+
+
+def test_lru_eviction():
+    """
+    Test that the cache keeps the most recently used entries up to its limit.
+    """
+    cache = Decision_Cache(max_entries=2, name="test")
+    cache.put("a", (1, 2, 3))
+    cache.put("b", (4, 5, 6))
+    assert cache.get("a") == (1, 2, 3)
+    cache.put("c", (7, 8, 9))
+    assert cache.get("b") is None
+    assert cache.get("c") == (7, 8, 9)
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 2, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+    assert stats["bytes"] > 0
+    cache.resize(0)
+    assert len(cache) == 0 and cache.stats()["bytes"] == 0
+    with pytest.raises(ValueError):
+        cache.resize(-1)
+
+def test_lookups_are_counted():
+    """
+    Test that hits and misses are exported as cache lookup metrics.
+    """
+    cache = Decision_Cache(name="test_counted")
+    cache.get("missing")
+    cache.put("present", 1)
+    cache.get("present")
+    assert metrics.CACHE_LOOKUPS.value("test_counted", "miss") == 1
+    assert metrics.CACHE_LOOKUPS.value("test_counted", "hit") == 1
+
+def test_situations_are_shared_across_suits():
+    """
+    Test that situations differing only by a renaming of the suits share a key,
+    and that the hard bot's key includes the player's actions.
+    """
+    game = {"bot_difficulty": "medium"}
+    key = decision_key(game, ["ace_of_hearts", "king_of_hearts"], ["queen_of_hearts", "2_of_clubs", "7_of_spades"])
+    assert key == decision_key(game, ["king_of_spades", "ace_of_spades"], ["7_of_hearts", "queen_of_spades", "2_of_diamonds"])
+    assert key != decision_key(game, ["ace_of_hearts", "king_of_clubs"], ["queen_of_hearts", "2_of_clubs", "7_of_spades"])
+    assert decision_key(game, ["ace_of_hearts", "king_of_hearts"], []) == decision_key(game, ["ace_of_clubs", "king_of_clubs"], [])
+
+    hard = {"bot_difficulty": "hard", "player_range": object(), "player_actions": [("raise", 0)]}
+    assert decision_key(hard, ["ace_of_hearts", "king_of_hearts"], [])[-1] == (("raise", 0),)
+
+def test_range_reading_keys_keep_streets_apart():
+    """
+    Test that for the range-reading bot, boards holding the same cards dealt on
+    different streets get different keys, while suit renamings still share one.
+    """
+    hard = {"bot_difficulty": "hard", "player_range": object(), "player_actions": [("call", 0), ("raise", 3)]}
+    hole = ["ace_of_spades", "queen_of_spades"]
+    key = decision_key(hard, hole, ["8_of_hearts", "7_of_clubs", "3_of_hearts", "king_of_diamonds"])
+    assert key != decision_key(hard, hole, ["8_of_hearts", "7_of_clubs", "king_of_diamonds", "3_of_hearts"])
+    assert key == decision_key(hard, ["ace_of_diamonds", "queen_of_diamonds"],
+                               ["7_of_spades", "8_of_clubs", "3_of_clubs", "king_of_hearts"])
+
+def test_draws_are_made_per_game(monkeypatch):
+    """
+    Test that a cached strategy is reused, while each decision still draws its own action.
+    """
+    cache = Decision_Cache()
+    monkeypatch.setattr("controllers.GameController.DECISION_CACHE", cache)
+    game = {"bot_difficulty": "medium"}
+    cards, board = ["2_of_clubs", "7_of_diamonds"], ["ace_of_hearts", "king_of_spades", "9_of_clubs"]
+    actions = {choose_bot_action(game, cards, board)[0] for _ in range(200)}
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 199
+    assert len(actions) > 1
+
+@pytest.fixture
+def client():
+    """
+    Fixture that returns a test client for the app.
+    """
+    return app.test_client()
+
+def test_admin_cache_stats(client):
+    """
+    Test that the cache statistics are served to local admin requests.
+    """
+    response = client.get("/admin/cache", environ_base={"REMOTE_ADDR": "127.0.0.1"})
+    assert response.status_code == 200
+    assert {"entries", "hit_rate", "bytes"} <= set(response.json)
+    assert client.get("/admin/cache", environ_base={"REMOTE_ADDR": "10.0.0.1"}).status_code == 403
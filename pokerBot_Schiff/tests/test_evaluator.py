@@ -0,0 +1,87 @@
+import pytest
+from benchmark import compare
+from controllers.GameController import determine_winner, evaluate_hand, games, run_game_command
+from verify_evaluator import Check, check_five, check_seven, reference
+
+
+def test_evaluate_hand_categories():
+    """
+    Test that evaluate_hand recognises the hand categories.
+    """
+    assert evaluate_hand(["ace_of_spades", "king_of_spades"],
+                         ["queen_of_spades", "jack_of_spades", "10_of_spades", "2_of_hearts", "3_of_clubs"])[0] == 9
+    assert evaluate_hand(["9_of_hearts", "9_of_clubs"],
+                         ["9_of_spades", "4_of_hearts", "4_of_clubs", "2_of_hearts", "king_of_clubs"]) == (6, [9, 4])
+    assert evaluate_hand(["ace_of_hearts", "2_of_clubs"],
+                         ["3_of_spades", "4_of_hearts", "5_of_clubs", "9_of_hearts", "king_of_clubs"]) == (4, [5])
+    assert evaluate_hand(["ace_of_hearts", "2_of_clubs"],
+                         ["7_of_spades", "9_of_hearts", "jack_of_clubs", "queen_of_hearts", "king_of_clubs"])[0] == 0
+
+def test_determine_winner():
+    """
+    Test that the better hand wins, kickers break ties and equal hands split.
+    """
+    board = ["king_of_hearts", "king_of_clubs", "7_of_spades", "4_of_diamonds", "2_of_clubs"]
+    assert determine_winner(["7_of_hearts", "3_of_clubs"], ["ace_of_hearts", "queen_of_clubs"], board) == "player"
+    assert determine_winner(["ace_of_spades", "3_of_clubs"], ["queen_of_hearts", "jack_of_clubs"], board) == "player"
+    assert determine_winner(["5_of_spades", "3_of_clubs"], ["5_of_hearts", "3_of_hearts"], board) == "tie"
+
+def test_fast_evaluator_matches_reference():
+    """
+    Test that the lookup-table evaluator orders a slice of 5-card hands and a
+    sample of 7-card hands exactly like the brute-force reference.
+    """
+    check = check_five("hand_ranks", 36)
+    check.merge(check_seven("hand_ranks", 1, 300))
+    check.check_order()
+    assert check.hands == 1365 + 300
+    assert check.failures == []
+
+def test_check_catches_a_wrong_evaluator():
+    """
+    Test that the verifier reports an evaluator that ignores kickers.
+    """
+    check = Check()
+    for cards in ([12, 25, 0, 1, 2], [12, 25, 0, 1, 3], [11, 24, 0, 1, 2]):
+        check.add(reference(cards), reference(cards)[0], cards)
+    check.check_order()
+    assert len(check.failures) == 2
+
+def test_benchmark_regressions():
+    """
+    Test that only benchmarks slower than the baseline by more than the tolerance are regressions.
+    """
+    regressions = compare({"deal": 70, "showdown": 95, "new": 1}, {"deal": 100, "showdown": 100}, tolerance=0.2)
+    assert regressions == {"deal": (70, 100)}
+
+@pytest.fixture
+def game_id(monkeypatch):
+    """
+    Fixture that creates a dealt game where the bot always calls.
+    """
+    games[1] = {
+        "name": "test", "bot_difficulty": "easy", "players": ["alice", "bot"], "game_started": True,
+        "community_cards": [], "player_hands": {}, "pot": 0, "current_bet": 0,
+        "chips": {"alice": 1000, "bot": 1000}, "bets": {"alice": 0, "bot": 0}, "round": "pre-flop"
+    }
+    monkeypatch.setattr("controllers.GameController.choose_bot_action", lambda *args: ("call", 0))
+    run_game_command(1, "alice", {"type": "deal"})
+    yield 1
+    del games[1]
+
+def test_betting_keeps_chips_balanced(game_id):
+    """
+    Test that calls and raises move chips into the pot and a fold gives it to the bot.
+    """
+    game = games[game_id]
+    assert (game["chips"]["alice"], game["chips"]["bot"], game["pot"]) == (995, 990, 15)
+
+    run_game_command(game_id, "alice", {"type": "action", "action": "call"})
+    assert (game["chips"]["alice"], game["pot"]) == (990, 20)
+    run_game_command(game_id, "alice", {"type": "action", "action": "raise", "bet_amount": 30})
+    assert game["chips"]["alice"] + game["chips"]["bot"] + game["pot"] == 2000
+    assert game["chips"]["alice"] == game["chips"]["bot"]
+
+    run_game_command(game_id, "alice", {"type": "action", "action": "fold"})
+    assert game["pot"] == 0
+    assert game["chips"]["alice"] + game["chips"]["bot"] == 2000
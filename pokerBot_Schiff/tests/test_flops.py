@@ -0,0 +1,75 @@
+import itertools
+import random
+import pytest
+from controllers.GameController import choose_bot_action
+from models import flops, tables
+from models.cards import card_code
+
+
+def flop(*names):
+    return [card_code(name) for name in names]
+
+@pytest.fixture(scope="module")
+def index():
+    """
+    Fixture that builds the flop index.
+    """
+    return tables.get_table(flops.TABLE_NAME)
+
+def test_canonical_flops(index):
+    """
+    Test that the 22,100 flops fall into 1,755 canonical flops, each listed under its own ID.
+    """
+    assert len(index.textures) == flops.CANONICAL_FLOPS
+    assert [texture.id for texture in index.textures] == list(range(flops.CANONICAL_FLOPS))
+    ids = {index.flop_id(cards) for cards in itertools.combinations(range(52), 3)}
+    assert ids == set(range(flops.CANONICAL_FLOPS))
+
+def test_suit_renaming_and_order_dont_matter(index):
+    """
+    Test that flops differing only in suits or card order share an ID, and others don't.
+    """
+    spades = flop("ace_of_spades", "king_of_spades", "2_of_hearts")
+    assert index.flop_id(spades) == index.flop_id(flop("2_of_clubs", "king_of_diamonds", "ace_of_diamonds"))
+    assert index.flop_id(spades) != index.flop_id(flop("ace_of_spades", "king_of_hearts", "2_of_spades"))
+    pair = flop("9_of_hearts", "9_of_spades", "8_of_hearts")
+    assert index.flop_id(pair) == index.flop_id(flop("9_of_clubs", "8_of_diamonds", "9_of_diamonds"))
+
+def test_textures(index):
+    """
+    Test the texture features of a few flops.
+    """
+    monotone = index.texture(flop("ace_of_hearts", "king_of_hearts", "queen_of_hearts"))
+    assert (monotone.ranks, monotone.paired, monotone.suits, monotone.connected, monotone.high_card, monotone.wet) == \
+        ((12, 11, 10), 0, flops.MONOTONE, 3, flops.ACE, True)
+    dry = index.texture(flop("king_of_hearts", "7_of_spades", "2_of_clubs"))
+    assert (dry.paired, dry.suits, dry.connected, dry.high_card, dry.wet) == (0, flops.RAINBOW, 1, flops.BROADWAY, False)
+    wheel_draw = index.texture(flop("ace_of_hearts", "4_of_spades", "3_of_hearts"))
+    assert (wheel_draw.suits, wheel_draw.connected, wheel_draw.wet) == (flops.TWO_TONE, 3, True)
+    trips = index.texture(flop("6_of_hearts", "6_of_spades", "6_of_clubs"))
+    assert (trips.paired, trips.high_card) == (2, flops.LOW)
+
+def test_invalid_flops(index):
+    """
+    Test that repeated or missing cards are refused.
+    """
+    with pytest.raises(ValueError):
+        index.flop_id([0, 0, 1])
+    with pytest.raises(ValueError):
+        index.flop_id([0, 1])
+    with pytest.raises(ValueError):
+        index.flop_id([0, 1, 52])
+
+def test_bot_reads_the_flop(monkeypatch):
+    """
+    Test that at the flop a weak hand doesn't bluff into a draw-heavy board,
+    and the hard bot doesn't fold a weak hand on a dry one.
+    """
+    monkeypatch.setattr(random, "random", lambda: 0.5)  # No random change of strategy
+    game = {"bot_difficulty": "medium"}
+    weak = ["2_of_clubs", "7_of_diamonds"]
+    wet = ["ace_of_hearts", "king_of_hearts", "queen_of_hearts"]
+    assert {choose_bot_action(game, weak, wet)[0] for _ in range(200)} == {"fold", "call"}
+    game["bot_difficulty"] = "hard"
+    dry = ["king_of_hearts", "9_of_spades", "4_of_clubs"]
+    assert {choose_bot_action(game, weak, dry)[0] for _ in range(200)} == {"call", "raise"}
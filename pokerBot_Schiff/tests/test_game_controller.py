@@ -0,0 +1,163 @@
+import random
+
+import pytest
+from controllers.GameController import games, run_game_command
+from models.cards import CARD_NAMES, card_code, card_name, encode_cards
+
+
+@pytest.fixture
+def game_id():
+    """
+    Fixture that creates a game for 'alice' against the bot and removes it afterwards.
+    """
+    random.seed(7)
+    games[1] = {
+        "name": "test",
+        "bot_difficulty": "medium",
+        "players": ["alice", "bot"],
+        "game_started": True,
+        "community_cards": [],
+        "player_hands": {},
+        "pot": 0,
+        "current_bet": 0,
+        "chips": {"alice": 1000, "bot": 1000},
+        "bets": {"alice": 0, "bot": 0},
+        "round": "pre-flop"
+    }
+    yield 1
+    del games[1]
+
+def test_card_codes():
+    """
+    Test that card codes cover the deck and round-trip.
+    """
+    assert len(CARD_NAMES) == 52
+    assert card_code("2_of_hearts") == 0
+    assert card_code("ace_of_spades") == 51
+    assert all(card_name(card_code(name)) == name for name in CARD_NAMES)
+    assert encode_cards(["queen_of_hearts", "2_of_diamonds"]) == [10, 13]
+
+def test_deal_hides_the_board(game_id):
+    """
+    Test that dealing doesn't send the face-down community cards, in either format.
+    """
+    full = run_game_command(game_id, "alice", {"type": "deal"})
+    assert full["community_cards"] == []
+
+    compact = run_game_command(game_id, "alice", {"type": "deal", "format": "compact"})
+    assert compact["b"] == []
+    assert compact["h"] == encode_cards(games[game_id]["player_hands"]["alice"])
+    assert compact["o"] == []
+
+def test_compact_sends_only_changes(game_id):
+    """
+    Test that a compact response only has the fields changed since the client's version.
+    """
+    dealt = run_game_command(game_id, "alice", {"type": "deal", "format": "compact"})
+    version = dealt["v"]
+
+    flop = run_game_command(game_id, "alice", {"type": "advance", "format": "compact", "since": version})
+    board = encode_cards(games[game_id]["community_cards"][:3])
+    assert flop["v"] == version + 1
+    assert flop["r"] == "flop"
+    assert flop["b"] == board
+    assert "h" not in flop
+    assert "c" not in flop
+
+    # An unknown version gets the full state
+    resync = run_game_command(game_id, "alice", {"type": "advance", "format": "compact", "since": 999})
+    assert resync["h"] == encode_cards(games[game_id]["player_hands"]["alice"])
+    assert resync["b"] == board + encode_cards(games[game_id]["community_cards"][3:4])
+
+def test_showdown_reveals_bot_cards(game_id):
+    """
+    Test that the bot's cards and the result are only sent at showdown.
+    """
+    run_game_command(game_id, "alice", {"type": "deal"})
+    for _ in range(3):
+        response = run_game_command(game_id, "alice", {"type": "advance", "format": "compact"})
+        assert response["o"] == []
+        assert response["w"] is None
+
+    showdown = run_game_command(game_id, "alice", {"type": "advance", "format": "compact"})
+    assert showdown["r"] == "showdown"
+    assert showdown["o"] == encode_cards(games[game_id]["player_hands"]["bot"])
+    assert showdown["w"] in ("alice", "bot", "tie")
+    assert showdown["m"]
+
+def test_action_reports_the_outcome(game_id, monkeypatch):
+    """
+    Test that a plain action tells the player whether the round or hand is over.
+    """
+    monkeypatch.setattr("controllers.GameController.choose_bot_action", lambda *args: ("call", 0))
+    run_game_command(game_id, "alice", {"type": "deal"})
+    response = run_game_command(game_id, "alice", {"type": "action", "action": "call"})
+    assert response["street_complete"]
+    assert not response["hand_over"]
+
+    response = run_game_command(game_id, "alice", {"type": "action", "action": "fold"})
+    assert response["hand_over"]
+    assert not response["street_complete"]
+
+def test_play_advances_when_the_street_closes(game_id, monkeypatch):
+    """
+    Test that a call the bot calls closes the betting round and deals the flop.
+    """
+    monkeypatch.setattr("controllers.GameController.choose_bot_action", lambda *args: ("call", 0))
+    run_game_command(game_id, "alice", {"type": "deal"})
+
+    response = run_game_command(game_id, "alice", {"type": "play", "action": "call"})
+    assert response["street_complete"]
+    assert not response["hand_over"]
+    assert response["rounds"] == ["flop"]
+    assert response["round"] == "flop"
+    assert len(response["community_cards"]) == 3
+    assert response["action_message"] == "You called $5. Bot called."
+
+def test_play_waits_after_a_reraise(game_id, monkeypatch):
+    """
+    Test that the round stays open when the bot re-raises.
+    """
+    monkeypatch.setattr("controllers.GameController.choose_bot_action", lambda *args: ("raise", 20))
+    run_game_command(game_id, "alice", {"type": "deal"})
+
+    response = run_game_command(game_id, "alice", {"type": "play", "action": "raise", "bet_amount": 10})
+    assert not response["street_complete"]
+    assert response["rounds"] == []
+    assert response["round"] == "pre-flop"
+    assert response["current_bet"] == 40
+
+def test_play_runs_out_the_board_when_all_in(game_id, monkeypatch):
+    """
+    Test that an all-in call deals every remaining street through showdown.
+    """
+    monkeypatch.setattr("controllers.GameController.choose_bot_action", lambda *args: ("call", 0))
+    run_game_command(game_id, "alice", {"type": "deal"})
+
+    response = run_game_command(game_id, "alice", {"type": "play", "action": "raise", "bet_amount": 5000})
+    assert response["rounds"] == ["flop", "turn", "river", "showdown"]
+    assert response["hand_over"]
+    assert response["winner"] in ("alice", "bot", "tie")
+
+def test_script(game_id, monkeypatch):
+    """
+    Test that a script plays a whole hand and stops once it is over.
+    """
+    monkeypatch.setattr("controllers.GameController.choose_bot_action", lambda *args: ("call", 0))
+
+    response = run_game_command(game_id, "alice", {"type": "script", "script": "deal, call, call, call, call, call"})
+    assert response["steps"] == 5
+    assert response["results"][-1]["round"] == "showdown"
+
+    compact = run_game_command(game_id, "alice", {"type": "script", "script": ["deal", "fold"], "format": "compact"})
+    assert compact["n"] == 2
+    assert compact["ho"]
+
+@pytest.mark.parametrize("script", ["", "deal,check", "call:10", "raise:lots", ",".join(["call"] * 21)])
+def test_invalid_script(game_id, script):
+    """
+    Test that invalid scripts are rejected before any step runs.
+    """
+    response = run_game_command(game_id, "alice", {"type": "script", "script": script})
+    assert "error" in response
+    assert games[game_id]["player_hands"] == {}
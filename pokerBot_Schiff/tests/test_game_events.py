@@ -0,0 +1,79 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from models.game_events import Game_Events
+
+
+@pytest.fixture(autouse=True)
+def clear_subscribers():
+    """
+    Fixture that leaves no subscriptions behind between tests.
+    """
+    yield
+    Game_Events._subscribers.clear()
+
+def test_publish_reaches_every_watcher():
+    """
+    Test that an event is delivered once to each watcher of the game only.
+    """
+    first = Game_Events.subscribe(1, "alice")
+    second = Game_Events.subscribe(1, "bob")
+    other_game = Game_Events.subscribe(2, "carol")
+
+    assert Game_Events.publish(1, {"type": "deal", "pot": 15}) == 2
+    assert json.loads(first.get(timeout=0)) == {"type": "deal", "pot": 15}
+    assert json.loads(second.get(timeout=0)) == {"type": "deal", "pot": 15}
+    assert other_game.get(timeout=0) is None
+
+def test_publish_skips_origin():
+    """
+    Test that the watcher who caused an event doesn't receive it back.
+    """
+    origin = Game_Events.subscribe(1, "alice")
+    watcher = Game_Events.subscribe(1, "bob")
+
+    assert Game_Events.publish(1, {"type": "advance"}, origin=origin) == 1
+    assert origin.get(timeout=0) is None
+    assert watcher.get(timeout=0) is not None
+
+def test_unsubscribe():
+    """
+    Test that unsubscribed watchers stop receiving events.
+    """
+    subscription = Game_Events.subscribe(1, "alice")
+    assert Game_Events.watcher_count(1) == 1
+
+    Game_Events.unsubscribe(subscription)
+    assert subscription.closed
+    assert Game_Events.watcher_count(1) == 0
+    assert Game_Events.publish(1, {"type": "deal"}) == 0
+
+def test_slow_watcher_is_dropped():
+    """
+    Test that a watcher whose queue overflows is closed and unsubscribed.
+    """
+    slow = Game_Events.subscribe(1, "alice")
+    for _ in range(256):
+        Game_Events.publish(1, {"type": "action"})
+    assert not slow.closed
+
+    assert Game_Events.publish(1, {"type": "action"}) == 0
+    assert slow.closed
+    assert Game_Events.watcher_count(1) == 0
+
+def test_get_async_wakes_on_publish():
+    """
+    Test that an asyncio watcher is woken by an event published from another thread.
+    """
+    subscription = Game_Events.subscribe(1, "alice")
+
+    async def run():
+        waiting = asyncio.ensure_future(subscription.get_async(timeout=5))
+        await asyncio.sleep(0.01)
+        threading.Thread(target=Game_Events.publish, args=(1, {"type": "deal"})).start()
+        return await waiting
+
+    assert json.loads(asyncio.run(run())) == {"type": "deal"}
+    assert asyncio.run(subscription.get_async(timeout=0.01)) is None
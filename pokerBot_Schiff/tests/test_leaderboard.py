@@ -0,0 +1,178 @@
+import random
+
+import pytest
+from controllers.GameController import games, run_game_command, settle_hand
+from models.leaderboard import Leaderboard, Rank_Index
+from models.user_model import User, User_Model
+
+
+def player(username, bankroll, hands_played=0, hands_won=0):
+    """
+    Returns a user with the given results.
+    """
+    return User(id=0, username=username, email="", password="", bankroll=bankroll,
+                hands_played=hands_played, hands_won=hands_won)
+
+def test_rank_index_matches_sorting():
+    """
+    Test that the skip list stays in key order through random inserts and
+    removals, with the right ranks and slices.
+    """
+    random.seed(7)
+    index = Rank_Index()
+    keys = {}
+    for _ in range(5000):
+        name = f"player{random.randrange(300)}"
+        if name in keys:
+            index.remove(keys.pop(name))
+        if random.random() < 0.8:
+            keys[name] = (-random.randrange(2000), name)
+            index.insert(keys[name], name)
+    ordered = sorted(keys.values())
+    assert len(index) == len(ordered)
+    assert [key for key, _ in index.slice(0, len(ordered))] == ordered
+    for place in (0, 17, len(ordered) - 1):
+        assert index.rank(ordered[place]) == place + 1
+        assert index.slice(place, 3)[0][0] == ordered[place]
+    assert index.slice(len(ordered), 5) == []
+    with pytest.raises(KeyError):
+        index.remove((1, "missing"))
+
+def test_leaderboard_updates_incrementally():
+    """
+    Test that the leaderboard is built once from the store and then moves
+    players as their results come in.
+    """
+    loads = []
+    board = Leaderboard(loader=lambda: loads.append(1) or [player("ann", 900), player("bob", 1200), player("cy", 1000)],
+                        max_age=0)
+    assert [row["username"] for row in board.top(3)] == ["bob", "cy", "ann"]
+    board.update(player("ann", 1500, 4, 3))
+    assert board.top(1) == [{"rank": 1, "username": "ann", "bankroll": 1500, "hands_played": 4, "hands_won": 3}]
+    assert board.rank("cy") == 3 and board.rank("nobody") is None
+    assert [row["rank"] for row in board.top(2, offset=1)] == [2, 3]
+    board.remove("bob")
+    assert len(board) == 2
+    assert loads == [1]
+
+def test_leaderboard_rebuilds_when_stale():
+    """
+    Test that the ranking is rebuilt from the store once it is older than max_age.
+    """
+    now = [0.0]
+    users = [player("ann", 1000)]
+    board = Leaderboard(loader=lambda: list(users), max_age=60, clock=lambda: now[0])
+    assert len(board) == 1
+    users.append(player("bob", 2000))
+    assert len(board) == 1
+    now[0] = 61
+    assert board.top(1)[0]["username"] == "bob"
+
+def test_hands_are_settled_once(monkeypatch):
+    """
+    Test that a finished hand is recorded on the player's record and moves
+    them on the leaderboard, once.
+    """
+    recorded = []
+    monkeypatch.setattr(User_Model, "record_result",
+                        lambda username, chips: recorded.append((username, chips)) or player(username, 1000 + chips))
+    board = Leaderboard(loader=lambda: [player("carol", 1000), player("dave", 1010)])
+    monkeypatch.setattr("controllers.GameController.LEADERBOARD", board)
+    game_id = 99999
+    monkeypatch.setitem(games, game_id, {
+        "bot_difficulty": "easy", "players": ["carol", "bot"], "community_cards": [], "player_hands": {},
+        "pot": 0, "current_bet": 0, "chips": {"carol": 1000, "bot": 1000}, "bets": {"carol": 0, "bot": 0},
+        "round": "pre-flop",
+    })
+    board.top()
+    run_game_command(game_id, "carol", {"type": "deal"})
+    run_game_command(game_id, "carol", {"type": "action", "action": "fold"})
+    assert recorded == [("carol", -5)]
+    settle_hand(games[game_id], "carol")
+    assert len(recorded) == 1
+    assert board.top(1)[0]["username"] == "dave"
+
+def test_abandoned_hands_are_settled(monkeypatch):
+    """
+    Test that dealing again mid-hand records the chips already put in, so
+    re-dealing can't dodge a loss.
+    """
+    recorded = []
+    monkeypatch.setattr(User_Model, "record_result",
+                        lambda username, chips: recorded.append((username, chips)) or None)
+    game_id = 99998
+    monkeypatch.setitem(games, game_id, {
+        "bot_difficulty": "easy", "players": ["erin", "bot"], "community_cards": [], "player_hands": {},
+        "pot": 0, "current_bet": 0, "chips": {"erin": 1000, "bot": 1000}, "bets": {"erin": 0, "bot": 0},
+        "round": "pre-flop",
+    })
+    for _ in range(3):
+        run_game_command(game_id, "erin", {"type": "deal"})
+    assert recorded == [("erin", -5), ("erin", -5)]
+    assert games[game_id]["chips"]["erin"] == 1000 - 15
+
+def test_walking_away_settles_open_hands(monkeypatch):
+    """
+    Test that starting another game or logging out records the chips already
+    put into an unfinished hand.
+    """
+    from server import app
+    recorded = []
+    monkeypatch.setattr(User_Model, "record_result",
+                        lambda username, chips: recorded.append((username, chips)) or None)
+    monkeypatch.setattr(User_Model, "get", lambda username: player(username, 1000))
+    game_id = 99997
+    monkeypatch.setitem(games, game_id, {
+        "bot_difficulty": "easy", "players": ["henry", "bot"], "community_cards": [], "player_hands": {},
+        "pot": 0, "current_bet": 0, "chips": {"henry": 1000, "bot": 1000}, "bets": {"henry": 0, "bot": 0},
+        "round": "pre-flop",
+    })
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["username"] = "henry"
+
+    run_game_command(game_id, "henry", {"type": "deal"})
+    client.post("/start_game", data={"game_name": "Table", "bot_difficulty": "easy"})
+    with client.session_transaction() as session:
+        games.pop(session["game_id"])
+    assert recorded == [("henry", -5)]
+
+    run_game_command(game_id, "henry", {"type": "deal"})
+    client.get("/logout")
+    assert recorded == [("henry", -5), ("henry", -5)]
+
+def test_games_start_from_the_bankroll(monkeypatch):
+    """
+    Test that a new game seats the player with their bankroll, and that a
+    player with no chips left can't start one.
+    """
+    from server import app
+    bankrolls = {"frank": 250, "grace": 0}
+    monkeypatch.setattr(User_Model, "get", lambda username: player(username, bankrolls[username]))
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["username"] = "frank"
+    assert client.post("/start_game", data={"game_name": "Table", "bot_difficulty": "easy"}).status_code == 302
+    with client.session_transaction() as session:
+        game = games.pop(session["game_id"])
+    assert game["chips"] == {"frank": 250, "bot": 1000}
+
+    with client.session_transaction() as session:
+        session["username"] = "grace"
+    assert client.post("/start_game", data={"game_name": "Table", "bot_difficulty": "easy"}).status_code == 403
+
+def test_leaderboard_endpoint(monkeypatch):
+    """
+    Test that /api/leaderboard pages through the ranking and includes the
+    logged-in player's rank.
+    """
+    from server import app
+    board = Leaderboard(loader=lambda: [player(f"user{n}", 1000 + n) for n in range(30)])
+    monkeypatch.setattr("controllers.GameController.LEADERBOARD", board)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["username"] = "user25"
+    data = client.get("/api/leaderboard?limit=5&offset=2").json
+    assert [row["username"] for row in data["leaders"]] == ["user27", "user26", "user25", "user24", "user23"]
+    assert data["leaders"][0]["rank"] == 3
+    assert data["players"] == 30 and data["rank"] == 5
@@ -0,0 +1,32 @@
+from loadtest import Flask_Transport, in_process_app, percentile, run_load
+from models.passwords import Password_Hasher
+from models.user_model import User_Model
+
+
+def test_percentile():
+    """
+    Test that percentiles use the nearest rank.
+    """
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([3.0], 0.95) == 3.0
+    assert percentile([], 0.5) == 0.0
+
+def test_in_process_run(monkeypatch):
+    """
+    Test that virtual users play through the whole flow without errors, and
+    that the run leaves the real user store alone.
+    """
+    monkeypatch.setattr(User_Model, "_hasher", Password_Hasher(n=2 ** 4, r=1))
+    storage = User_Model._storage
+    with in_process_app() as app:
+        stats = run_load(lambda: Flask_Transport(app), users=3, hands=4, think=0, seed=5)
+    assert User_Model._storage is storage
+
+    report = stats.report()
+    assert report["hands"] == 12
+    assert report["error_rate"] == 0
+    assert report["endpoints"]["POST /register"]["requests"] == 3
+    for endpoint in ("deal", "action", "advance"):
+        assert report["endpoints"][f"POST /api/game/<id>/{endpoint}"]["requests"] > 0
@@ -0,0 +1,107 @@
+import pytest
+from models import metrics
+from server import app
+
+
+@pytest.fixture
+def registry():
+    """
+    Fixture that removes the metrics a test registers.
+    """
+    names = set(metrics._registry)
+    yield
+    for name in set(metrics._registry) - names:
+        del metrics._registry[name]
+
+def test_counter_and_gauge(registry):
+    """
+    Test that counters and gauges render one sample per label set.
+    """
+    counter = metrics.Counter("test_events_total", "Events.", ["kind"])
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    counter.inc('say "hi"')
+    gauge = metrics.Gauge("test_depth", "Depth.", function=lambda: 7)
+
+    text = metrics.render()
+    assert "# TYPE test_events_total counter" in text
+    assert 'test_events_total{kind="a"} 3' in text
+    assert 'test_events_total{kind="say \\"hi\\""} 1' in text
+    assert "test_depth 7" in text
+
+def test_histogram_buckets(registry):
+    """
+    Test that histogram buckets are cumulative and end with +Inf, count and sum.
+    """
+    histogram = metrics.Histogram("test_seconds", "Durations.", ["op"], buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 3):
+        histogram.observe(value, "x")
+
+    lines = histogram.samples()
+    assert lines == [
+        'test_seconds_bucket{op="x",le="0.1"} 1',
+        'test_seconds_bucket{op="x",le="1"} 3',
+        'test_seconds_bucket{op="x",le="+Inf"} 4',
+        'test_seconds_count{op="x"} 4',
+        'test_seconds_sum{op="x"} 4.05',
+    ]
+
+def test_timer_decorator(registry):
+    """
+    Test that a timed function records one observation per call and still returns its result.
+    """
+    histogram = metrics.Histogram("test_call_seconds", "Calls.", ["op"])
+
+    @histogram.time("double")
+    def double(value):
+        return value * 2
+
+    assert double(2) == 4
+    assert double(3) == 6
+    assert histogram.count("double") == 2
+
+def test_duplicate_name_is_refused(registry):
+    """
+    Test that a metric name can only be registered once.
+    """
+    metrics.Counter("test_once_total", "Once.")
+    with pytest.raises(ValueError):
+        metrics.Counter("test_once_total", "Twice.")
+
+def test_metrics_route():
+    """
+    Test that requests are timed and counted per route and exposed on /metrics.
+    """
+    client = app.test_client()
+    before = metrics.REQUESTS.value("login", "200")
+    client.get("/login")
+
+    assert metrics.REQUESTS.value("login", "200") == before + 1
+    assert metrics.REQUESTS_IN_FLIGHT.value("login") == 0
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+    assert 'poker_request_duration_seconds_count{route="login",method="GET"}' in text
+    assert 'poker_requests_in_flight{route="metrics"} 1' in text
+
+def test_failed_requests_are_counted_once(monkeypatch):
+    """
+    Test that a request whose view raises is counted once as a 500, whether
+    Flask handles the exception or lets it propagate.
+    """
+    def broken(game_id):
+        raise RuntimeError("broken view")
+    monkeypatch.setitem(app.view_functions, "deal_cards", broken)
+    client = app.test_client()
+    before = metrics.REQUESTS.value("deal_cards", "500")
+
+    monkeypatch.setitem(app.config, "PROPAGATE_EXCEPTIONS", False)
+    assert client.post("/api/game/1234/deal").status_code == 500
+    assert metrics.REQUESTS.value("deal_cards", "500") == before + 1
+
+    monkeypatch.setitem(app.config, "PROPAGATE_EXCEPTIONS", True)
+    with pytest.raises(RuntimeError):
+        client.post("/api/game/1234/deal")
+    assert metrics.REQUESTS.value("deal_cards", "500") == before + 2
+    assert metrics.REQUESTS_IN_FLIGHT.value("deal_cards") == 0
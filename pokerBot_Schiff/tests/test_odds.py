@@ -0,0 +1,101 @@
+import pytest
+from controllers.GameController import games, odds_cache, run_game_command
+from models import metrics
+from models.cards import card_code, encode_cards
+from models.odds import equity, outs
+from server import app
+
+
+def codes(*names):
+    return [card_code(name) for name in names]
+
+def test_river_equity_is_exact():
+    """
+    Test that on the river every opponent hand is enumerated.
+    """
+    result = equity(codes("ace_of_spades", "king_of_spades"),
+                    codes("queen_of_spades", "jack_of_spades", "10_of_spades", "2_of_hearts", "3_of_clubs"))
+    assert result["method"] == "exact"
+    assert result["deals"] == 990
+    assert result["equity"] == 1.0
+
+def test_turn_equity_is_exact(monkeypatch):
+    """
+    Test that on the turn every river and opponent hand is enumerated, with
+    the same result with and without NumPy.
+    """
+    hole, board = codes("ace_of_spades", "ace_of_hearts"), codes("king_of_clubs", "7_of_hearts", "2_of_spades", "9_of_diamonds")
+    result = equity(hole, board)
+    assert result["method"] == "exact"
+    assert result["deals"] == 46 * 990
+    monkeypatch.setattr("models.odds.numpy", None)
+    assert equity(hole, board) == result
+
+def test_preflop_equity_is_sampled():
+    """
+    Test that preflop equity is sampled, repeatable and about right for aces.
+    """
+    first = equity(codes("ace_of_spades", "ace_of_hearts"), [])
+    assert first["method"] == "sampled"
+    assert first == equity(codes("ace_of_spades", "ace_of_hearts"), [])
+    assert 0.82 < first["equity"] < 0.88
+    assert first["win"] + first["tie"] + first["lose"] == pytest.approx(1)
+
+def test_invalid_cards():
+    """
+    Test that repeated cards are refused.
+    """
+    with pytest.raises(ValueError):
+        equity(codes("ace_of_spades", "ace_of_spades"), [])
+
+def test_outs():
+    """
+    Test that a flush draw with two overcards has 15 outs, not counting cards that pair the board.
+    """
+    found = outs(codes("ace_of_hearts", "king_of_hearts"), codes("2_of_hearts", "7_of_hearts", "queen_of_clubs"))
+    assert len(found) == 15
+    assert card_code("queen_of_hearts") in found  # Completes the flush
+    assert card_code("queen_of_spades") not in found  # Only pairs the board
+    assert outs(codes("ace_of_hearts", "king_of_hearts"), []) == []
+
+@pytest.fixture
+def client():
+    """
+    Fixture that logs 'alice' in to a game with a hand dealt.
+    """
+    games[1] = {
+        "name": "test", "bot_difficulty": "easy", "players": ["alice", "bot"], "game_started": True,
+        "community_cards": [], "player_hands": {}, "pot": 0, "current_bet": 0,
+        "chips": {"alice": 1000, "bot": 1000}, "bets": {"alice": 0, "bot": 0}, "round": "pre-flop"
+    }
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["username"] = "alice"
+    yield client
+    del games[1]
+    odds_cache.clear()
+
+def test_odds_route_caches_per_street(client):
+    """
+    Test that odds are computed once per street, from the player's cards and
+    the revealed board only, and recomputed after an advance.
+    """
+    assert client.get("/api/game/1/odds").status_code == 409
+    run_game_command(1, "alice", {"type": "deal"})
+
+    misses = metrics.CACHE_LOOKUPS.value("odds", "miss")
+    hits = metrics.CACHE_LOOKUPS.value("odds", "hit")
+    preflop = client.get("/api/game/1/odds").json
+    assert client.get("/api/game/1/odds").json == preflop
+    assert metrics.CACHE_LOOKUPS.value("odds", "miss") == misses + 1
+    assert metrics.CACHE_LOOKUPS.value("odds", "hit") == hits + 1
+    assert preflop["round"] == "pre-flop"
+    assert preflop["equity"] == equity(encode_cards(games[1]["player_hands"]["alice"]), [])["equity"]
+
+    run_game_command(1, "alice", {"type": "advance"})
+    assert 1 not in odds_cache
+    flop = client.get("/api/game/1/odds").json
+    assert flop["round"] == "flop"
+    board = encode_cards(games[1]["community_cards"][:3])
+    assert flop["equity"] == equity(encode_cards(games[1]["player_hands"]["alice"]), board)["equity"]
+    assert flop["out_count"] == len(flop["outs"])
@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+from models.passwords import HasherBusyError, Password_Hasher, is_hashed
+
+
+@pytest.fixture
+def hasher():
+    """
+    Fixture that returns a hasher with a cheap cost so the tests stay fast.
+    """
+    return Password_Hasher(n=2 ** 4, r=1, workers=2)
+
+def test_hash_and_verify(hasher):
+    """
+    Test that a hash verifies its own password and no other.
+    """
+    stored = hasher.hash("secret")
+    assert is_hashed(stored)
+    assert stored.startswith("scrypt$16$1$1$")
+    assert hasher.verify("secret", stored)
+    assert not hasher.verify("Secret", stored)
+
+def test_hashes_are_salted(hasher):
+    """
+    Test that hashing the same password twice gives different hashes.
+    """
+    assert hasher.hash("secret") != hasher.hash("secret")
+
+def test_verify_plaintext_and_missing_user(hasher):
+    """
+    Test that legacy plaintext passwords still verify and that a missing
+    stored password never does.
+    """
+    assert hasher.verify("secret", "secret")
+    assert not hasher.verify("secret", "other")
+    assert not hasher.verify("secret", None)
+
+def test_malformed_hashes(hasher):
+    """
+    Test that plaintext passwords shaped like a hash and damaged hashes fail
+    (or match) cleanly instead of raising.
+    """
+    lookalike = "scrypt$a$b$c$d$e"
+    assert not is_hashed(lookalike)
+    assert hasher.verify(lookalike, lookalike)
+    assert not hasher.verify("secret", lookalike)
+    assert hasher.needs_rehash(lookalike)
+
+    salt, digest = hasher.hash("secret").split("$")[4:]
+    assert not hasher.verify("secret", f"scrypt$16$1$1${salt}$not base64!")
+    assert not hasher.verify("secret", f"scrypt$3$1$1${salt}${digest}")  # n must be a power of two
+
+def test_needs_rehash(hasher):
+    """
+    Test that plaintext and outdated hashes need rehashing.
+    """
+    assert hasher.needs_rehash("secret")
+    assert not hasher.needs_rehash(hasher.hash("secret"))
+    assert Password_Hasher(n=2 ** 5, r=1).needs_rehash(hasher.hash("secret"))
+
+def test_hash_many(hasher):
+    """
+    Test that a batch is hashed in order.
+    """
+    hashes = hasher.hash_many(["a", "b", "c"])
+    assert [hasher.verify(password, stored) for password, stored in zip("abc", hashes)] == [True] * 3
+
+def test_full_queue_is_rejected():
+    """
+    Test that jobs beyond the queue limit are rejected and counted.
+    """
+    hasher = Password_Hasher(n=2 ** 4, r=1, workers=1, max_queue=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait()
+
+    worker = threading.Thread(target=hasher._run, args=(block,))
+    worker.start()
+    started.wait()
+    waiting = threading.Thread(target=hasher.hash, args=("queued",))
+    waiting.start()
+    while hasher.metrics()["queued"] < 1:
+        pass
+    with pytest.raises(HasherBusyError):
+        hasher.hash("rejected")
+    release.set()
+    worker.join()
+    waiting.join()
+
+    metrics = hasher.metrics()
+    assert metrics["rejected"] == 1
+    assert metrics["completed"] == 2
+    assert metrics["queued"] == 0 and metrics["running"] == 0
+
+@pytest.mark.parametrize("path", ["/validate_login", "/register"])
+def test_busy_hasher_gets_503(path, monkeypatch):
+    """
+    Test that logging in and registering answer 503 with Retry-After when the
+    hashing queue is full.
+    """
+    from models import admission
+    from models.user_model import User_Model
+    from server import app
+
+    def busy(*args):
+        raise HasherBusyError("Too many password checks in progress.")
+    monkeypatch.setattr(admission, "_enabled", False)
+    monkeypatch.setattr(User_Model, "authenticate", busy)
+    monkeypatch.setattr(User_Model, "hash_password", busy)
+    response = app.test_client().post(path, data={"username": "busy", "email": "busy@example.com", "password": "secret"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert b"The server is busy" in response.data
@@ -0,0 +1,77 @@
+import pytest
+from models.profiler import PROFILER, Request_Profiler
+from server import app
+
+
+@pytest.fixture
+def profiler():
+    """
+    Fixture that turns the app's profiler off and empties it after the test.
+    """
+    yield PROFILER
+    PROFILER.configure(rate=0, routes=())
+    PROFILER.reset()
+    app.config['ADMIN_TOKEN'] = None
+
+def inner():
+    return sorted(range(1000), reverse=True)
+
+def outer():
+    return inner()[0]
+
+def test_collapsed_stacks(tmp_path):
+    """
+    Test that a profiled call is recorded with its full stack and written to disk.
+    """
+    profiler = Request_Profiler(rate=1, directory=str(tmp_path))
+    assert profiler.start("play")
+    for _ in range(50):
+        outer()
+    profiler.stop()
+
+    stacks = dict(line.rsplit(" ", 1) for line in profiler.collapsed().splitlines())
+    assert any(stack.startswith("route:play;") and stack.endswith(f"{__name__}:outer;{__name__}:inner;builtins:sorted")
+               for stack in stacks)
+    assert profiler.collapsed(route="other") == ""
+    path = profiler.flush()
+    with open(path) as f:
+        assert f.read() == profiler.collapsed()
+
+def test_sampling_settings():
+    """
+    Test that requests are only profiled for the selected routes at a nonzero rate.
+    """
+    profiler = Request_Profiler(rate=0, routes=["play"])
+    assert not profiler.start("play")
+    profiler.configure(rate=1)
+    assert not profiler.start("deal_cards")
+    assert profiler.start("play")
+    profiler.stop()
+    assert profiler.profiled == 1
+    with pytest.raises(ValueError):
+        profiler.configure(rate=2)
+
+def test_admin_profile_route(profiler):
+    """
+    Test that the sampling rate can be changed at runtime and the profile read back.
+    """
+    client = app.test_client()
+    response = client.post("/admin/profile", json={"rate": 1, "routes": "login"})
+    assert response.json["rate"] == 1
+    assert response.json["routes"] == ["login"]
+    client.get("/login")
+
+    profile = client.get("/admin/profile?route=login&reset=1").get_data(as_text=True)
+    assert "route:login;" in profile
+    assert "render_template" in profile
+    assert PROFILER.profiled == 0
+    assert client.post("/admin/profile", json={"rate": -1}).status_code == 400
+
+def test_admin_token(profiler):
+    """
+    Test that a configured admin token is required on the admin routes.
+    """
+    app.config['ADMIN_TOKEN'] = "s3cret"
+    client = app.test_client()
+    assert client.get("/admin/profile").status_code == 403
+    assert client.get("/admin/profile", headers={"X-Admin-Token": "s3cret"}).status_code == 200
@@ -0,0 +1,99 @@
+import random
+import pytest
+from controllers.GameController import games, run_game_command
+from models import hand_ranks, ranges, tables
+from models.cards import card_code
+from models.odds import equity
+
+numpy = pytest.importorskip("numpy")
+
+
+def codes(*names):
+    return [card_code(name) for name in names]
+
+def test_evaluate_many_matches_evaluate():
+    """
+    Test that the batch evaluator scores 5, 6 and 7 card hands like evaluate.
+    """
+    evaluator = tables.get_table(hand_ranks.TABLE_NAME)
+    rng = random.Random(0)
+    for size in (5, 6, 7):
+        hands = [rng.sample(range(52), size) for _ in range(2000)]
+        assert evaluator.evaluate_many(numpy.array(hands)).tolist() == [evaluator.evaluate(hand) for hand in hands]
+
+def test_card_masks():
+    """
+    Test that every card is in 51 combinations and every combination holds two cards.
+    """
+    range_tables = tables.get_table(ranges.TABLE_NAME)
+    assert (range_tables.card_masks.sum(axis=1) == 51).all()
+    assert (range_tables.card_masks.sum(axis=0) == 2).all()
+    assert range_tables.dead_mask([0, 1]).sum() == 101
+
+def test_uniform_range_equity():
+    """
+    Test that on the river, equity against the uniform range is the exact equity
+    against a random hand, and earlier streets come close.
+    """
+    hole = codes("ace_of_spades", "ace_of_hearts")
+    board = codes("2_of_clubs", "7_of_diamonds", "king_of_hearts", "9_of_spades", "3_of_hearts")
+    player_range = ranges.Player_Range()
+    assert player_range.equity(hole, board) == pytest.approx(equity(hole, board)["equity"])
+    assert player_range.equity(hole, board[:3]) == pytest.approx(equity(hole, board[:3])["equity"], abs=0.03)
+    assert player_range.equity(hole, []) == player_range.equity(hole, [])
+
+def test_single_hand_range():
+    """
+    Test that a range of one hand is beaten or not, and removed when its cards are dead.
+    """
+    board = codes("2_of_clubs", "7_of_diamonds", "king_of_hearts", "9_of_spades", "3_of_hearts")
+    weights = numpy.zeros(ranges.COMBOS)
+    sevens = sorted(codes("7_of_spades", "7_of_hearts"))
+    weights[tables.get_table(ranges.TABLE_NAME).combos.tolist().index(sevens)] = 1
+    player_range = ranges.Player_Range(weights)
+    assert player_range.equity(codes("ace_of_spades", "ace_of_hearts"), board) == 0
+    assert player_range.equity(codes("king_of_spades", "king_of_clubs"), board) == 1
+    with pytest.raises(ValueError):
+        player_range.equity(codes("7_of_spades", "ace_of_hearts"), board)
+
+def test_narrowing():
+    """
+    Test that raises shift the range towards strong hands, more than calls do.
+    """
+    range_tables = tables.get_table(ranges.TABLE_NAME)
+    combos = range_tables.combos.tolist()
+    aces = combos.index(sorted(codes("ace_of_spades", "ace_of_hearts")))
+    trash = combos.index(sorted(codes("7_of_spades", "2_of_hearts")))
+    called, raised = ranges.Player_Range(), ranges.Player_Range()
+    called.narrow("call", [])
+    raised.narrow("raise", [])
+    assert raised.weights[aces] / raised.weights[trash] > called.weights[aces] / called.weights[trash] > 1
+    raised.narrow("fold", [])
+    assert raised.weights[trash] > 0
+
+    hole = codes("queen_of_spades", "queen_of_clubs")
+    assert raised.equity(hole, []) < ranges.Player_Range().equity(hole, [])
+
+@pytest.fixture
+def game_id():
+    """
+    Fixture that creates a game against the hard bot.
+    """
+    games[1] = {
+        "name": "test", "bot_difficulty": "hard", "players": ["alice", "bot"], "game_started": True,
+        "community_cards": [], "player_hands": {}, "pot": 0, "current_bet": 0,
+        "chips": {"alice": 1000, "bot": 1000}, "bets": {"alice": 0, "bot": 0}, "round": "pre-flop"
+    }
+    yield 1
+    del games[1]
+
+def test_actions_narrow_the_game_range(game_id):
+    """
+    Test that each hand starts with a uniform range that the player's actions narrow.
+    """
+    run_game_command(game_id, "alice", {"type": "deal"})
+    assert (games[game_id]["player_range"].weights == 1).all()
+    run_game_command(game_id, "alice", {"type": "action", "action": "raise", "bet_amount": 20})
+    assert games[game_id]["player_range"].weights.min() < 1
+    run_game_command(game_id, "alice", {"type": "deal"})
+    assert (games[game_id]["player_range"].weights == 1).all()
@@ -0,0 +1,154 @@
+import threading
+import time
+
+import pytest
+from controllers.GameController import (SHOWCASE_SEAT, create_bot_table, games, run_game_command,
+                                        showcase_step, start_bot_tables)
+from models.admission import Work_Queue
+from models.game_events import Game_Events
+from models.scheduler import SCHEDULER, Table_Scheduler
+
+
+class Clock:
+    """
+    A clock the tests move by hand.
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def scheduler():
+    """
+    Fixture that returns a scheduler on a hand-moved clock.
+    """
+    return Table_Scheduler(idle_interval=5, clock=Clock())
+
+def test_round_robin(scheduler):
+    """
+    Test that tables that are all due take turns, each going behind the
+    others once it has stepped.
+    """
+    played = []
+    for table in "abc":
+        scheduler.add(table, lambda table=table: played.append(table) or 0)
+    assert scheduler.run_pending(limit=4) == 4
+    assert played == ["a", "b", "c", "a"]
+    scheduler.run_pending(limit=3)
+    assert played[4:] == ["b", "c", "a"]
+
+def test_pacing_and_stopping(scheduler):
+    """
+    Test that a table steps again after the delay it asks for, and is dropped
+    when it returns None, is removed, or fails.
+    """
+    steps = []
+    scheduler.add("paced", lambda: steps.append(scheduler.clock.now) or (2 if len(steps) < 3 else None))
+    scheduler.add("broken", lambda: 1 / 0)
+    for now in range(8):
+        scheduler.clock.now = now
+        scheduler.run_pending()
+    assert steps == [0, 2, 4]
+    assert len(scheduler) == 0
+    scheduler.add("removed", lambda: steps.append("removed"))
+    scheduler.remove("removed")
+    scheduler.run_pending()
+    assert "removed" not in steps
+
+def test_unwatched_tables_pause(scheduler):
+    """
+    Test that an inactive table is only checked every idle interval, and
+    plays again once it is active.
+    """
+    watched = []
+    played = []
+    scheduler.add("table", lambda: played.append(scheduler.clock.now) or 1, active=lambda: bool(watched))
+    scheduler.run_pending()
+    assert played == [] and scheduler.stats()["paused"] == 1
+    scheduler.clock.now = 1
+    assert scheduler.run_pending() == 0
+    watched.append("spectator")
+    scheduler.clock.now = 5
+    scheduler.run_pending()
+    assert played == [5] and scheduler.stats()["paused"] == 0
+
+def test_scheduler_thread():
+    """
+    Test that the scheduler thread runs tables added after it started.
+    """
+    scheduler = Table_Scheduler()
+    scheduler.start()
+    stepped = threading.Event()
+    scheduler.add("table", lambda: stepped.set())
+    assert stepped.wait(5)
+    scheduler.stop(5)
+    assert not scheduler._thread.is_alive()
+
+def test_showcase_table_plays_hands():
+    """
+    Test that a showcase table deals, lets both bots act until the hand is
+    over, publishes its events and can't be played by anyone else.
+    """
+    game_id = create_bot_table("Showcase", "hard", "easy")
+    subscription = Game_Events.subscribe(game_id)
+    try:
+        assert showcase_step(game_id, action_seconds=1, hand_seconds=3) == 1
+        assert len(games[game_id]["player_hands"][SHOWCASE_SEAT]) == 2
+        for _ in range(50):
+            if showcase_step(game_id, action_seconds=1, hand_seconds=3) == 3:
+                break
+        assert games[game_id]["hand_over"]
+        assert sum(games[game_id]["chips"].values()) == 2000
+        assert subscription.get(timeout=0) is not None
+    finally:
+        Game_Events.unsubscribe(subscription)
+    assert "error" in run_game_command(game_id, "someone", {"type": "deal"})
+    assert "error" in run_game_command(game_id, SHOWCASE_SEAT, {"type": "deal"})
+    del games[game_id]
+    assert showcase_step(game_id) is None
+
+def test_showcase_table_backs_off_when_busy(monkeypatch):
+    """
+    Test that a showcase table doesn't wait for a work queue slot, but comes
+    back once one may be free.
+    """
+    queue = Work_Queue(slots=1, max_wait=5)
+    monkeypatch.setattr("controllers.GameController.BOT_WORK", queue)
+    game_id = create_bot_table("Showcase", "easy", "easy")
+    try:
+        showcase_step(game_id, action_seconds=1)
+        with queue.admit():
+            start = time.monotonic()
+            assert showcase_step(game_id, action_seconds=1) >= 1
+            assert time.monotonic() - start < 1
+        assert not games[game_id]["hand_over"]
+    finally:
+        del games[game_id]
+
+def test_bot_tables_endpoint(monkeypatch):
+    """
+    Test that the lobby lists the showcase tables, their pairings and how
+    many people watch each, and that creating them doesn't start the scheduler.
+    """
+    from server import app, start_background_work
+    started = []
+    monkeypatch.setattr(SCHEDULER, "start", lambda: started.append(True))
+    game_ids = start_bot_tables(2)
+    try:
+        assert not started  # Only the process that serves starts the scheduler
+        start_background_work()
+        assert started
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["username"] = "spectator"
+        listed = {table["id"]: table for table in client.get("/api/bot_tables").json["tables"]}
+        assert set(game_ids) <= set(listed)
+        assert listed[game_ids[1]]["challenger_difficulty"] == "medium"
+        assert listed[game_ids[0]]["watchers"] == 0
+    finally:
+        for game_id in game_ids:
+            SCHEDULER.remove(game_id)
+            games.pop(game_id, None)
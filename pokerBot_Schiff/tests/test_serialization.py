@@ -0,0 +1,75 @@
+import json
+
+import pytest
+from models import serialization
+from models.serialization import Fragment, dumps, dumps_text, loads
+
+RESPONSE = {
+    "status": "success",
+    "player_cards": ["ace_of_spades", "10_of_hearts"],
+    "pot": 15,
+    "equity": 0.5,
+    "hand_over": False,
+    "winner": None,
+    "message": "Bot re-raised to $40 ♠",
+}
+
+
+@pytest.fixture(params=["native", "stdlib"])
+def backend(request, monkeypatch):
+    """
+    Fixture that runs a test with the fast encoder, if installed, and with
+    the standard library fallback.
+    """
+    if request.param == "stdlib":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+def test_round_trip(backend):
+    """
+    Test that values encode to compact UTF-8 JSON that decodes back to the same values.
+    """
+    encoded = dumps(RESPONSE)
+    assert isinstance(encoded, bytes)
+    assert b": " not in encoded and b"\n" not in encoded
+    assert "♠".encode() in encoded
+    assert loads(encoded) == RESPONSE == json.loads(encoded)
+    assert json.loads(dumps_text(RESPONSE)) == RESPONSE
+    assert loads(json.dumps(RESPONSE, indent=4)) == RESPONSE  # Snapshots written before stay readable
+
+def test_numpy_values(backend):
+    """
+    Test that NumPy scalars and arrays encode as plain numbers and lists.
+    """
+    numpy = pytest.importorskip("numpy")
+    assert loads(dumps({"equity": numpy.float64(0.25), "count": numpy.int64(3), "ranks": numpy.arange(3)})) == {
+        "equity": 0.25, "count": 3, "ranks": [0, 1, 2]}
+
+def test_errors(backend):
+    """
+    Test that values that can't be encoded raise a TypeError and bad JSON a ValueError.
+    """
+    with pytest.raises(TypeError):
+        dumps({"cards": {object()}})
+    with pytest.raises(ValueError):
+        loads(b'{"torn": ')
+
+def test_fragments(backend):
+    """
+    Test that a fragment is encoded once and sent as is.
+    """
+    fragment = Fragment({"error": "Not logged in"})
+    assert dumps(fragment) is fragment.data
+    assert loads(dumps_text(fragment)) == {"error": "Not logged in"}
+
+def test_api_error_replies():
+    """
+    Test that the pre-encoded error replies reach clients as JSON.
+    """
+    from server import app
+    response = app.test_client().post("/api/game/1/action", data={"action": "call"})
+    assert response.status_code == 401
+    assert response.mimetype == "application/json"
+    assert response.json == {"error": "Not logged in"}
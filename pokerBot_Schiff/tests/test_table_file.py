@@ -0,0 +1,114 @@
+import array
+import os
+import subprocess
+import sys
+
+import pytest
+from models import hand_ranks
+from models.table_file import Table_File, TableFormatError, open_table_file, write_table_file
+
+
+@pytest.fixture
+def table_path(tmp_path):
+    """
+    Fixture that writes a small table file and returns its path.
+    """
+    path = str(tmp_path / "sample.tbl")
+    write_table_file(path, "sample", 3, {
+        "small": ("H", (2, 3), [1, 2, 3, 4, 5, 65535]),
+        "wide": ("q", (2,), array.array("q", [-1, 2 ** 40])),
+    }, {"note": "test"})
+    return path
+
+@pytest.fixture(scope="module")
+def ranks(tmp_path_factory):
+    """
+    Fixture that generates the hand rank tables into a temporary file.
+    """
+    table = hand_ranks.Hand_Ranks(str(tmp_path_factory.mktemp("tables") / "hand_ranks.tbl"))
+    yield table
+    table.file.close()
+
+def test_round_trip(table_path):
+    """
+    Test that sections read back with their shapes, types and values, and that
+    sections are aligned for zero-copy access.
+    """
+    with open_table_file(table_path, "sample", 3) as table_file:
+        assert table_file.metadata == {"note": "test"}
+        small = table_file.view("small")
+        assert small.shape == (2, 3)
+        assert small.tolist() == [[1, 2, 3], [4, 5, 65535]]
+        assert small.readonly
+        assert table_file.view("wide").tolist() == [-1, 2 ** 40]
+        assert all(entry["offset"] % 64 == 0 for entry in table_file.sections.values())
+
+def test_wrong_table_or_version(table_path):
+    """
+    Test that opening a file as another table or version is refused.
+    """
+    with pytest.raises(TableFormatError):
+        open_table_file(table_path, "sample", 4)
+    with pytest.raises(TableFormatError):
+        open_table_file(table_path, "other", 3)
+
+def test_corruption_is_detected(table_path):
+    """
+    Test that flipped bytes in a section, the directory or the magic are reported.
+    """
+    with open(table_path, "rb") as f:
+        original = f.read()
+    with Table_File(table_path) as table_file:
+        section_offset = table_file.sections["wide"]["offset"]
+
+    for position in (section_offset, 30, 0):
+        corrupt = bytearray(original)
+        corrupt[position] ^= 0xFF
+        with open(table_path, "wb") as f:
+            f.write(corrupt)
+        with pytest.raises(TableFormatError):
+            Table_File(table_path)
+
+    with open(table_path, "wb") as f:
+        f.write(original[:section_offset])
+    with pytest.raises(TableFormatError):
+        Table_File(table_path)
+
+def test_generator_cli(tmp_path):
+    """
+    Test that the CLI generates a table file that verifies.
+    """
+    path = str(tmp_path / "hand_ranks.tbl")
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-m", "models.table_file", "generate", "hand_ranks", path], cwd=cwd, check=True)
+    result = subprocess.run([sys.executable, "-m", "models.table_file", "verify", path],
+                            cwd=cwd, check=True, capture_output=True, text=True)
+    assert "OK" in result.stdout
+
+def test_hand_classes(ranks):
+    """
+    Test that the tables cover the 7462 classes of 5-card hands and order them.
+    """
+    assert ranks.file.metadata["classes"] == 7462
+    # Card codes: suit * 13 + rank, ranks 0 (two) to 12 (ace)
+    royal = [12, 11, 10, 9, 8]
+    wheel_flush = [12, 0, 1, 2, 3]
+    quads = [12, 25, 38, 51, 11]
+    worst = [13 + 5, 3, 2, 1, 0]
+    assert ranks.evaluate(royal) == 7462
+    assert ranks.evaluate(worst) == 1
+    assert ranks.category(ranks.evaluate(wheel_flush)) == hand_ranks.STRAIGHT_FLUSH
+    assert ranks.category(ranks.evaluate(quads)) == hand_ranks.FOUR_OF_A_KIND
+    assert ranks.evaluate(royal) > ranks.evaluate(wheel_flush) > ranks.evaluate(quads)
+
+def test_best_of_seven(ranks):
+    """
+    Test that a 7-card hand scores its best five cards.
+    """
+    # Two pair on the board with a third pair in the hand: aces and kings with a queen
+    seven = [12, 25, 11, 24, 10, 23, 13 + 0]
+    assert ranks.evaluate(seven) == ranks.evaluate([12, 25, 11, 24, 10])
+    # A six-card flush beats the straight also present and plays its top five
+    seven = [0, 1, 2, 3, 13 + 4, 9, 11]
+    assert ranks.category(ranks.evaluate(seven)) == hand_ranks.FLUSH
+    assert ranks.evaluate(seven) == ranks.evaluate([1, 2, 3, 9, 11])
@@ -0,0 +1,50 @@
+import pytest
+from models import tables
+
+
+@pytest.fixture(autouse=True)
+def clean_registry(monkeypatch):
+    """
+    Fixture that gives each test an empty table registry.
+    """
+    monkeypatch.setattr(tables, "_builders", {})
+    monkeypatch.setattr(tables, "_tables", {})
+
+def test_table_is_built_once():
+    """
+    Test that a table is built on first use and then reused.
+    """
+    calls = []
+    tables.register_table("squares", lambda: calls.append(1) or [n * n for n in range(10)])
+
+    assert tables.get_table("squares")[3] == 9
+    assert tables.get_table("squares") is tables.get_table("squares")
+    assert len(calls) == 1
+
+def test_build_all():
+    """
+    Test that build_all builds the tables not built yet and reports their timings.
+    """
+    tables.register_table("a", lambda: "A")
+    tables.register_table("b", lambda: "B")
+    tables.get_table("a")
+
+    assert list(tables.build_all()) == ["b"]
+    assert tables.build_all() == {}
+
+def test_register_conflict():
+    """
+    Test that a name can't be registered twice with different builders.
+    """
+    builder = lambda: 1
+    tables.register_table("one", builder)
+    tables.register_table("one", builder)
+    with pytest.raises(ValueError):
+        tables.register_table("one", lambda: 2)
+
+def test_unknown_table():
+    """
+    Test that an unregistered table raises a KeyError.
+    """
+    with pytest.raises(KeyError):
+        tables.get_table("missing")
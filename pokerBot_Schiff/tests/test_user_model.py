@@ -1,18 +1,23 @@
 import pytest
 import json
+import os
+from models.passwords import Password_Hasher, is_hashed
 from models.user_model import User, User_Model
+from models.user_storage import JSON_User_Storage, SQLite_User_Storage, migrate_json_to_sqlite
 from .sample_user_data import sample_users  # Import sample data
 
 # Use a consistent database name for testing
 TEST_DB_NAME = "test_users.json"
 
 @pytest.fixture(autouse=True)
-def setup_database():
+def setup_database(monkeypatch):
     """
     Fixture to initialize the database before each test.  This ensures
     a clean state for every test.  It recreates the database file
-    with the sample user data.
+    with the sample user data.  Password hashing uses a cheap cost so
+    the tests stay fast.
     """
+    monkeypatch.setattr(User_Model, "_hasher", Password_Hasher(n=2 ** 4, r=1))
     User_Model.initialize_DB(TEST_DB_NAME)  # Use the test-specific DB name.
     # Populate the database with sample data.
     with open(User_Model._get_db_path(), "w") as f:
@@ -60,7 +65,8 @@ def test_create_user():
     assert User_Model.exists(username="test_user")
     assert new_user.username == "test_user"
     assert new_user.email == "test@example.com"
-    assert new_user.password == "test_password"
+    assert is_hashed(new_user.password)
+    assert User_Model.authenticate("test_user", "test_password").id == new_user.id
 
 def test_create_duplicate_user():
     """
@@ -80,6 +86,15 @@ def test_create_user_missing_fields():
     with pytest.raises(ValueError):
         User_Model.create({"email": "test@example.com", "password": "test_password"})
 
+def test_create_user_reserved_username():
+    """
+    Test that the game's own seat names can't be registered.
+    """
+    for username in ("bot", "Challenger"):
+        with pytest.raises(ValueError):
+            User_Model.create({"username": username, "email": "seat@example.com", "password": "password"})
+    assert not User_Model.exists(username="bot")
+
 def test_get_user_by_username():
     """
     Test that a user can be retrieved by username.
@@ -141,7 +156,7 @@ def test_update_user():
     assert isinstance(user, User)
     assert user.username == "jane.smith.updated"
     assert user.email == "jane.updated@example.com"
-    assert user.password == "newpassword"
+    assert User_Model.authenticate("jane.smith.updated", "newpassword").id == 2
 
 def test_update_user_missing_id():
     """
@@ -199,3 +214,309 @@ def test_remove_nonexistent_user():
     with pytest.raises(ValueError):
         User_Model.remove(username="nonexistent_user")
 
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """
+    Fixture that switches User_Model to a SQLite database holding the sample users.
+    """
+    monkeypatch.setattr(User_Model, "_DATA_DIR", str(tmp_path))
+    json_path = tmp_path / "users.json"
+    json_path.write_text(json.dumps(sample_users))
+    migrate_json_to_sqlite(str(json_path), str(tmp_path / "test_users.db"))
+    User_Model.initialize_DB("test_users.db")
+    yield
+    User_Model._get_storage().close()
+
+def test_sqlite_backend_selected(sqlite_db):
+    """
+    Test that a .db database name selects the SQLite backend.
+    """
+    assert isinstance(User_Model._get_storage(), SQLite_User_Storage)
+    assert len(User_Model.get_all()) == 5
+
+def test_sqlite_crud(sqlite_db):
+    """
+    Test create, get, update and remove against the SQLite backend.
+    """
+    new_user = User_Model.create({"username": "test_user", "email": "test@example.com", "password": "pw"})
+    assert new_user.id == 6
+    assert User_Model.get(username="test_user").email == "test@example.com"
+
+    User_Model.update({"id": 6, "email": "updated@example.com"})
+    assert User_Model.get(id=6).email == "updated@example.com"
+
+    User_Model.remove(username="test_user")
+    assert not User_Model.exists(username="test_user")
+    with pytest.raises(ValueError):
+        User_Model.remove(username="test_user")
+
+def test_sqlite_unique_username(sqlite_db):
+    """
+    Test that the SQLite backend rejects duplicate usernames on create and update.
+    """
+    with pytest.raises(ValueError):
+        User_Model.create(sample_users[0])
+    with pytest.raises(ValueError):
+        User_Model.update({"id": 2, "username": "john_doe"})
+
+def test_migrate_refuses_non_empty_database(sqlite_db, tmp_path):
+    """
+    Test that the migration does not import into a database that already has users.
+    """
+    with pytest.raises(ValueError):
+        migrate_json_to_sqlite(str(tmp_path / "users.json"), str(tmp_path / "test_users.db"))
+
+@pytest.fixture
+def json_storage(tmp_path):
+    """
+    Fixture that returns a JSON storage whose snapshot holds the sample users.
+    """
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps(sample_users))
+    return JSON_User_Storage(str(path))
+
+def test_json_write_appends_to_log(json_storage):
+    """
+    Test that a write goes to the change log and leaves the snapshot untouched.
+    """
+    json_storage.insert({"username": "test_user", "email": "test@example.com", "password": "pw"})
+    with open(json_storage.path) as f:
+        assert len(json.load(f)) == 5
+    with open(json_storage.log_path) as f:
+        assert len(f.readlines()) == 2  # Header plus the create record.
+    assert len(JSON_User_Storage(json_storage.path).load_all()) == 6
+
+def test_json_compaction(json_storage, monkeypatch):
+    """
+    Test that the log is folded into the snapshot after enough records.
+    """
+    monkeypatch.setattr(JSON_User_Storage, "_COMPACT_EVERY", 2)
+    json_storage.replace_all(sample_users[:2])
+    json_storage.delete("john_doe")
+    json_storage.update({"id": 2, "username": "jane", "email": "jane@example.com", "password": "pw"})
+    with open(json_storage.path) as f:
+        users_data = json.load(f)
+    assert [user["username"] for user in users_data] == ["jane"]
+    with open(json_storage.log_path) as f:
+        assert len(f.readlines()) == 1
+
+def test_json_torn_log_record_is_ignored(json_storage):
+    """
+    Test that a partially written log record (e.g. after a crash) is dropped.
+    """
+    json_storage.insert({"username": "test_user", "email": "test@example.com", "password": "pw"})
+    with open(json_storage.log_path, "a") as f:
+        f.write('{"op": "remove", "usern')
+    reopened = JSON_User_Storage(json_storage.path)
+    assert reopened.find(username="test_user") is not None
+    reopened.delete("eva_brown")
+    assert len(JSON_User_Storage(json_storage.path).load_all()) == 5
+
+def test_json_log_of_replaced_snapshot_is_ignored(json_storage):
+    """
+    Test that replacing the snapshot by hand discards the old change log.
+    """
+    json_storage.insert({"username": "test_user", "email": "test@example.com", "password": "pw"})
+    with open(json_storage.path, "w") as f:
+        json.dump(sample_users[:2], f)
+    assert [user["id"] for user in json_storage.load_all()] == [1, 2]
+
+def test_create_many():
+    """
+    Test that a batch of users is created with consecutive IDs.
+    """
+    new_users = User_Model.create_many([
+        {"username": "batch_1", "email": "b1@example.com", "password": "pw"},
+        {"username": "batch_2", "email": "b2@example.com", "password": "pw"},
+    ])
+    assert [user.id for user in new_users] == [6, 7]
+    assert User_Model.exists(username="batch_2")
+
+def test_create_many_rejects_whole_batch_on_duplicate(monkeypatch):
+    """
+    Test that one taken username rejects the whole batch unless skip_existing
+    is set, and that only the users written have their passwords hashed.
+    """
+    hashed = []
+    hash_many = User_Model._hasher.hash_many
+    monkeypatch.setattr(User_Model._hasher, "hash_many", lambda passwords: hashed.extend(passwords) or hash_many(passwords))
+    batch = [
+        {"username": "batch_1", "email": "b1@example.com", "password": "pw"},
+        {"username": "john_doe", "email": "john@example.com", "password": "pw"},
+        {"username": "batch_1", "email": "again@example.com", "password": "pw"},
+    ]
+    with pytest.raises(ValueError):
+        User_Model.create_many(batch)
+    assert not User_Model.exists(username="batch_1")
+
+    assert hashed == []
+
+    new_users = User_Model.create_many(batch, skip_existing=True)
+    assert [user.username for user in new_users] == ["batch_1"]
+    assert hashed == ["pw"]
+
+def test_get_many():
+    """
+    Test that get_many returns users in request order with None for unknown keys.
+    """
+    users = User_Model.get_many(usernames=["eva_brown", "nonexistent_user", "john_doe"])
+    assert [user.id if user else None for user in users] == [5, None, 1]
+    users = User_Model.get_many(ids=[2, 999])
+    assert users[0].username == "jane_smith" and users[1] is None
+    with pytest.raises(ValueError):
+        User_Model.get_many()
+
+@pytest.mark.parametrize("file_name, content", [
+    ("partners.csv", "username,email,password\np1,p1@example.com,pw\np2,p2@example.com,pw\np3,p3@example.com,pw\n"),
+    ("partners.jsonl", "\n".join(json.dumps({"username": f"p{i}", "email": "p@example.com", "password": "pw"}) for i in (1, 2, 3))),
+])
+def test_import_users(tmp_path, file_name, content):
+    """
+    Test that users are streamed in from CSV and JSONL files in batches.
+    """
+    path = tmp_path / file_name
+    path.write_text(content)
+    assert User_Model.import_users(str(path), batch_size=2) == 3
+    assert [user.id for user in User_Model.get_many(usernames=["p1", "p2", "p3"])] == [6, 7, 8]
+
+def test_sqlite_create_many(sqlite_db):
+    """
+    Test that bulk creation and lookup work against the SQLite backend.
+    """
+    new_users = User_Model.create_many([
+        {"username": "batch_1", "email": "b1@example.com", "password": "pw"},
+        {"username": "john_doe", "email": "john@example.com", "password": "pw"},
+    ], skip_existing=True)
+    assert [user.id for user in new_users] == [6]
+    users = User_Model.get_many(usernames=["batch_1", "nonexistent_user"])
+    assert users[0].id == 6 and users[1] is None
+
+def test_ids_are_not_reused():
+    """
+    Test that removing the newest user does not free its ID.
+    """
+    User_Model.remove(username="eva_brown")
+    new_user = User_Model.create({"username": "test_user", "email": "test@example.com", "password": "pw"})
+    assert new_user.id == 6
+    reopened = JSON_User_Storage(User_Model._get_db_path())
+    assert reopened.insert({"username": "test_user_2", "email": "t2@example.com", "password": "pw"})["id"] == 7
+
+def test_transaction_commits_once():
+    """
+    Test that the operations of a transaction are visible inside it and
+    written to the log together when it ends.
+    """
+    log_path = User_Model._get_storage().log_path
+    with User_Model.transaction():
+        User_Model.create({"username": "test_user", "email": "test@example.com", "password": "pw"})
+        User_Model.update({"id": 6, "email": "updated@example.com"})
+        assert User_Model.get(username="test_user").email == "updated@example.com"
+        with open(log_path) as f:
+            assert len(f.readlines()) == 1  # Only the header so far.
+    with open(log_path) as f:
+        assert len(f.readlines()) == 3
+    assert JSON_User_Storage(User_Model._get_db_path()).find(id=6)["email"] == "updated@example.com"
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_transaction_rolls_back_on_error(backend, request):
+    """
+    Test that nothing from a failed transaction is kept.
+    """
+    if backend == "sqlite":
+        request.getfixturevalue("sqlite_db")
+    with pytest.raises(RuntimeError):
+        with User_Model.transaction():
+            User_Model.create({"username": "test_user", "email": "test@example.com", "password": "pw"})
+            User_Model.remove(username="john_doe")
+            raise RuntimeError("abort")
+    assert not User_Model.exists(username="test_user")
+    assert User_Model.exists(username="john_doe")
+    assert User_Model.create({"username": "test_user", "email": "test@example.com", "password": "pw"}).id == 6
+
+def test_authenticate():
+    """
+    Test that authenticate accepts the right password only.
+    """
+    User_Model.create({"username": "test_user", "email": "test@example.com", "password": "pw"})
+    assert User_Model.authenticate("test_user", "pw").username == "test_user"
+    assert User_Model.authenticate("test_user", "wrong") is None
+    assert User_Model.authenticate("nonexistent_user", "pw") is None
+
+def test_authenticate_upgrades_plaintext_password():
+    """
+    Test that a legacy plaintext password is replaced by a hash on login.
+    """
+    user = User_Model.authenticate("john_doe", "password123")
+    assert user is not None
+    assert is_hashed(User_Model.get(username="john_doe").password)
+    assert User_Model.authenticate("john_doe", "password123") is not None
+
+def test_authenticate_rehashes_on_new_parameters(monkeypatch):
+    """
+    Test that a hash made with outdated cost parameters is redone on login.
+    """
+    User_Model.create({"username": "test_user", "email": "test@example.com", "password": "pw"})
+    monkeypatch.setattr(User_Model, "_hasher", Password_Hasher(n=2 ** 5, r=1))
+    User_Model.authenticate("test_user", "pw")
+    assert User_Model.get(username="test_user").password.startswith("scrypt$32$1$1$")
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_gets_its_own_lock(json_storage):
+    """
+    Test that a forked worker doesn't reuse the parent's lock file, whose flock
+    it would share, and can still write.
+    """
+    json_storage.find(username="john_doe")
+    parent_lock = json_storage._lock_file
+    assert parent_lock is not None
+
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        ok = json_storage._lock_file is None and json_storage.insert(
+            {"username": "forked", "email": "f@example.com", "password": "pw"}) is not None
+        os.write(write_end, b"1" if ok else b"0")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read_end, 1) == b"1"
+    assert json_storage._lock_file is parent_lock
+    assert json_storage.find(username="forked") is not None
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_record_result(backend, request):
+    """
+    Test that finished hands move the bankroll and count the results, and
+    that later updates keep them.
+    """
+    if backend == "sqlite":
+        request.getfixturevalue("sqlite_db")
+    assert User_Model.get(username="john_doe").bankroll == 1000
+    User_Model.record_result("john_doe", 150)
+    user = User_Model.record_result("john_doe", -40)
+    assert (user.bankroll, user.hands_played, user.hands_won) == (1110, 2, 1)
+    User_Model.update({"id": user.id, "email": "new@example.com"})
+    stored = User_Model.get(username="john_doe")
+    assert (stored.email, stored.bankroll, stored.hands_played, stored.hands_won) == ("new@example.com", 1110, 2, 1)
+    assert User_Model.record_result("nonexistent_user", 10) is None
+    assert User_Model.record_result("john_doe", -5000).bankroll == 0
+
+def test_sqlite_adds_result_columns(tmp_path):
+    """
+    Test that a SQLite database made before the results were kept gets their
+    columns, with the starting values, when it is opened.
+    """
+    import sqlite3
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT NOT NULL, email TEXT NOT NULL, password TEXT NOT NULL)")
+    conn.execute("INSERT INTO users VALUES (1, 'old_user', 'old@example.com', 'pw')")
+    conn.commit()
+    conn.close()
+    storage = SQLite_User_Storage(path)
+    storage.initialize()
+    try:
+        assert storage.find(username="old_user")["bankroll"] == 1000
+        assert storage.insert({"username": "new_user", "email": "new@example.com", "password": "pw"})["hands_won"] == 0
+    finally:
+        storage.close()
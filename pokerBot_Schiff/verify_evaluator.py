@@ -0,0 +1,191 @@
+"""
+Checks a hand evaluator against a brute-force reference, on every core.
+
+- five: every one of the 2,598,960 five-card hands.
+- seven: a seeded random sample of seven-card hands, each scored by the
+  reference as the best of its 21 five-card subsets.
+
+An evaluator passes when it orders hands exactly like the reference: hands
+the reference ties get the same score, and a better hand always gets a
+higher score. For the full five-card pass it must also produce exactly
+7462 distinct scores. Run this before switching the game to a new or
+changed evaluator.
+
+Usage:
+    python verify_evaluator.py                       # hand_ranks, both passes
+    python verify_evaluator.py --evaluator legacy    # evaluate_hand in GameController
+    python verify_evaluator.py --pass seven --samples 1000000 --workers 8
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from models.cards import CARD_NAMES
+
+# Five-card hand classes: 1277 high card, 2860 pair, 858 two pair, 858 trips, 10 straights,
+# 1277 flushes, 156 full houses, 156 quads, 10 straight flushes (the royal flush among them)
+HAND_CLASSES = 7462
+
+# Examples of failures kept for the report
+MAX_EXAMPLES = 10
+
+# Every straight, high card first; the wheel (5-4-3-2-A) plays the ace low
+STRAIGHTS = [tuple(range(high, high - 5, -1)) for high in range(14, 5, -1)] + [(5, 4, 3, 2, 14)]
+
+def reference(cards):
+    """
+    Score a five-card hand from first principles (cards as codes)
+    Returns: a tuple that compares like the hands do
+    """
+    values = [code % 13 + 2 for code in cards]
+    flush = len({code // 13 for code in cards}) == 1
+    straight = next((window[0] for window in STRAIGHTS if set(window) == set(values)), None)
+    # Group by value: larger groups first, then higher values
+    groups = sorted(((values.count(value), value) for value in set(values)), reverse=True)
+    shape = [count for count, _ in groups]
+    ranked = tuple(value for _, value in groups)
+
+    if straight and flush:
+        return (8, (straight,))
+    if shape == [4, 1]:
+        return (7, ranked)
+    if shape == [3, 2]:
+        return (6, ranked)
+    if flush:
+        return (5, ranked)
+    if straight:
+        return (4, (straight,))
+    if shape == [3, 1, 1]:
+        return (3, ranked)
+    if shape == [2, 2, 1]:
+        return (2, ranked)
+    if shape == [2, 1, 1, 1]:
+        return (1, ranked)
+    return (0, ranked)
+
+def reference_best(cards):
+    """Best reference score among the five-card subsets of a hand"""
+    return max(reference(five) for five in itertools.combinations(cards, 5))
+
+def load_evaluator(name):
+    """
+    The evaluator to check, as a function of a list of card codes
+    Returns: a function returning comparable scores
+    """
+    if name == 'hand_ranks':
+        from models import hand_ranks
+        return hand_ranks.evaluate
+    if name == 'legacy':
+        from controllers.GameController import evaluate_hand
+
+        def legacy(cards):
+            category, kickers = evaluate_hand([CARD_NAMES[code] for code in cards[:2]],
+                                              [CARD_NAMES[code] for code in cards[2:]])
+            return (category, tuple(kickers))
+        return legacy
+    raise ValueError(f"Unknown evaluator '{name}'")
+
+class Check:
+    """Reference scores mapped to evaluator scores, with the failures found"""
+    def __init__(self):
+        self.scores = {}  # reference score -> (evaluator score, example hand)
+        self.failures = []
+        self.hands = 0
+
+    def add(self, reference_score, score, cards):
+        self.hands += 1
+        self._record(reference_score, score, cards)
+
+    def _record(self, reference_score, score, cards):
+        seen = self.scores.get(reference_score)
+        if seen is None:
+            self.scores[reference_score] = (score, cards)
+        elif seen[0] != score and len(self.failures) < MAX_EXAMPLES:
+            self.failures.append(f"{describe(cards)} scored {score!r}, but the equal hand {describe(seen[1])} scored {seen[0]!r}")
+
+    def merge(self, other):
+        self.hands += other.hands
+        self.failures.extend(other.failures[:MAX_EXAMPLES - len(self.failures)])
+        for reference_score, (score, cards) in other.scores.items():
+            self._record(reference_score, score, cards)
+
+    def check_order(self):
+        """Hands the reference ranks higher must score higher"""
+        ordered = sorted(self.scores.items())
+        for (low, (low_score, low_cards)), (high, (high_score, high_cards)) in zip(ordered, ordered[1:]):
+            if not low_score < high_score and len(self.failures) < MAX_EXAMPLES:
+                self.failures.append(f"{describe(high_cards)} beats {describe(low_cards)}, "
+                                     f"but scored {high_score!r} against {low_score!r}")
+
+def describe(cards):
+    return "[" + ", ".join(CARD_NAMES[code] for code in cards) + "]"
+
+def check_five(evaluator_name, first_card):
+    """Worker: every five-card hand whose lowest card is first_card"""
+    evaluate = load_evaluator(evaluator_name)
+    check = Check()
+    for rest in itertools.combinations(range(first_card + 1, 52), 4):
+        cards = [first_card, *rest]
+        check.add(reference(cards), evaluate(cards), cards)
+    return check
+
+def check_seven(evaluator_name, seed, count):
+    """Worker: count random seven-card hands"""
+    evaluate = load_evaluator(evaluator_name)
+    rng = random.Random(seed)
+    check = Check()
+    for _ in range(count):
+        cards = rng.sample(range(52), 7)
+        check.add(reference_best(cards), evaluate(cards), cards)
+    return check
+
+def run_pass(pool, function, tasks):
+    check = Check()
+    for result in pool.starmap(function, tasks):
+        check.merge(result)
+    check.check_order()
+    return check
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify a hand evaluator against a brute-force reference.")
+    parser.add_argument('--evaluator', choices=['hand_ranks', 'legacy'], default='hand_ranks')
+    parser.add_argument('--pass', dest='passes', choices=['five', 'seven'], action='append',
+                        help='which checks to run (default: both)')
+    parser.add_argument('--samples', type=int, default=200000, help='seven-card hands to sample (default 200000)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # Load (or generate) the tables once, before the workers fork, so they share them
+    load_evaluator(args.evaluator)([0, 1, 2, 3, 4])
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    failed = False
+    with context.Pool(args.workers) as pool:
+        for name in args.passes or ['five', 'seven']:
+            start = time.perf_counter()
+            if name == 'five':
+                check = run_pass(pool, check_five, [(args.evaluator, first) for first in range(48)])
+                if len(check.scores) != HAND_CLASSES:
+                    check.failures.append(f"The reference found {len(check.scores)} hand classes, not {HAND_CLASSES}")
+                if len({score for score, _ in check.scores.values()}) != HAND_CLASSES:
+                    check.failures.append("The evaluator doesn't give each hand class its own score")
+            else:
+                chunks = args.workers * 4
+                tasks = [(args.evaluator, args.seed * 1000003 + index, args.samples // chunks + (index < args.samples % chunks))
+                         for index in range(chunks)]
+                check = run_pass(pool, check_seven, tasks)
+            elapsed = time.perf_counter() - start
+            status = "FAILED" if check.failures else "ok"
+            print(f"{name}-card: {check.hands} hands, {len(check.scores)} classes, {elapsed:.1f} s: {status}")
+            for failure in check.failures:
+                print(f"    {failure}")
+            failed = failed or bool(check.failures)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()